@@ -1,13 +1,16 @@
 # database/__init__.py
 """Database package for Construction POS System"""
 
-from .database import db_manager, init_database, DatabaseUtils
-from .models import Base, Product, Category, Sale, SaleItem, Customer, StockMovement, ProductHistory, Setting
+from .database import db_manager, init_database, DatabaseUtils, settings_registry
+from .models import (Base, Product, Category, Sale, SaleItem, Customer, StockMovement, ProductHistory, Setting,
+                     SaleSequence, SalesDaily, ProductSalesDaily, CategorySalesDaily, CashierSalesDaily,
+                     SalesArchive)
 
 __all__ = [
     'db_manager',
     'init_database', 
     'DatabaseUtils',
+    'settings_registry',
     'Base',
     'Product',
     'Category', 
@@ -16,5 +19,11 @@ __all__ = [
     'Customer',
     'StockMovement',
     'ProductHistory',
-    'Setting'
+    'Setting',
+    'SaleSequence',
+    'SalesDaily',
+    'ProductSalesDaily',
+    'CategorySalesDaily',
+    'CashierSalesDaily',
+    'SalesArchive'
 ]
\ No newline at end of file
@@ -0,0 +1,200 @@
+# database/archive.py
+"""Yearly sales archives.
+
+archive_year() moves the sales, sale items and stock movements of a closed
+year out of the main database into ``archives/construction_pos_<year>.db``
+next to it, and records the file in ``sales_archives``. The daily rollups stay
+in the main database, so period totals still cover every year; only listings
+of individual sales need the archive files, which database/reports.py
+attaches when a date range reaches into an archived year.
+
+    python -m database.archive --list
+    python -m database.archive 2023 [--vacuum]
+"""
+import os
+from contextlib import contextmanager
+from datetime import date, datetime
+
+from .database import db_manager, db_path
+from .models import SalesArchive
+
+ARCHIVE_DIR_NAME = "archives"
+ARCHIVE_FILE_PATTERN = "construction_pos_{year}.db"
+
+# Moved in this order; deleted from the main database in reverse
+ARCHIVED_TABLES = ["sales", "sale_items", "stock_movements"]
+
+_YEAR_FILTERS = {
+    "sales": "created_at >= :start AND created_at < :end",
+    "sale_items": "sale_id IN (SELECT id FROM main.sales WHERE created_at >= :start AND created_at < :end)",
+    "stock_movements": "created_at >= :start AND created_at < :end",
+}
+
+_ARCHIVE_INDEXES = [
+    "CREATE INDEX IF NOT EXISTS archive.ix_sales_created_at ON sales (created_at)",
+    "CREATE INDEX IF NOT EXISTS archive.ix_sale_items_sale ON sale_items (sale_id)",
+    "CREATE INDEX IF NOT EXISTS archive.ix_stock_movements_product_created "
+    "ON stock_movements (product_id, created_at)",
+]
+
+
+def get_archive_dir():
+    return os.path.join(os.path.dirname(os.path.abspath(db_path)), ARCHIVE_DIR_NAME)
+
+
+def get_archive_path(file_name):
+    return os.path.join(get_archive_dir(), file_name)
+
+
+def archived_years(session, from_day=None, to_day=None):
+    """{year: archive path} for archived years overlapping from_day..to_day"""
+    query = session.query(SalesArchive.year, SalesArchive.file_name)
+    if from_day is not None:
+        query = query.filter(SalesArchive.year >= from_day.year)
+    if to_day is not None:
+        query = query.filter(SalesArchive.year <= to_day.year)
+    return {year: get_archive_path(file_name) for year, file_name in query.order_by(SalesArchive.year)}
+
+
+@contextmanager
+def _raw_connection():
+    """The engine's sqlite3 connection in autocommit mode, for ATTACH and BEGIN IMMEDIATE"""
+    raw = db_manager.engine.raw_connection()
+    connection = raw.dbapi_connection
+    old_isolation = connection.isolation_level
+    connection.isolation_level = None
+    try:
+        yield connection
+    finally:
+        connection.isolation_level = old_isolation
+        raw.close()
+
+
+def _columns(connection, schema, table):
+    return [row[1] for row in connection.execute(f"PRAGMA {schema}.table_info({table})")]
+
+
+def _prepare_archive(connection):
+    """Create the archived tables in the attached file, matching the main schema"""
+    for table in ARCHIVED_TABLES:
+        sql = connection.execute(
+            "SELECT sql FROM main.sqlite_master WHERE type = 'table' AND name = ?", (table,)
+        ).fetchone()[0]
+        existing = _columns(connection, "archive", table)
+        if not existing:
+            connection.execute("CREATE TABLE archive." + sql[len("CREATE TABLE "):])
+            continue
+        # An archive written before a migration added columns
+        for row in connection.execute(f"PRAGMA main.table_info({table})"):
+            if row[1] not in existing:
+                connection.execute(f"ALTER TABLE archive.{table} ADD COLUMN {row[1]} {row[2]}")
+    for statement in _ARCHIVE_INDEXES:
+        connection.execute(statement)
+
+
+def archive_year(year, vacuum=False):
+    """Move one closed year out of the main database. Returns the SalesArchive values.
+
+    The rows are first copied and committed to the archive file, then deleted
+    from the main database in a second transaction after checking that every
+    one of them arrived. Running it again for the same year is safe and also
+    picks up sales recorded for that year after it was archived (e.g. replayed
+    from an offline till).
+    """
+    year = int(year)
+    if year >= date.today().year:
+        raise ValueError(f"{year} is not closed yet; only past years can be archived")
+    if db_path == ":memory:":
+        raise ValueError("Cannot archive an in-memory database")
+
+    file_name = ARCHIVE_FILE_PATTERN.format(year=year)
+    path = get_archive_path(file_name)
+    os.makedirs(get_archive_dir(), exist_ok=True)
+    params = {'start': f"{year:04d}-01-01", 'end': f"{year + 1:04d}-01-01"}
+
+    with _raw_connection() as connection:
+        connection.execute("ATTACH DATABASE ? AS archive", (path,))
+        try:
+            _prepare_archive(connection)
+
+            # 1. Copy into the archive file
+            connection.execute("BEGIN IMMEDIATE")
+            try:
+                for table in ARCHIVED_TABLES:
+                    columns = ", ".join(_columns(connection, "main", table))
+                    connection.execute(
+                        f"INSERT OR REPLACE INTO archive.{table} ({columns}) "
+                        f"SELECT {columns} FROM main.{table} WHERE {_YEAR_FILTERS[table]}", params)
+                connection.execute("COMMIT")
+            except Exception:
+                connection.execute("ROLLBACK")
+                raise
+
+            # 2. Remove from the main database once everything is in the archive
+            connection.execute("BEGIN IMMEDIATE")
+            try:
+                for table in ARCHIVED_TABLES:
+                    missing = connection.execute(
+                        f"SELECT COUNT(*) FROM main.{table} m WHERE {_YEAR_FILTERS[table]} "
+                        f"AND NOT EXISTS (SELECT 1 FROM archive.{table} a WHERE a.id = m.id)", params
+                    ).fetchone()[0]
+                    if missing:
+                        raise RuntimeError(f"{missing} row(s) of {table} did not reach {path}")
+                for table in reversed(ARCHIVED_TABLES):
+                    connection.execute(f"DELETE FROM main.{table} WHERE {_YEAR_FILTERS[table]}", params)
+
+                sale_count, total_amount = connection.execute(
+                    "SELECT COUNT(*), COALESCE(SUM(total_amount), 0) FROM archive.sales").fetchone()
+                movement_count = connection.execute("SELECT COUNT(*) FROM archive.stock_movements").fetchone()[0]
+                connection.execute(
+                    "INSERT OR REPLACE INTO main.sales_archives "
+                    "(year, file_name, sale_count, movement_count, total_amount, archived_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    (year, file_name, sale_count, movement_count, total_amount, datetime.now()),
+                )
+                connection.execute("COMMIT")
+            except Exception:
+                connection.execute("ROLLBACK")
+                raise
+        finally:
+            connection.execute("DETACH DATABASE archive")
+
+        if vacuum:
+            # Give the freed pages back to the file system
+            connection.execute("VACUUM")
+
+    print(f"✅ Archived {sale_count} sale(s) of {year} to {path}")
+    return {'year': year, 'file_name': file_name, 'sale_count': sale_count,
+            'movement_count': movement_count, 'total_amount': total_amount}
+
+
+def archivable_years():
+    """Past years that still have sales in the main database"""
+    with _raw_connection() as connection:
+        rows = connection.execute(
+            "SELECT DISTINCT CAST(strftime('%Y', created_at) AS INTEGER) FROM sales "
+            "WHERE created_at < ? ORDER BY 1", (f"{date.today().year:04d}-01-01",)
+        ).fetchall()
+    return [row[0] for row in rows if row[0]]
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Move closed years of sales into archive files")
+    parser.add_argument("year", nargs="?", type=int, help="Year to archive")
+    parser.add_argument("--list", action="store_true", help="Show archived and archivable years")
+    parser.add_argument("--vacuum", action="store_true", help="Shrink the main database file afterwards")
+    args = parser.parse_args()
+
+    if args.list or args.year is None:
+        session = db_manager.get_session()
+        try:
+            for archive in session.query(SalesArchive).order_by(SalesArchive.year):
+                print(f"{archive.year}: {archive.sale_count} sale(s), {archive.total_amount:,.0f} "
+                      f"in {get_archive_path(archive.file_name)}")
+        finally:
+            session.close()
+        print(f"Can be archived: {', '.join(str(year) for year in archivable_years()) or 'none'}")
+    else:
+        archive_year(args.year, vacuum=args.vacuum)
@@ -0,0 +1,239 @@
+# database/backend.py
+"""Data access used by the POS screen, either local or through the sale server.
+
+LocalBackend works on the database file directly. When a sale server URL is
+configured (``POS_SERVER_URL`` or the ``server_url`` setting) get_backend()
+returns a server.client.SaleServerClient instead, which has the same methods
+but sends every call to the server, so several tills share one writer.
+"""
+import os
+
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import joinedload, selectinload
+
+from .catalog import product_catalog
+from .dashboard import dashboard_counters
+from .database import apply_batch, create_writer_session_factory, db_manager, db_path, DatabaseUtils
+from .models import Category, Customer, Product, Sale, SaleItem
+from .rollups import product_performance, sales_summary
+from .sales import commit_sale, journal_sale_operation, journal_sale_results
+from .search import apply_product_search
+from .stock import record_stock_movement
+
+
+def _product_dict(row):
+    return {
+        'id': row.id,
+        'name': row.name,
+        'category': row.category_name,
+        'price': row.selling_price,
+        'stock': row.stock_quantity,
+        'unit': row.unit,
+    }
+
+
+def _product_query(session):
+    return session.query(
+        Product.id, Product.name, Category.name.label('category_name'),
+        Product.selling_price, Product.stock_quantity, Product.unit,
+    ).outerjoin(Category, Product.category_id == Category.id)
+
+
+def sale_to_dict(sale):
+    """Plain data for a sale and what its receipt shows"""
+    return {
+        'id': sale.id,
+        'sale_number': sale.sale_number,
+        'created_at': sale.created_at,
+        'subtotal': sale.subtotal,
+        'tax_amount': sale.tax_amount,
+        'discount_amount': sale.discount_amount or 0.0,
+        'total_amount': sale.total_amount,
+        'payment_method': sale.payment_method,
+        'amount_paid': sale.amount_paid,
+        'change_amount': sale.change_amount,
+        'customer': {'name': sale.customer.name} if sale.customer else None,
+        'user': {'username': sale.user.username} if sale.user else None,
+        'sale_items': [
+            {
+                'quantity': item.quantity,
+                'unit_price': item.unit_price,
+                'total_price': item.total_price,
+                'product': {'name': item.product.name if item.product else ""},
+            }
+            for item in sale.sale_items
+        ],
+    }
+
+
+def price_cart_items(session, items, tax_rate=0.0):
+    """Price {product_id, quantity} lines at the current selling prices"""
+    quantities = {int(item['product_id']): float(item['quantity']) for item in items}
+    rows = {row.id: row for row in _product_query(session).filter(Product.id.in_(list(quantities)))}
+    missing = set(quantities) - set(rows)
+    if missing:
+        raise ValueError(f"Unknown product id(s): {', '.join(str(i) for i in sorted(missing))}")
+
+    lines = []
+    for product_id, quantity in quantities.items():
+        line = _product_dict(rows[product_id])
+        line.update(quantity=quantity, total=quantity * line['price'])
+        lines.append(line)
+    subtotal = sum(line['total'] for line in lines)
+    tax_amount = subtotal * (tax_rate / 100)
+    return {'lines': lines, 'subtotal': subtotal, 'tax_amount': tax_amount, 'total_amount': subtotal + tax_amount}
+
+
+class BackendUnavailableError(Exception):
+    """Raised when the primary store cannot take writes right now; worth retrying later"""
+
+
+class LocalBackend:
+    """Reads and writes the local database file"""
+
+    remote = False
+
+    def __init__(self):
+        self._writer_sessions = None
+
+    def _check_primary(self):
+        if db_manager.is_fallback:
+            raise BackendUnavailableError("The shared database is not available; using a temporary one")
+
+    def categories(self):
+        return product_catalog.category_names()
+
+    def customers(self):
+        session = db_manager.get_session()
+        try:
+            rows = session.query(Customer.id, Customer.name).filter(Customer.is_active == True).order_by(Customer.id)
+            return [{'id': row.id, 'name': row.name} for row in rows]
+        finally:
+            session.close()
+
+    def search_products(self, search_term="", category=None, limit=None):
+        """Active products matching a search, as dicts, best matches first"""
+        session = db_manager.get_session()
+        try:
+            query = _product_query(session).filter(Product.is_active == True)
+            if category:
+                query = query.filter(Category.name == category)
+            query = apply_product_search(session, query, search_term)
+            # The limit applies to searches; the full list stays complete
+            if limit and (search_term or "").strip():
+                query = query.limit(limit)
+            return [_product_dict(row) for row in query]
+        finally:
+            session.close()
+
+    def product(self, product_id):
+        session = db_manager.get_session()
+        try:
+            row = _product_query(session).filter(Product.id == product_id).first()
+            return _product_dict(row) if row else None
+        finally:
+            session.close()
+
+    def lookup_barcode(self, code):
+        return product_catalog.lookup_barcode(code)
+
+    def refresh_catalog(self, product_ids=None):
+        product_catalog.refresh(product_ids)
+
+    def price_cart(self, items, tax_rate=0.0):
+        session = db_manager.get_session()
+        try:
+            return price_cart_items(session, items, tax_rate)
+        finally:
+            session.close()
+
+    def commit_sale(self, cart_items, **kwargs):
+        self._check_primary()
+        try:
+            result = commit_sale(cart_items, **kwargs)
+        except OperationalError as e:
+            raise BackendUnavailableError(str(e))
+        product_catalog.refresh(item['product_id'] for item in cart_items)
+        return result
+
+    def commit_sales(self, entries):
+        """Replay journal entries in one transaction; returns one outcome per entry"""
+        self._check_primary()
+        if self._writer_sessions is None:
+            self._writer_sessions = create_writer_session_factory(db_path, db_manager.engine_profile)
+        results = apply_batch(self._writer_sessions, [journal_sale_operation(entry) for entry in entries])
+        if results and all(not ok and isinstance(value, OperationalError) for ok, value in results):
+            raise BackendUnavailableError(str(results[0][1]))
+        product_catalog.refresh(int(item['product_id']) for entry in entries for item in entry['cart_items'])
+        return journal_sale_results(entries, results)
+
+    def record_stock_movement(self, product_id, movement_type, quantity, notes=None, clamp=False,
+                              created_by="System"):
+        session = db_manager.get_session()
+        try:
+            if not session.query(Product.id).filter(Product.id == product_id).first():
+                raise ValueError("Product not found.")
+            record_stock_movement(session, product_id, movement_type, quantity, notes,
+                                  created_by=created_by, clamp=clamp)
+            session.commit()
+        except Exception:
+            session.rollback()
+            raise
+        finally:
+            session.close()
+        product_catalog.refresh([product_id])
+
+    def get_sale(self, sale_id):
+        """A sale with everything its receipt needs loaded"""
+        session = db_manager.get_session()
+        try:
+            return session.query(Sale).options(
+                joinedload(Sale.customer),
+                joinedload(Sale.user),
+                selectinload(Sale.sale_items).joinedload(SaleItem.product),
+            ).get(sale_id)
+        finally:
+            session.close()
+
+    def dashboard(self):
+        session = db_manager.get_session()
+        try:
+            return dashboard_counters.read(session)
+        finally:
+            session.close()
+
+    def sales_summary(self, from_day, to_day):
+        session = db_manager.get_session()
+        try:
+            return sales_summary(session, from_day, to_day)
+        finally:
+            session.close()
+
+    def product_performance(self, from_day, to_day, sort_by="Revenue", limit=None):
+        session = db_manager.get_session()
+        try:
+            return [dict(row._mapping) for row in product_performance(session, from_day, to_day, sort_by, limit)]
+        finally:
+            session.close()
+
+
+_backend = None
+
+
+def get_server_url():
+    """The sale server this till should use, or '' to use the database directly"""
+    return (os.environ.get("POS_SERVER_URL") or DatabaseUtils.get_setting_value('server_url', '') or "").strip()
+
+
+def get_backend():
+    """Return the backend for this process, chosen once from the configuration"""
+    global _backend
+    if _backend is None:
+        server_url = get_server_url()
+        if server_url:
+            from server.client import SaleServerClient
+            _backend = SaleServerClient(server_url)
+            print(f"✅ Using sale server at {server_url}")
+        else:
+            _backend = LocalBackend()
+    return _backend
@@ -0,0 +1,225 @@
+# database/catalog.py
+"""In-memory product catalog shared by the screens and the POS scanner path.
+
+Holds products with their barcode and name indexes and the categories, loaded
+once from the database. refresh() reloads the given product ids, or
+everything, after a write; gui/inventory_events.py calls it for the ids
+carried by <<InventoryChanged>>. Writes still go to the database.
+
+At most CATALOG_MAX_PRODUCTS products are held. A larger catalog is not
+loaded up front: products are cached as they are looked up, least recently
+used first out, and whole-list reads go to the database.
+"""
+import threading
+from collections import OrderedDict, namedtuple
+
+from sqlalchemy import func
+
+from .database import db_manager
+from .models import Category, Product
+
+CATALOG_MAX_PRODUCTS = 20000
+
+CatalogProduct = namedtuple("CatalogProduct", "id name barcode category_id unit selling_price "
+                                              "stock_quantity is_active")
+
+_COLUMNS = tuple(getattr(Product, field) for field in CatalogProduct._fields)
+
+
+def _code(barcode):
+    return (barcode or "").strip()
+
+
+def _entry(product):
+    """The fields the cart needs, as returned by a barcode lookup"""
+    return {
+        'product_id': product.id,
+        'name': product.name,
+        'price': product.selling_price,
+        'stock': product.stock_quantity or 0,
+        'unit': product.unit,
+    }
+
+
+class ProductCatalog:
+    """Products by id, barcode and name, and category names, kept in memory.
+
+    A barcode or id missing from memory is looked up in the database once, so
+    products added on another terminal are still found.
+    """
+
+    def __init__(self, session_factory, max_products=CATALOG_MAX_PRODUCTS):
+        self._session_factory = session_factory
+        self.max_products = max_products
+        self._lock = threading.RLock()
+        self._loaded = False
+        # Whether every product is held, so a miss means there is none
+        self._complete = False
+        # id -> CatalogProduct, least recently used first
+        self._products = OrderedDict()
+        self._by_barcode = {}
+        # Active products ordered by name, rebuilt after a change
+        self._by_name = None
+        self._categories = {}
+
+    def load(self):
+        """(Re)load the categories, and every product when they fit in memory"""
+        session = self._session_factory()
+        if session is None:
+            return False
+        try:
+            count = session.query(func.count(Product.id)).scalar()
+            categories = dict(session.query(Category.id, Category.name))
+            complete = count <= self.max_products
+            rows = session.query(*_COLUMNS).all() if complete else []
+            with self._lock:
+                self._products.clear()
+                self._by_barcode.clear()
+                self._by_name = None
+                for row in rows:
+                    self._put(CatalogProduct._make(row))
+                self._categories = categories
+                self._complete = complete
+                self._loaded = True
+            return True
+        except Exception as e:
+            print(f"⚠️  Error loading product catalog: {e}")
+            return False
+        finally:
+            session.close()
+
+    def refresh(self, product_ids=None):
+        """Reload the given products, or everything when product_ids is None"""
+        if product_ids is None or not self._loaded:
+            return self.load()
+        product_ids = set(product_ids)
+        if not product_ids:
+            return True
+        session = self._session_factory()
+        if session is None:
+            return False
+        try:
+            rows = session.query(*_COLUMNS).filter(Product.id.in_(list(product_ids))).all()
+            with self._lock:
+                # Drop the old entries first: the barcode itself may have changed
+                for product_id in product_ids:
+                    self._drop(product_id)
+                for row in rows:
+                    self._put(CatalogProduct._make(row))
+            return True
+        except Exception as e:
+            print(f"⚠️  Error refreshing product catalog: {e}")
+            return False
+        finally:
+            session.close()
+
+    def invalidate(self):
+        with self._lock:
+            self._loaded = False
+            self._complete = False
+            self._products.clear()
+            self._by_barcode.clear()
+            self._by_name = None
+            self._categories = {}
+
+    def _ensure_loaded(self):
+        if not self._loaded:
+            self.load()
+
+    def _put(self, product):
+        self._drop(product.id)
+        self._products[product.id] = product
+        if _code(product.barcode):
+            self._by_barcode[_code(product.barcode)] = product.id
+        self._by_name = None
+        while len(self._products) > self.max_products:
+            _product_id, evicted = self._products.popitem(last=False)
+            if self._by_barcode.get(_code(evicted.barcode)) == evicted.id:
+                del self._by_barcode[_code(evicted.barcode)]
+            self._complete = False
+
+    def _drop(self, product_id):
+        product = self._products.pop(product_id, None)
+        if product is not None:
+            if self._by_barcode.get(_code(product.barcode)) == product_id:
+                del self._by_barcode[_code(product.barcode)]
+            self._by_name = None
+
+    def _get(self, product_id):
+        product = self._products.get(product_id)
+        if product is not None:
+            self._products.move_to_end(product_id)
+        return product
+
+    def _fetch(self, *criteria):
+        """Read one product from the database and keep it"""
+        session = self._session_factory()
+        if session is None:
+            return None
+        try:
+            row = session.query(*_COLUMNS).filter(*criteria).first()
+        finally:
+            session.close()
+        if row is None:
+            return None
+        product = CatalogProduct._make(row)
+        with self._lock:
+            self._put(product)
+        return product
+
+    def product(self, product_id):
+        """The CatalogProduct with this id, or None"""
+        self._ensure_loaded()
+        with self._lock:
+            product = self._get(product_id)
+        if product is None:
+            product = self._fetch(Product.id == product_id)
+        return product
+
+    def lookup_barcode(self, code):
+        """Return the cart fields for a barcode, or None if no active product has it"""
+        code = _code(code)
+        if not code:
+            return None
+        self._ensure_loaded()
+        with self._lock:
+            product = self._get(self._by_barcode.get(code))
+        if product is None or not product.is_active:
+            product = self._fetch(Product.barcode == code, Product.is_active == True)
+        return _entry(product) if product is not None else None
+
+    def active_products(self):
+        """Active products ordered by name"""
+        self._ensure_loaded()
+        with self._lock:
+            if self._complete:
+                if self._by_name is None:
+                    self._by_name = sorted((product for product in self._products.values() if product.is_active),
+                                           key=lambda product: product.name)
+                return list(self._by_name)
+        # Too many to hold; read them without keeping them
+        session = self._session_factory()
+        if session is None:
+            return []
+        try:
+            query = session.query(*_COLUMNS).filter(Product.is_active == True).order_by(Product.name)
+            return [CatalogProduct._make(row) for row in query]
+        finally:
+            session.close()
+
+    def category_names(self):
+        self._ensure_loaded()
+        with self._lock:
+            return sorted(self._categories.values())
+
+    def category_id(self, name):
+        """The id of the category with this name, or None"""
+        self._ensure_loaded()
+        with self._lock:
+            for category_id, category_name in self._categories.items():
+                if category_name == name:
+                    return category_id
+        return None
+
+
+product_catalog = ProductCatalog(db_manager.get_session)
@@ -0,0 +1,164 @@
+# database/changelog.py
+"""Change capture for point-in-time recovery.
+
+Triggers on every table append each committed insert, update and delete to
+``change_log`` with an increasing sequence number, the time and the new row
+as JSON. Triggers rather than ORM events, so raw SQL writers (batched sales,
+archiving, rollup rebuilds) are covered too. The rows are shipped out to the
+backup folder and removed from the database by utils/backup.py, whose restore
+tool replays them onto a backup with apply_change().
+
+A backup knows where it stands in the log: the change_log entry of
+sqlite_sequence is part of the copied snapshot, see last_seq().
+"""
+import json
+
+from .rollups import ROLLUP_TABLES
+
+CHANGE_LOG_TABLE = "change_log"
+TRIGGER_PREFIX = "change_log_"
+
+CHANGE_LOG_SCHEMA = (
+    f"CREATE TABLE IF NOT EXISTS {CHANGE_LOG_TABLE} ("
+    "seq INTEGER PRIMARY KEY AUTOINCREMENT, "
+    "changed_at TEXT NOT NULL DEFAULT (strftime('%Y-%m-%d %H:%M:%f', 'now', 'localtime')), "
+    "table_name TEXT NOT NULL, "
+    "op TEXT NOT NULL, "     # I, U or D
+    "row_key TEXT NOT NULL, "  # JSON array of the primary key before the change
+    "data TEXT)"             # JSON object of the row after the change; NULL for deletes
+)
+
+# Bookkeeping and derived tables that are not replayed: the schema is
+# migrated on the restored copy, the search index and dashboard counters
+# follow products through their own triggers, and the sales rollups and
+# sale number sequences are recomputed from the sales after a restore;
+# the backup lease belongs to the running installation only
+_SKIPPED_TABLES = ("change_log", "schema_version", "sqlite_sequence", "sqlite_stat1", "products_fts",
+                   "dashboard_counters", "sale_sequences", "backup_lease") + tuple(ROLLUP_TABLES)
+
+_OPS = {"INSERT": "I", "UPDATE": "U", "DELETE": "D"}
+
+
+def _quote(name):
+    return '"' + name.replace('"', '""') + '"'
+
+
+def captured_tables(connection):
+    """{table: (columns, key columns)} of the tables whose changes are logged"""
+    tables = {}
+    for (name,) in connection.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'table' AND sql NOT LIKE 'CREATE VIRTUAL%' "
+            "ORDER BY name").fetchall():
+        if name.startswith(_SKIPPED_TABLES):
+            continue
+        info = connection.execute(f"PRAGMA table_info({_quote(name)})").fetchall()
+        columns = [row[1] for row in info]
+        key = [row[1] for row in sorted(info, key=lambda row: row[5]) if row[5]]
+        tables[name] = (columns, key or ["rowid"])
+    return tables
+
+
+def _trigger_sql(table, columns, key, event):
+    row = "OLD" if event != "INSERT" else "NEW"
+    row_key = "json_array(" + ", ".join(f"{row}.{_quote(column)}" for column in key) + ")"
+    if event == "DELETE":
+        data = "NULL"
+    else:
+        data = "json_object(" + ", ".join(f"'{column}', NEW.{_quote(column)}" for column in columns) + ")"
+    return (
+        f"CREATE TRIGGER {_quote(TRIGGER_PREFIX + table + '_' + event.lower())} "
+        f"AFTER {event} ON {_quote(table)} BEGIN "
+        f"INSERT INTO {CHANGE_LOG_TABLE} (table_name, op, row_key, data) "
+        f"VALUES ('{table}', '{_OPS[event]}', {row_key}, {data}); END"
+    )
+
+
+def _installed_triggers(connection):
+    return {name: sql for name, sql in connection.execute(
+        "SELECT name, sql FROM sqlite_master WHERE type = 'trigger'").fetchall()
+        if name.startswith(TRIGGER_PREFIX)}
+
+
+def install_change_capture(connection):
+    """Create the change log and (re)create its triggers to match the current tables.
+
+    Idempotent and cheap when nothing changed, so it runs after every
+    migration pass; a new column or table gets its triggers updated there.
+    """
+    connection.execute(CHANGE_LOG_SCHEMA)
+    installed = _installed_triggers(connection)
+    wanted = {}
+    for table, (columns, key) in captured_tables(connection).items():
+        for event in _OPS:
+            wanted[f"{TRIGGER_PREFIX}{table}_{event.lower()}"] = _trigger_sql(table, columns, key, event)
+    changed = 0
+    for name, sql in installed.items():
+        if wanted.get(name) != sql:
+            connection.execute(f"DROP TRIGGER {_quote(name)}")
+    for name, sql in wanted.items():
+        if installed.get(name) != sql:
+            connection.execute(sql)
+            changed += 1
+    return changed
+
+
+def remove_change_capture(connection):
+    """Drop the triggers, e.g. while replaying changes onto a restored copy"""
+    for name in _installed_triggers(connection):
+        connection.execute(f"DROP TRIGGER {_quote(name)}")
+
+
+def last_seq(connection):
+    """The sequence number of the newest change reflected in this database"""
+    row = connection.execute("SELECT seq FROM sqlite_sequence WHERE name = ?", (CHANGE_LOG_TABLE,)).fetchone()
+    return row[0] if row else 0
+
+
+def set_last_seq(connection, seq):
+    connection.execute("DELETE FROM sqlite_sequence WHERE name = ?", (CHANGE_LOG_TABLE,))
+    connection.execute("INSERT INTO sqlite_sequence (name, seq) VALUES (?, ?)", (CHANGE_LOG_TABLE, seq))
+
+
+def read_changes(connection, after_seq=0, limit=None):
+    """Logged changes after a sequence number, oldest first, as journal records"""
+    sql = (f"SELECT seq, changed_at, table_name, op, row_key, data FROM {CHANGE_LOG_TABLE} "
+           "WHERE seq > ? ORDER BY seq")
+    params = [after_seq]
+    if limit:
+        sql += " LIMIT ?"
+        params.append(limit)
+    return [
+        {'seq': seq, 'at': changed_at, 'table': table, 'op': op,
+         'key': json.loads(row_key), 'data': json.loads(data) if data is not None else None}
+        for seq, changed_at, table, op, row_key, data in connection.execute(sql, params)
+    ]
+
+
+def delete_changes(connection, up_to_seq):
+    """Forget changes that were shipped; the sequence keeps counting"""
+    connection.execute(f"DELETE FROM {CHANGE_LOG_TABLE} WHERE seq <= ?", (up_to_seq,))
+
+
+def apply_change(connection, change, tables):
+    """Replay one journal record. ``tables`` is captured_tables() of the target."""
+    table = change['table']
+    if table not in tables:
+        raise ValueError(f"Change {change['seq']} is for unknown table {table}")
+    columns, key = tables[table]
+    where = " AND ".join(f"{_quote(column)} IS ?" for column in key)
+    if change['op'] == "D":
+        connection.execute(f"DELETE FROM {_quote(table)} WHERE {where}", change['key'])
+        return
+    # Columns added after the change was logged keep their defaults
+    data = {column: value for column, value in change['data'].items() if column in columns}
+    if change['op'] == "U":
+        assignments = ", ".join(f"{_quote(column)} = ?" for column in data)
+        updated = connection.execute(f"UPDATE {_quote(table)} SET {assignments} WHERE {where}",
+                                     list(data.values()) + change['key']).rowcount
+        if updated:
+            return
+    # An insert, or an update of a row the copy does not have
+    names = ", ".join(_quote(column) for column in data)
+    placeholders = ", ".join("?" for _ in data)
+    connection.execute(f"INSERT INTO {_quote(table)} ({names}) VALUES ({placeholders})", list(data.values()))
+
@@ -0,0 +1,126 @@
+# database/dashboard.py
+"""Dashboard figures that cost the same however many years of sales are stored.
+
+The low-stock count lives in ``dashboard_counters``, kept up to date by
+triggers on products, so every stock change (a sale, a movement, an edit)
+adjusts it in its own transaction. Today's, this week's and this month's
+sales totals are read once a day from the daily rollups together with the
+highest sale id; after that each read only adds the sales with a higher id.
+"""
+import threading
+from datetime import date, datetime, timedelta
+
+from sqlalchemy import text
+
+COUNTERS_TABLE = "dashboard_counters"
+PERIODS = ("today", "week", "month")
+
+_IS_LOW = "COALESCE({row}.is_active = 1 AND {row}.stock_quantity <= {row}.min_stock_level, 0)"
+
+DASHBOARD_SCHEMA = [
+    f"CREATE TABLE IF NOT EXISTS {COUNTERS_TABLE} (name VARCHAR(50) PRIMARY KEY, value INTEGER NOT NULL)",
+    "CREATE TRIGGER IF NOT EXISTS products_low_stock_insert AFTER INSERT ON products BEGIN "
+    f"UPDATE {COUNTERS_TABLE} SET value = value + {_IS_LOW.format(row='NEW')} WHERE name = 'low_stock'; END",
+    "CREATE TRIGGER IF NOT EXISTS products_low_stock_update "
+    "AFTER UPDATE OF is_active, stock_quantity, min_stock_level ON products "
+    f"WHEN {_IS_LOW.format(row='NEW')} != {_IS_LOW.format(row='OLD')} BEGIN "
+    f"UPDATE {COUNTERS_TABLE} SET value = value + {_IS_LOW.format(row='NEW')} - {_IS_LOW.format(row='OLD')} "
+    "WHERE name = 'low_stock'; END",
+    "CREATE TRIGGER IF NOT EXISTS products_low_stock_delete AFTER DELETE ON products BEGIN "
+    f"UPDATE {COUNTERS_TABLE} SET value = value - {_IS_LOW.format(row='OLD')} WHERE name = 'low_stock'; END",
+]
+
+RECOUNT_LOW_STOCK = (
+    f"INSERT OR REPLACE INTO {COUNTERS_TABLE} (name, value) "
+    "SELECT 'low_stock', COUNT(*) FROM products WHERE is_active = 1 AND stock_quantity <= min_stock_level"
+)
+
+# One statement, so the totals and the last sale id come from the same snapshot
+_PERIOD_TOTALS = text(
+    "SELECT (SELECT MAX(id) FROM sales), "
+    + ", ".join(
+        f"(SELECT COALESCE(SUM(sale_count), 0) FROM sales_daily WHERE day BETWEEN :{period} AND :today), "
+        f"(SELECT COALESCE(SUM(total_amount), 0) FROM sales_daily WHERE day BETWEEN :{period} AND :today)"
+        for period in PERIODS
+    )
+)
+
+_NEW_SALES = text("SELECT id, created_at, total_amount FROM sales WHERE id > :last_id ORDER BY id")
+
+
+def create_dashboard_counters_step(connection):
+    """Migration step creating the counters and their triggers, and counting once"""
+    for statement in DASHBOARD_SCHEMA:
+        connection.execute(statement)
+    connection.execute(RECOUNT_LOW_STOCK)
+
+
+def period_starts(today):
+    """First day of each dashboard period containing today"""
+    return {
+        'today': today,
+        'week': today - timedelta(days=today.weekday()),
+        'month': today.replace(day=1),
+    }
+
+
+def _day(value):
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value)
+    return value.date() if isinstance(value, datetime) else value
+
+
+class DashboardCounters:
+    """Sales count and revenue per period, kept by adding the sales seen since the last read"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._today = None
+        self._starts = None
+        self._last_id = 0
+        self._totals = None
+
+    def reset(self):
+        """Read the periods from the rollups again on the next read, e.g. after a rebuild"""
+        with self._lock:
+            self._today = None
+
+    def _load(self, session, today):
+        starts = period_starts(today)
+        params = {period: starts[period].isoformat() for period in PERIODS}
+        params['today'] = today.isoformat()
+        row = session.execute(_PERIOD_TOTALS, params).one()
+        self._last_id = row[0] or 0
+        self._totals = {period: [row[1 + 2 * i], row[2 + 2 * i]] for i, period in enumerate(PERIODS)}
+        self._starts = starts
+        self._today = today
+
+    def _add_new_sales(self, session):
+        for sale_id, created_at, total_amount in session.execute(_NEW_SALES, {'last_id': self._last_id}):
+            day = _day(created_at)
+            # Journalled sales replayed late keep their own date
+            for period in PERIODS:
+                if self._starts[period] <= day <= self._today:
+                    self._totals[period][0] += 1
+                    self._totals[period][1] += total_amount or 0
+            self._last_id = sale_id
+
+    def read(self, session, today=None):
+        """The dashboard figures, as a dict"""
+        today = today or date.today()
+        with self._lock:
+            if self._today != today:
+                self._load(session, today)
+            else:
+                self._add_new_sales(session)
+            stats = {}
+            for period in PERIODS:
+                stats[f'{period}_sales'], stats[f'{period}_revenue'] = self._totals[period]
+        low_stock = session.execute(
+            text(f"SELECT value FROM {COUNTERS_TABLE} WHERE name = 'low_stock'")
+        ).scalar()
+        stats['low_stock'] = low_stock or 0
+        return stats
+
+
+dashboard_counters = DashboardCounters()
@@ -147,12 +147,16 @@
 
 # database/database.py - ROBUST VERSION for Desktop App
 import sqlite3
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event, text
 from sqlalchemy.orm import sessionmaker, Session
+from sqlalchemy.pool import NullPool, QueuePool, StaticPool
+from .instrumentation import query_monitor
 from .models import Base
+from .settings_registry import SettingsRegistry
 import os
 import sys
 import tempfile
+import threading
 from utils.auth import hash_password
 
 # Get the correct application directory for both development and compiled versions
@@ -187,54 +191,243 @@ def get_database_path():
     ]
     
     for db_path in db_locations[:-1]:  # Skip memory DB for now
-        try:
-            # Test if we can create/write to this location
-            test_file = db_path + ".test"
-            with open(test_file, 'w') as f:
-                f.write("test")
-            os.remove(test_file)
-            print(f"Using database location: {db_path}")
+        # Check permissions rather than writing a probe file, so importing
+        # this module touches nothing on disk
+        directory = os.path.dirname(db_path)
+        if os.path.exists(db_path):
+            usable = os.access(db_path, os.R_OK | os.W_OK) and os.access(directory, os.W_OK)
+        else:
+            usable = os.path.isdir(directory) and os.access(directory, os.W_OK)
+        if usable:
             return db_path
-        except (PermissionError, OSError) as e:
-            print(f"Cannot use {db_path}: {e}")
-            continue
+        print(f"Cannot use {db_path}: not writable")
     
     # If all file locations fail, use in-memory database
     print("Warning: Using in-memory database (data will not persist)")
     return ":memory:"
 
-# Get database path
-db_path = get_database_path()
-DATABASE_URL = f"sqlite:///{db_path}"
+# Engine profiles: connection pool settings plus the PRAGMAs applied to every
+# new SQLite connection. "tuned" keeps a pool of WAL connections for a local
+# disk, "network" stays on the rollback journal (WAL needs shared memory and
+# does not work on network drives) and "legacy" restores the old behaviour.
+ENGINE_PROFILES = {
+    "tuned": {
+        "description": "Pooled WAL connections for a local disk",
+        "pool": "queue",
+        "pool_size": 5,
+        "max_overflow": 10,
+        "pragmas": {
+            "journal_mode": "WAL",
+            "synchronous": "NORMAL",
+            "busy_timeout": 5000,
+            "cache_size": -32000,  # 32 MB, negative values are KiB
+            "mmap_size": 268435456,  # 256 MB
+            "temp_store": "MEMORY",
+        },
+    },
+    "network": {
+        "description": "Pooled connections for a database on a shared drive",
+        "pool": "queue",
+        "pool_size": 3,
+        "max_overflow": 5,
+        "pragmas": {
+            "journal_mode": "DELETE",
+            "synchronous": "FULL",
+            "busy_timeout": 15000,
+            "cache_size": -16000,
+            "mmap_size": 0,
+            "temp_store": "MEMORY",
+        },
+    },
+    "legacy": {
+        "description": "One connection per session, rollback journal",
+        "pool": "null",
+        "pragmas": {
+            "journal_mode": "DELETE",
+        },
+    },
+}
 
-print(f"Database URL: {DATABASE_URL}")
+DEFAULT_ENGINE_PROFILE = "tuned"
+# Set to a profile name to override the db_profile setting
+ENGINE_PROFILE_ENV = "POS_DB_PROFILE"
+
+def read_engine_profile_setting(path):
+    """Read the configured engine profile straight from the settings table"""
+    # Environment variable wins so a broken profile can be overridden
+    profile = os.environ.get(ENGINE_PROFILE_ENV)
+    if profile:
+        return profile
+    if path == ":memory:" or not os.path.exists(path):
+        return None
+    try:
+        conn = sqlite3.connect(path, timeout=5)
+        try:
+            row = conn.execute("SELECT value FROM settings WHERE key = 'db_profile'").fetchone()
+        finally:
+            conn.close()
+        return row[0] if row else None
+    except sqlite3.Error:
+        return None
 
-# Create engine with robust error handling
-try:
-    engine = create_engine(
-        DATABASE_URL,
+def _apply_pragmas(dbapi_connection, pragmas):
+    cursor = dbapi_connection.cursor()
+    try:
+        for name, value in pragmas.items():
+            try:
+                cursor.execute(f"PRAGMA {name} = {value}")
+            except sqlite3.Error as e:
+                print(f"⚠️  Could not apply PRAGMA {name}: {e}")
+    finally:
+        cursor.close()
+
+def resolve_engine_profile(profile_name):
+    """Return a valid engine profile name, falling back to the default"""
+    if profile_name not in ENGINE_PROFILES:
+        if profile_name:
+            print(f"⚠️  Unknown database profile '{profile_name}', using '{DEFAULT_ENGINE_PROFILE}'")
+        return DEFAULT_ENGINE_PROFILE
+    return profile_name
+
+def create_db_engine(path, profile_name=None):
+    """Create an engine for the given database path using an engine profile"""
+    profile = ENGINE_PROFILES[resolve_engine_profile(profile_name)]
+
+    options = {}
+    if path == ":memory:":
+        # Every pooled connection would otherwise get its own empty database
+        options["poolclass"] = StaticPool
+    elif profile["pool"] == "queue":
+        options["poolclass"] = QueuePool
+        options["pool_size"] = profile["pool_size"]
+        options["max_overflow"] = profile["max_overflow"]
+    else:
+        options["poolclass"] = NullPool
+
+    new_engine = create_engine(
+        f"sqlite:///{path}",
         connect_args={"check_same_thread": False},
-        echo=False  # Set to True for debugging
+        echo=False,  # Set to True for debugging
+        **options
     )
-    # Test the connection
-    with engine.connect() as conn:
-        conn.execute("SELECT 1")
-    print("✅ Database engine created successfully")
-except Exception as e:
-    print(f"❌ Failed to create database engine: {e}")
-    # Create a fallback in-memory database
-    engine = create_engine("sqlite:///:memory:", connect_args={"check_same_thread": False})
-    print("✅ Using fallback in-memory database")
-
-# Create session factory
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+    pragmas = profile["pragmas"]
+
+    @event.listens_for(new_engine, "connect")
+    def on_connect(dbapi_connection, connection_record):
+        _apply_pragmas(dbapi_connection, pragmas)
+
+    # Statement timings for the diagnostics tab and the slow-query log
+    query_monitor.attach(new_engine)
+
+    return new_engine
+
+def create_writer_session_factory(path, profile_name=None):
+    """Sessions whose transactions start with BEGIN IMMEDIATE, for batched writers.
+
+    pysqlite's own transaction handling is switched off so SAVEPOINTs work and
+    the write lock is taken up front rather than on the first UPDATE.
+    """
+    writer_engine = create_db_engine(path, profile_name)
+
+    @event.listens_for(writer_engine, "connect")
+    def on_connect(dbapi_connection, connection_record):
+        dbapi_connection.isolation_level = None
+
+    @event.listens_for(writer_engine, "begin")
+    def on_begin(conn):
+        conn.exec_driver_sql("BEGIN IMMEDIATE")
+
+    return sessionmaker(autocommit=False, autoflush=False, bind=writer_engine)
+
+def apply_batch(session_factory, operations):
+    """Run operation(session) callables in one transaction, each in its own savepoint.
+
+    A failing operation only rolls back its savepoint. Returns a list of
+    (ok, result or exception) in the order of ``operations``.
+    """
+    session = session_factory()
+    results = []
+    try:
+        for operation in operations:
+            try:
+                with session.begin_nested():
+                    results.append((True, operation(session)))
+            except Exception as e:
+                results.append((False, e))
+        session.commit()
+        return results
+    except Exception as e:
+        session.rollback()
+        print(f"❌ Batch of {len(operations)} write(s) failed: {e}")
+        return [(False, e)] * len(operations)
+    finally:
+        session.close()
+
+# Get database path; the engine is created by DatabaseManager on first use
+db_path = get_database_path()
+DATABASE_URL = f"sqlite:///{db_path}"
+
+_FALLBACK_PATHS = (":memory:", os.path.join(tempfile.gettempdir(), "construction_pos.db"))
 
 class DatabaseManager:
+    """Owns the engine, which is only created when first needed"""
+
     def __init__(self):
-        self.engine = engine
-        self.SessionLocal = SessionLocal
+        self._engine = None
+        self._engine_profile = None
+        self._session_factory = None
+        # Sales written to a temporary or in-memory database would not reach
+        # the shared one, so the sale journal keeps them until the real file is back
+        self._is_fallback = db_path in _FALLBACK_PATHS
+        self._engine_lock = threading.Lock()
         self._initialized = False
-        
+
+    def _create_engine(self):
+        """Create the engine with robust error handling"""
+        print(f"Database URL: {DATABASE_URL}")
+        try:
+            profile = resolve_engine_profile(read_engine_profile_setting(db_path))
+            engine = create_db_engine(db_path, profile)
+            # Test the connection
+            with engine.connect() as conn:
+                conn.execute("SELECT 1")
+            print(f"✅ Database engine created successfully (profile: {profile})")
+        except Exception as e:
+            print(f"❌ Failed to create database engine: {e}")
+            # Create a fallback in-memory database
+            profile = "legacy"
+            self._is_fallback = True
+            engine = create_db_engine(":memory:", profile)
+            print("✅ Using fallback in-memory database")
+        self._engine_profile = profile
+        self._session_factory = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+        self._engine = engine
+
+    @property
+    def engine(self):
+        if self._engine is None:
+            with self._engine_lock:
+                if self._engine is None:
+                    self._create_engine()
+        return self._engine
+
+    @property
+    def engine_profile(self):
+        self.engine
+        return self._engine_profile
+
+    @property
+    def SessionLocal(self):
+        self.engine
+        return self._session_factory
+
+    @property
+    def is_fallback(self):
+        """True when data goes to a temporary or in-memory database"""
+        self.engine
+        return self._is_fallback
+
     def create_tables(self):
         """Create all database tables"""
         try:
@@ -246,6 +439,37 @@ class DatabaseManager:
             print(f"❌ Failed to create tables: {e}")
             return False
         
+    def migrate(self):
+        """Apply pending schema migrations (indexes, new columns)"""
+        try:
+            from .migrations import run_migrations
+            applied = run_migrations(self.engine)
+            if applied == 0:
+                print("✅ Database schema is up to date")
+            return True
+        except Exception as e:
+            print(f"❌ Failed to apply schema migrations: {e}")
+            return False
+        
+    def rebuild_rollups(self):
+        """Recompute the daily sales rollups from the raw sales. Returns the number of days."""
+        from .dashboard import dashboard_counters
+        from .rollups import rebuild_rollups
+        session = self.get_session()
+        if session is None:
+            raise Exception("No database session")
+        try:
+            days = rebuild_rollups(session)
+            session.commit()
+            dashboard_counters.reset()
+            return days
+        except Exception as e:
+            session.rollback()
+            print(f"❌ Failed to rebuild sales rollups: {e}")
+            raise
+        finally:
+            session.close()
+
     def get_session(self) -> Session:
         """Get database session"""
         try:
@@ -263,24 +487,17 @@ class DatabaseManager:
             print(f"Warning: Error closing session: {e}")
         
     def backup_database(self, backup_path: str = None):
-        """Create database backup"""
+        """Create database backup with SQLite's online backup API (see utils/backup.py)"""
+        from utils.backup import create_backup, write_backup
         try:
             if db_path == ":memory:":
                 raise Exception("Cannot backup in-memory database")
-                
-            if not backup_path:
-                from datetime import datetime
-                timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-                app_dir = get_app_dir()
-                backup_path = os.path.join(app_dir, f"backup_construction_pos_{timestamp}.db")
-                
-            # Simple file copy for SQLite
-            import shutil
-            if os.path.exists(db_path):
-                shutil.copy2(db_path, backup_path)
-                return backup_path
-            else:
+            if not os.path.exists(db_path):
                 raise FileNotFoundError("Database file not found")
+            if not backup_path:
+                return create_backup()
+            write_backup(backup_path)
+            return backup_path
         except Exception as e:
             print(f"❌ Backup failed: {e}")
             raise
@@ -289,9 +506,30 @@ class DatabaseManager:
         """Check if database is properly initialized"""
         return self._initialized
 
+    def get_engine_info(self):
+        """Describe the active engine profile and the PRAGMAs in effect"""
+        profile_name = self.engine_profile
+        info = {
+            "profile": profile_name,
+            "description": ENGINE_PROFILES[profile_name]["description"],
+            "database": db_path,
+            "pool": type(self.engine.pool).__name__,
+            "pragmas": {},
+        }
+        try:
+            with self.engine.connect() as conn:
+                for name in ENGINE_PROFILES[profile_name]["pragmas"]:
+                    info["pragmas"][name] = conn.exec_driver_sql(f"PRAGMA {name}").scalar()
+        except Exception as e:
+            print(f"⚠️  Could not read engine PRAGMAs: {e}")
+        return info
+
 # Global database manager instance
 db_manager = DatabaseManager()
 
+# Settings are read from memory; writes go through to the database
+settings_registry = SettingsRegistry(db_manager.get_session)
+
 # Dependency for getting database session
 def get_db():
     db = db_manager.get_session()
@@ -311,8 +549,12 @@ def init_database():
         # Step 1: Create tables
         if not db_manager.create_tables():
             raise Exception("Failed to create database tables")
+
+        # Step 2: Bring existing databases up to the current schema
+        if not db_manager.migrate():
+            raise Exception("Failed to migrate database schema")
         
-        # Step 2: Add default settings
+        # Step 3: Add default settings
         session = db_manager.get_session()
         if session is None:
             raise Exception("Failed to create database session")
@@ -328,6 +570,10 @@ def init_database():
                 {"key": "currency", "value": "FCFA", "description": "Currency symbol"},
                 {"key": "language", "value": "en", "description": "UI language"},
                 {"key": "theme", "value": "light", "description": "UI theme"},
+                {"key": "db_profile", "value": DEFAULT_ENGINE_PROFILE, "description": "Database engine profile"},
+                {"key": "server_url", "value": "", "description": "Sale server URL, empty to use the database directly"},
+                {"key": "backup_interval_hours", "value": "24", "description": "Hours between automatic backups, 0 to turn them off"},
+                {"key": "backup_dir", "value": "", "description": "Backup folder, empty for the backups folder next to the program"},
                 {"key": "receipt_footer", "value": "Thank you for your business!", "description": "Receipt footer text"}
             ]
             
@@ -344,6 +590,7 @@ def init_database():
             
             if settings_added > 0:
                 session.commit()
+                settings_registry.invalidate()
                 print(f"✅ Added {settings_added} default settings")
             else:
                 print("✅ Default settings already exist")
@@ -374,25 +621,55 @@ def init_database():
         print("⚠️  The application will continue with limited functionality")
         return False
 
+SALE_NUMBER_PREFIX = "POS"
+
+
+def allocate_sale_number(session: Session, day=None) -> str:
+    """Take the next value of a day's sale sequence inside the caller's transaction.
+
+    ``day`` is the date (or datetime) of the sale, today by default; a sale
+    replayed from a till's journal is numbered in the day it was made.
+    """
+    from datetime import datetime
+
+    day = (day or datetime.now()).strftime("%Y%m%d")
+    prefix = f"{SALE_NUMBER_PREFIX}{day}"
+    # The first sale of a day seeds the sequence from any sales numbered by
+    # older versions; after that every allocation is a single-row update.
+    session.execute(
+        text(
+            "INSERT OR IGNORE INTO sale_sequences (day, last_value) "
+            "SELECT :day, COALESCE(MAX(CAST(substr(sale_number, :offset) AS INTEGER)), 0) "
+            "FROM sales WHERE sale_number >= :low AND sale_number < :high"
+        ),
+        {"day": day, "offset": len(prefix) + 1, "low": prefix, "high": prefix + "~"},
+    )
+    session.execute(
+        text("UPDATE sale_sequences SET last_value = last_value + 1 WHERE day = :day"),
+        {"day": day},
+    )
+    value = session.execute(
+        text("SELECT last_value FROM sale_sequences WHERE day = :day"), {"day": day}
+    ).scalar()
+    return f"{prefix}{value:04d}"
+
+
 # Database utility functions with error handling
 class DatabaseUtils:
     @staticmethod
     def get_setting_value(key: str, default: str = None) -> str:
         """Get setting value by key"""
         try:
-            session = db_manager.get_session()
-            if session is None:
-                return default
-                
-            try:
-                from .models import Setting
-                setting = session.query(Setting).filter(Setting.key == key).first()
-                return setting.value if setting else default
-            except Exception as e:
-                print(f"⚠️  Error getting setting {key}: {e}")
-                return default
-            finally:
-                db_manager.close_session(session)
+            return settings_registry.get(key, default)
+        except Exception as e:
+            print(f"⚠️  Database error getting setting {key}: {e}")
+            return default
+
+    @staticmethod
+    def get_typed_setting(key: str, default=None):
+        """Get setting value converted to its registered type"""
+        try:
+            return settings_registry.get_typed(key, default)
         except Exception as e:
             print(f"⚠️  Database error getting setting {key}: {e}")
             return default
@@ -401,62 +678,36 @@ class DatabaseUtils:
     def update_setting(key: str, value: str):
         """Update setting value"""
         try:
-            session = db_manager.get_session()
-            if session is None:
-                return False
-                
-            try:
-                from .models import Setting
-                setting = session.query(Setting).filter(Setting.key == key).first()
-                if setting:
-                    setting.value = value
-                    session.commit()
-                    return True
-                return False
-            except Exception as e:
-                session.rollback()
-                print(f"⚠️  Error updating setting {key}: {e}")
-                return False
-            finally:
-                db_manager.close_session(session)
+            return settings_registry.set(key, value)
         except Exception as e:
             print(f"⚠️  Database error updating setting {key}: {e}")
             return False
     
     @staticmethod
-    def generate_sale_number() -> str:
-        """Generate unique sale number"""
+    def generate_sale_number(session: Session = None) -> str:
+        """Allocate the next sale number of the day.
+
+        Pass the session of the sale being recorded so the number is taken in
+        the same transaction: the sequence row stays write-locked until the sale
+        commits, so two tills can never get the same number, and a rolled back
+        sale gives its number back.
+        """
+        if session is not None:
+            return allocate_sale_number(session)
+
+        session = db_manager.get_session()
+        if session is None:
+            raise Exception("No database session")
         try:
-            session = db_manager.get_session()
-            if session is None:
-                raise Exception("No database session")
-                
-            try:
-                from .models import Sale
-                from datetime import datetime
-                
-                today = datetime.now().strftime("%Y%m%d")
-                last_sale = session.query(Sale).filter(
-                    Sale.sale_number.like(f"POS{today}%")
-                ).order_by(Sale.id.desc()).first()
-                
-                if last_sale:
-                    last_number = int(last_sale.sale_number[-4:])
-                    new_number = last_number + 1
-                else:
-                    new_number = 1
-                    
-                return f"POS{today}{new_number:04d}"
-                
-            finally:
-                db_manager.close_session(session)
-                
+            sale_number = allocate_sale_number(session)
+            session.commit()
+            return sale_number
         except Exception as e:
+            session.rollback()
             print(f"⚠️  Error generating sale number: {e}")
-            # Return a fallback sale number
-            from datetime import datetime
-            import random
-            return f"POS{datetime.now().strftime('%Y%m%d')}{random.randint(1, 9999):04d}"
+            raise
+        finally:
+            db_manager.close_session(session)
 
     @staticmethod
     def test_database_connection():
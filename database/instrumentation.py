@@ -0,0 +1,196 @@
+# database/instrumentation.py
+"""Per-statement SQL timings for finding slow screens.
+
+QueryMonitor listens to before/after_cursor_execute on every engine made by
+create_db_engine() and keeps the last RING_SIZE statements (time, rows, call
+site) in memory. Statements slower than slow_threshold are written to
+``logs/slow_queries.log``, which rotates. A UI action (one Tk callback, see
+gui/action_tracking.py) that runs the same statement from the same place
+N_PLUS_ONE_THRESHOLD times or more is reported as an N+1 pattern.
+"""
+import logging
+import os
+import sys
+import threading
+import time
+from collections import deque, namedtuple
+from contextlib import contextmanager
+from datetime import datetime
+from logging.handlers import RotatingFileHandler
+
+from sqlalchemy import event
+
+RING_SIZE = 500
+N_PLUS_ONE_REPORTS = 100
+SLOW_QUERY_SECONDS = 0.1
+N_PLUS_ONE_THRESHOLD = 10
+LOG_DIR_NAME = "logs"
+SLOW_LOG_FILE = "slow_queries.log"
+SLOW_LOG_MAX_BYTES = 1024 * 1024
+SLOW_LOG_BACKUPS = 5
+
+# rows is None for SELECTs: SQLite only counts rows changed by writes
+QueryRecord = namedtuple("QueryRecord", "started_at duration statement rows call_site action thread")
+NPlusOneReport = namedtuple("NPlusOneReport", "reported_at action statement count call_site")
+
+_LIBRARY_DIRS = (
+    os.path.dirname(os.path.dirname(event.__file__)),  # sqlalchemy
+    os.path.dirname(os.__file__),  # the standard library
+)
+
+
+def _call_site():
+    """folder/file:line of the first caller outside SQLAlchemy and the standard library"""
+    frame = sys._getframe(2)
+    while frame is not None:
+        path = frame.f_code.co_filename
+        if not path.startswith(_LIBRARY_DIRS) and "site-packages" not in path and not path.startswith("<"):
+            return f"{os.path.basename(os.path.dirname(path))}/{os.path.basename(path)}:{frame.f_lineno} " \
+                   f"in {frame.f_code.co_name}"
+        frame = frame.f_back
+    return "?"
+
+
+class QueryMonitor:
+    """Ring buffer of recent statements plus the slow-query log and N+1 detector"""
+
+    def __init__(self, log_dir=None):
+        self.enabled = os.environ.get("POS_SQL_MONITOR", "1") != "0"
+        self.slow_threshold = SLOW_QUERY_SECONDS
+        self.log_dir = log_dir
+        self._records = deque(maxlen=RING_SIZE)
+        self._n_plus_one = deque(maxlen=N_PLUS_ONE_REPORTS)
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._logger = None
+
+    def attach(self, engine):
+        event.listen(engine, "before_cursor_execute", self._before_cursor_execute)
+        event.listen(engine, "after_cursor_execute", self._after_cursor_execute)
+        event.listen(engine, "handle_error", self._handle_error)
+
+    def _before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        if self.enabled:
+            conn.info.setdefault("query_start_time", []).append(time.perf_counter())
+
+    def _handle_error(self, exception_context):
+        # after_cursor_execute does not fire for a failed statement; drop its
+        # start time so the pooled connection does not collect them
+        connection = exception_context.connection
+        if connection is not None:
+            starts = connection.info.get("query_start_time")
+            if starts:
+                starts.pop()
+
+    def _after_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        starts = conn.info.get("query_start_time")
+        if not starts:
+            return
+        duration = time.perf_counter() - starts.pop()
+        call_site = _call_site()
+        action = getattr(self._local, "action", None)
+        record = QueryRecord(datetime.now(), duration, statement,
+                             cursor.rowcount if cursor.rowcount >= 0 else None,
+                             call_site, action[0] if action else None, threading.current_thread().name)
+        with self._lock:
+            self._records.append(record)
+        if duration >= self.slow_threshold:
+            self._log("SLOW %.1f ms rows=%s at %s [%s]\n    %s", duration * 1000, record.rows, call_site,
+                      record.action or record.thread, " ".join(statement.split()))
+        if action is not None:
+            self._count_in_action(action, statement, call_site)
+
+    def _count_in_action(self, action, statement, call_site):
+        name, counts, flagged = action
+        key = (statement, call_site)
+        counts[key] = counts.get(key, 0) + 1
+        if counts[key] == N_PLUS_ONE_THRESHOLD:
+            flagged[key] = NPlusOneReport(datetime.now(), name, statement, counts[key], call_site)
+            with self._lock:
+                self._n_plus_one.append(flagged[key])
+            self._log("N+1 same statement %d times in %s at %s\n    %s",
+                      counts[key], name, call_site, " ".join(statement.split()))
+
+    @contextmanager
+    def action(self, name):
+        """Group the statements of one UI action for the N+1 check; nested actions join the outer one"""
+        if getattr(self._local, "action", None) is not None:
+            yield
+            return
+        self._local.action = (name, {}, {})
+        try:
+            yield
+        finally:
+            name, counts, flagged = self._local.action
+            self._local.action = None
+            # Report the final count of the patterns flagged during the action
+            with self._lock:
+                for key, report in flagged.items():
+                    if report in self._n_plus_one:
+                        index = self._n_plus_one.index(report)
+                        self._n_plus_one[index] = report._replace(count=counts[key])
+
+    def _log(self, message, *args):
+        try:
+            if self._logger is None:
+                self._logger = self._create_logger()
+            self._logger.warning(message, *args)
+        except OSError as e:
+            print(f"⚠️  Could not write the slow-query log: {e}")
+            self._logger = logging.getLogger("construction_pos.sql")
+
+    def log_path(self):
+        log_dir = self.log_dir
+        if log_dir is None:
+            from .database import get_app_dir
+            log_dir = os.path.join(get_app_dir(), LOG_DIR_NAME)
+        return os.path.join(log_dir, SLOW_LOG_FILE)
+
+    def _create_logger(self):
+        """The rotating log file is only created once something is worth writing"""
+        path = self.log_path()
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        logger = logging.getLogger("construction_pos.sql")
+        logger.propagate = False
+        handler = RotatingFileHandler(path, maxBytes=SLOW_LOG_MAX_BYTES, backupCount=SLOW_LOG_BACKUPS,
+                                      encoding="utf-8")
+        handler.setFormatter(logging.Formatter("%(asctime)s %(message)s"))
+        logger.addHandler(handler)
+        logger.setLevel(logging.WARNING)
+        return logger
+
+    def recent(self, limit=None):
+        """Recorded statements, newest first"""
+        with self._lock:
+            records = list(self._records)
+        records.reverse()
+        return records[:limit] if limit else records
+
+    def statement_stats(self):
+        """Per statement and call site: count, total, average and max seconds, slowest total first"""
+        stats = {}
+        for record in self.recent():
+            key = (record.statement, record.call_site)
+            count, total, longest = stats.get(key, (0, 0.0, 0.0))
+            stats[key] = (count + 1, total + record.duration, max(longest, record.duration))
+        rows = [
+            {'statement': statement, 'call_site': call_site, 'count': count, 'total': total,
+             'average': total / count, 'max': longest}
+            for (statement, call_site), (count, total, longest) in stats.items()
+        ]
+        return sorted(rows, key=lambda row: row['total'], reverse=True)
+
+    def n_plus_one_reports(self):
+        """N+1 patterns found, newest first"""
+        with self._lock:
+            reports = list(self._n_plus_one)
+        reports.reverse()
+        return reports
+
+    def clear(self):
+        with self._lock:
+            self._records.clear()
+            self._n_plus_one.clear()
+
+
+query_monitor = QueryMonitor()
@@ -0,0 +1,232 @@
+# database/journal.py
+"""Offline-first sale journal for a till.
+
+Every sale is appended to a local JSON-lines file, with a key generated on
+the till, before it is sent to the primary store (the database or the sale
+server). If the primary cannot take it, the till carries on selling and the
+sale stays in the journal; a background thread replays pending sales in
+batches. The key makes the replay idempotent: a sale that reached the primary
+before the till heard back is not recorded twice.
+
+Journal lines are ``{"type": "sale", ...}`` for a new sale, followed later by
+``{"type": "synced"}``, ``{"type": "rejected"}`` (refused at the till, e.g.
+out of stock) or ``{"type": "failed"}`` (refused on replay) with the same key.
+"""
+import json
+import os
+import threading
+import uuid
+from datetime import datetime
+
+from sqlalchemy.exc import OperationalError
+
+from .backend import BackendUnavailableError, get_backend
+from .database import get_app_dir
+
+JOURNAL_FILE = "sales_journal.jsonl"
+SYNC_INTERVAL = 15  # seconds between retries while the primary is unavailable
+SYNC_BATCH_SIZE = 50
+# Start a fresh file once everything is synced and the journal is this big
+COMPACT_SIZE = 1024 * 1024
+
+SALE_OPTIONS = ("payment_method", "amount_paid", "tax_rate", "customer_id", "customer_name")
+
+
+class SaleJournal:
+    """Append-only record of a till's sales, replayed to the primary store"""
+
+    def __init__(self, path, backend_factory=get_backend):
+        self.path = path
+        self.backend_factory = backend_factory
+        self._lock = threading.RLock()
+        self._pending = {}  # key -> sale entry, in journal order
+        self._failed = {}   # key -> error
+        self._in_flight = set()  # keys being sent by submit(), skipped by sync()
+        self._offline = False
+        self._wake = threading.Event()
+        self._worker = None
+        self._load()
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    # A line cut short by a crash; the sale before it is intact
+                    continue
+                kind = record.pop('type', None)
+                if kind == "sale":
+                    self._pending[record['key']] = record
+                elif kind in ("synced", "rejected"):
+                    self._pending.pop(record['key'], None)
+                elif kind == "failed":
+                    self._pending.pop(record['key'], None)
+                    self._failed[record['key']] = record.get('error')
+        if self._pending:
+            print(f"⚠️  {len(self._pending)} journalled sale(s) waiting to sync")
+
+    def _append(self, records):
+        """Write records and fsync, so a sale survives a crash once submit() returns"""
+        with self._lock:
+            with open(self.path, "a", encoding="utf-8") as f:
+                for record in records:
+                    f.write(json.dumps(record) + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+
+    def _mark(self, outcomes):
+        """Record replay outcomes; returns how many sales were stored"""
+        records = []
+        with self._lock:
+            for outcome in outcomes:
+                if outcome['ok']:
+                    records.append({'type': "synced", 'key': outcome['key'],
+                                    'sale_number': outcome['sale']['sale_number']})
+                    self._pending.pop(outcome['key'], None)
+                elif not outcome.get('retry'):
+                    records.append({'type': "failed", 'key': outcome['key'], 'error': outcome['error']})
+                    self._pending.pop(outcome['key'], None)
+                    self._failed[outcome['key']] = outcome['error']
+                    print(f"❌ Journalled sale {outcome['key']} was rejected: {outcome['error']}")
+            if records:
+                self._append(records)
+        return sum(1 for outcome in outcomes if outcome['ok'])
+
+    def pending_count(self):
+        with self._lock:
+            return len(self._pending)
+
+    def failed_count(self):
+        with self._lock:
+            return len(self._failed)
+
+    def is_offline(self):
+        return self._offline
+
+    def submit(self, cart_items, user=None, **options):
+        """Journal a sale, then try to record it on the primary straight away.
+
+        Returns the primary's sale summary, or when the primary is unavailable
+        a provisional summary with ``offline=True`` and no sale id. Rejections
+        (e.g. InsufficientStockError) are marked rejected and re-raised.
+        """
+        entry = {
+            'key': uuid.uuid4().hex,
+            'created_at': datetime.now().isoformat(),
+            'cart_items': [
+                {'product_id': int(item['product_id']), 'quantity': item['quantity'],
+                 'price': item['price'], 'total': item.get('total', item['quantity'] * item['price'])}
+                for item in cart_items
+            ],
+            'options': {name: options[name] for name in SALE_OPTIONS if name in options},
+            'username': user.username if user else None,
+        }
+        with self._lock:
+            self._append([dict(entry, type="sale")])
+            self._pending[entry['key']] = entry
+            self._in_flight.add(entry['key'])
+
+        try:
+            result = None if self._offline else self._send(entry, user)
+        finally:
+            with self._lock:
+                self._in_flight.discard(entry['key'])
+        if result is not None:
+            return result
+
+        self.start()
+        self._wake.set()
+        subtotal = sum(item['total'] for item in entry['cart_items'])
+        tax_amount = subtotal * (float(options.get('tax_rate') or 0.0) / 100)
+        return {
+            'id': None,
+            'sale_number': f"OFFLINE-{entry['key'][:8].upper()}",
+            'customer_id': options.get('customer_id'),
+            'subtotal': subtotal,
+            'tax_amount': tax_amount,
+            'total_amount': subtotal + tax_amount,
+            'change_amount': max(0, float(options.get('amount_paid') or 0.0) - subtotal - tax_amount),
+            'idempotency_key': entry['key'],
+            'offline': True,
+        }
+
+    def _send(self, entry, user):
+        """Record a new sale on the primary; None if it is unavailable"""
+        try:
+            result = self.backend_factory().commit_sale(
+                entry['cart_items'], user=user, idempotency_key=entry['key'],
+                created_at=datetime.fromisoformat(entry['created_at']), **entry['options']
+            )
+        except (BackendUnavailableError, OperationalError) as e:
+            print(f"⚠️  Sale kept in the offline journal: {e}")
+            self._offline = True
+            return None
+        except Exception:
+            # Refused outright: the cashier sees the error and the sale is not made
+            with self._lock:
+                self._pending.pop(entry['key'], None)
+                self._append([{'type': "rejected", 'key': entry['key']}])
+            raise
+        self._mark([{'key': entry['key'], 'ok': True, 'sale': result}])
+        # Online tills never sync, so the journal is compacted here
+        self._compact()
+        return result
+
+    def sync(self):
+        """Replay pending sales in batches. Returns how many were stored."""
+        synced = 0
+        while True:
+            with self._lock:
+                batch = [entry for key, entry in self._pending.items()
+                         if key not in self._in_flight][:SYNC_BATCH_SIZE]
+            if not batch:
+                break
+            try:
+                outcomes = self.backend_factory().commit_sales(batch)
+            except (BackendUnavailableError, OperationalError) as e:
+                self._offline = True
+                print(f"⚠️  Sale journal sync postponed: {e}")
+                return synced
+            stored = self._mark(outcomes)
+            synced += stored
+            if len(outcomes) != len(batch) or any(outcome.get('retry') for outcome in outcomes):
+                # Something transient; try the rest on the next round
+                return synced
+        self._offline = False
+        self._compact()
+        return synced
+
+    def _compact(self):
+        """Start a new journal file once every sale in it has been synced"""
+        with self._lock:
+            if self._pending or not os.path.exists(self.path) or os.path.getsize(self.path) < COMPACT_SIZE:
+                return
+            os.replace(self.path, self.path + ".old")
+
+    def start(self):
+        """Start the background sync thread, if it is not running yet"""
+        with self._lock:
+            if self._worker is not None and self._worker.is_alive():
+                return
+            self._worker = threading.Thread(target=self._run, name="sale-journal-sync", daemon=True)
+            self._worker.start()
+
+    def _run(self):
+        while True:
+            self._wake.wait(SYNC_INTERVAL)
+            self._wake.clear()
+            if not self.pending_count():
+                self._compact()
+                continue
+            try:
+                synced = self.sync()
+                if synced:
+                    print(f"✅ Synced {synced} journalled sale(s)")
+            except Exception as e:
+                print(f"⚠️  Sale journal sync failed: {e}")
+
+
+sale_journal = SaleJournal(os.path.join(get_app_dir(), JOURNAL_FILE))
@@ -0,0 +1,154 @@
+# database/migrations.py
+"""Versioned schema migrations for existing installations.
+
+``Base.metadata.create_all`` only creates missing tables, so anything added to
+an existing table (indexes, columns, triggers) is shipped here as a numbered
+migration. Each step must be idempotent: a step is either an SQL string or a
+callable taking the raw sqlite3 connection.
+"""
+from datetime import datetime
+
+from .changelog import install_change_capture
+from .dashboard import create_dashboard_counters_step
+from .rollups import rebuild_rollups_step
+from .search import create_search_index_step
+
+SCHEMA_VERSION_TABLE = "schema_version"
+
+
+def add_column(table, column, definition):
+    """Migration step adding a column unless it already exists"""
+    def step(connection):
+        existing = {row[1] for row in connection.execute(f"PRAGMA table_info({table})")}
+        if column not in existing:
+            connection.execute(f"ALTER TABLE {table} ADD COLUMN {column} {definition}")
+    return step
+
+
+MIGRATIONS = [
+    (1, "Indexes for report date ranges, sale joins, stock history and product lists", [
+        # Date-range reports and summaries; the extra columns let SQLite
+        # answer totals and payment splits from the index alone
+        "CREATE INDEX IF NOT EXISTS ix_sales_created_at_totals "
+        "ON sales (created_at, payment_method, total_amount, tax_amount, subtotal)",
+        "CREATE INDEX IF NOT EXISTS ix_sales_customer_created ON sales (customer_id, created_at)",
+        # Sale item joins in both directions
+        "CREATE INDEX IF NOT EXISTS ix_sale_items_sale_product "
+        "ON sale_items (sale_id, product_id, quantity, unit_price, total_price)",
+        "CREATE INDEX IF NOT EXISTS ix_sale_items_product_sale ON sale_items (product_id, sale_id)",
+        # Stock movement history per product and the movements tab
+        "CREATE INDEX IF NOT EXISTS ix_stock_movements_product_created "
+        "ON stock_movements (product_id, created_at)",
+        "CREATE INDEX IF NOT EXISTS ix_stock_movements_type_created "
+        "ON stock_movements (movement_type, created_at)",
+        "CREATE INDEX IF NOT EXISTS ix_stock_movements_created ON stock_movements (created_at)",
+        # Product lists ordered by name, with or without the active filter
+        "CREATE INDEX IF NOT EXISTS ix_products_name ON products (name)",
+        "CREATE INDEX IF NOT EXISTS ix_products_active_name ON products (is_active, name)",
+        "CREATE INDEX IF NOT EXISTS ix_products_category ON products (category_id)",
+        "CREATE INDEX IF NOT EXISTS ix_product_history_created ON product_history (created_at)",
+        # Give the query planner statistics for the new indexes
+        "ANALYZE",
+    ]),
+    (2, "Product version column for optimistic concurrency", [
+        add_column("products", "version", "INTEGER NOT NULL DEFAULT 1"),
+    ]),
+    (3, "Daily sales rollups", [
+        # Databases created before cashiers were recorded on sales
+        add_column("sales", "user_id", "INTEGER REFERENCES users(id)"),
+        rebuild_rollups_step,
+    ]),
+    (4, "Full-text product search index", [
+        create_search_index_step,
+    ]),
+    (5, "Idempotency keys for journalled sales", [
+        add_column("sales", "idempotency_key", "VARCHAR(36)"),
+        "CREATE UNIQUE INDEX IF NOT EXISTS ix_sales_idempotency_key ON sales (idempotency_key)",
+    ]),
+    (6, "Change log for point-in-time recovery", [
+        install_change_capture,
+    ]),
+    (7, "Index for paging stock movements by type", [
+        # (movement_type, id) order for the movements list sorted by type
+        "CREATE INDEX IF NOT EXISTS ix_stock_movements_type ON stock_movements (movement_type)",
+    ]),
+    (8, "Low-stock counter for the dashboard", [
+        create_dashboard_counters_step,
+    ]),
+    (9, "Lease for the one process that ships the change journal", [
+        # A single row: who holds the lease and until when (epoch seconds)
+        "CREATE TABLE IF NOT EXISTS backup_lease ("
+        "id INTEGER PRIMARY KEY CHECK (id = 1), owner TEXT NOT NULL, expires_at REAL NOT NULL)",
+    ]),
+]
+
+
+def _ensure_version_table(cursor):
+    cursor.execute(
+        f"CREATE TABLE IF NOT EXISTS {SCHEMA_VERSION_TABLE} ("
+        "version INTEGER PRIMARY KEY, "
+        "description TEXT NOT NULL, "
+        "applied_at TIMESTAMP NOT NULL)"
+    )
+
+
+def get_schema_version(connection):
+    """Return the highest applied migration version for a raw connection"""
+    cursor = connection.cursor()
+    try:
+        _ensure_version_table(cursor)
+        return cursor.execute(f"SELECT COALESCE(MAX(version), 0) FROM {SCHEMA_VERSION_TABLE}").fetchone()[0]
+    finally:
+        cursor.close()
+
+
+def run_migrations(engine):
+    """Apply pending migrations, each in its own transaction. Returns the number applied."""
+    raw = engine.raw_connection()
+    connection = raw.dbapi_connection  # the underlying sqlite3 connection
+    old_isolation = connection.isolation_level
+    # Manage transactions by hand so DDL is covered by BEGIN as well
+    connection.isolation_level = None
+    applied = 0
+    try:
+        for version, description, steps in MIGRATIONS:
+            cursor = connection.cursor()
+            try:
+                # IMMEDIATE takes the write lock, so two tills starting at the
+                # same time cannot both apply the same migration
+                cursor.execute("BEGIN IMMEDIATE")
+                if version <= get_schema_version(connection):
+                    cursor.execute("COMMIT")
+                    continue
+                for step in steps:
+                    if callable(step):
+                        step(connection)
+                    else:
+                        cursor.execute(step)
+                cursor.execute(
+                    f"INSERT INTO {SCHEMA_VERSION_TABLE} (version, description, applied_at) VALUES (?, ?, ?)",
+                    (version, description, datetime.now()),
+                )
+                cursor.execute("COMMIT")
+                applied += 1
+                print(f"✅ Applied migration {version}: {description}")
+            except Exception:
+                if connection.in_transaction:
+                    cursor.execute("ROLLBACK")
+                raise
+            finally:
+                cursor.close()
+
+        # New tables and columns need their change log triggers regenerated
+        if get_schema_version(connection) >= 6:
+            connection.execute("BEGIN IMMEDIATE")
+            try:
+                install_change_capture(connection)
+                connection.execute("COMMIT")
+            except Exception:
+                connection.execute("ROLLBACK")
+                raise
+    finally:
+        connection.isolation_level = old_isolation
+        raw.close()
+    return applied
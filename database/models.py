@@ -1,5 +1,5 @@
 # database/models.py
-from sqlalchemy import Column, Integer, String, Float, Boolean, DateTime, ForeignKey, Text
+from sqlalchemy import Column, Integer, String, Float, Boolean, Date, DateTime, ForeignKey, Text
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import relationship
 from datetime import datetime
@@ -36,12 +36,17 @@ class Product(Base):
     is_active = Column(Boolean, default=True)
     created_at = Column(DateTime, default=datetime.now)
     updated_at = Column(DateTime, default=datetime.now, onupdate=datetime.now)
+    # Bumped on every change; ORM updates fail with StaleDataError if another
+    # terminal changed the row first (see database/stock.py)
+    version = Column(Integer, nullable=False, default=1, server_default="1")
 
     # Relationships
     category = relationship("Category", back_populates="products")
     sale_items = relationship("SaleItem", back_populates="product")
     stock_movements = relationship("StockMovement", back_populates="product")
 
+    __mapper_args__ = {"version_id_col": version}
+
 
 class Customer(Base):
     __tablename__ = "customers"
@@ -91,6 +96,8 @@ class Sale(Base):
     notes = Column(Text)
     created_at = Column(DateTime, default=datetime.now)
     user_id = Column(Integer, ForeignKey("users.id"))
+    # Generated by the till, so a journalled sale replayed twice is stored once
+    idempotency_key = Column(String(36), unique=True, index=True, nullable=True)
 
     # Relationships
     customer = relationship("Customer", back_populates="sales")
@@ -153,3 +160,69 @@ class Setting(Base):
     description = Column(Text)
     updated_at = Column(DateTime, default=datetime.now, onupdate=datetime.now)
 
+
+class SaleSequence(Base):
+    __tablename__ = "sale_sequences"
+
+    day = Column(String(8), primary_key=True)  # YYYYMMDD
+    last_value = Column(Integer, nullable=False, default=0)
+
+
+# Daily rollups, updated in the same transaction as each sale (see
+# database/rollups.py) so reports read one row per day instead of every sale.
+# category_id and user_id use 0 for "none" because they are part of the key.
+
+class SalesDaily(Base):
+    __tablename__ = "sales_daily"
+
+    day = Column(Date, primary_key=True)
+    payment_method = Column(String(20), primary_key=True)
+    sale_count = Column(Integer, nullable=False, default=0)
+    line_count = Column(Integer, nullable=False, default=0)
+    quantity = Column(Float, nullable=False, default=0.0)
+    subtotal = Column(Float, nullable=False, default=0.0)
+    tax_amount = Column(Float, nullable=False, default=0.0)
+    total_amount = Column(Float, nullable=False, default=0.0)
+
+
+class ProductSalesDaily(Base):
+    __tablename__ = "product_sales_daily"
+
+    day = Column(Date, primary_key=True)
+    product_id = Column(Integer, primary_key=True)
+    line_count = Column(Integer, nullable=False, default=0)
+    quantity = Column(Float, nullable=False, default=0.0)
+    revenue = Column(Float, nullable=False, default=0.0)
+    unit_price_sum = Column(Float, nullable=False, default=0.0)
+    last_sold_at = Column(DateTime)
+
+
+class CategorySalesDaily(Base):
+    __tablename__ = "category_sales_daily"
+
+    day = Column(Date, primary_key=True)
+    category_id = Column(Integer, primary_key=True)
+    line_count = Column(Integer, nullable=False, default=0)
+    quantity = Column(Float, nullable=False, default=0.0)
+    revenue = Column(Float, nullable=False, default=0.0)
+
+
+class CashierSalesDaily(Base):
+    __tablename__ = "cashier_sales_daily"
+
+    day = Column(Date, primary_key=True)
+    user_id = Column(Integer, primary_key=True)
+    sale_count = Column(Integer, nullable=False, default=0)
+    total_amount = Column(Float, nullable=False, default=0.0)
+
+
+class SalesArchive(Base):
+    """A closed year whose sales were moved to their own file (database/archive.py)"""
+    __tablename__ = "sales_archives"
+
+    year = Column(Integer, primary_key=True, autoincrement=False)
+    file_name = Column(String(255), nullable=False)
+    sale_count = Column(Integer, nullable=False, default=0)
+    movement_count = Column(Integer, nullable=False, default=0)
+    total_amount = Column(Float, nullable=False, default=0.0)
+    archived_at = Column(DateTime, default=datetime.now)
@@ -0,0 +1,160 @@
+# database/read_models.py
+"""Read-only rows for the list screens.
+
+Each row type is a namedtuple (a tuple with ``__slots__ = ()``) holding only
+the columns a screen displays, filled by a column-only query with the
+category or product name joined in. Nothing is tracked by the session and no
+relationship is loaded per row; edits load the ORM entity by id instead.
+
+PagedQuery serves long lists a page at a time with keyset pagination, for
+gui/virtual_tree.py.
+"""
+from collections import namedtuple
+
+from sqlalchemy import and_, func, or_, tuple_
+
+from .models import Category, Product, ProductHistory, StockMovement
+from .search import apply_product_search
+
+InventoryRow = namedtuple("InventoryRow", "id name category supplier_name barcode unit cost_price "
+                                          "selling_price stock_quantity min_stock_level is_active")
+StockAlertRow = namedtuple("StockAlertRow", "id name category stock_quantity min_stock_level")
+StockReportRow = namedtuple("StockReportRow", "id name category unit stock_quantity min_stock_level "
+                                              "cost_price selling_price")
+CategoryRow = namedtuple("CategoryRow", "id name description product_count created_at")
+MovementRow = namedtuple("MovementRow", "id product_name movement_type quantity reference_type reference_id "
+                                        "notes created_at created_by")
+HistoryRow = namedtuple("HistoryRow", "id product_id name action created_at")
+
+PAGE_SIZE = 200
+
+
+def _product_query(session, row_type):
+    """Product columns named like the fields of row_type; ``category`` is the category name"""
+    columns = [Category.name.label('category') if field == 'category' else getattr(Product, field)
+               for field in row_type._fields]
+    return session.query(*columns).outerjoin(Category, Product.category_id == Category.id)
+
+
+def _rows(row_type, query):
+    return [row_type._make(row) for row in query]
+
+
+def stock_alert_rows(session):
+    """Active products at or below their minimum stock, emptiest first"""
+    query = _product_query(session, StockAlertRow).filter(
+        Product.is_active == True,
+        Product.stock_quantity <= Product.min_stock_level,
+    ).order_by(Product.stock_quantity)
+    return _rows(StockAlertRow, query)
+
+
+def stock_report_rows(session, category=None, low_stock=False, out_of_stock=False):
+    """Active products for the inventory report, optionally of one category (by name)"""
+    query = _product_query(session, StockReportRow).filter(Product.is_active == True)
+    if category:
+        query = query.filter(Category.name == category)
+    if low_stock:
+        query = query.filter(Product.stock_quantity <= Product.min_stock_level)
+    if out_of_stock:
+        query = query.filter(Product.stock_quantity <= 0)
+    return _rows(StockReportRow, query.order_by(Product.name))
+
+
+def category_rows(session):
+    """Categories with their product count, by name"""
+    counts = session.query(Product.category_id, func.count(Product.id).label('product_count')) \
+        .group_by(Product.category_id).subquery()
+    query = session.query(
+        Category.id, Category.name, Category.description,
+        func.coalesce(counts.c.product_count, 0), Category.created_at,
+    ).outerjoin(counts, counts.c.category_id == Category.id).order_by(Category.name)
+    return _rows(CategoryRow, query)
+
+
+class PagedQuery:
+    """Keyset pagination of a column-only query.
+
+    ``build(session, criteria)`` returns the filtered query selecting the
+    fields of ``row_type``. Pages are ordered by one of ``sort_columns`` and
+    then by the unique ``key``, and each page starts after the (sort value,
+    key) of the previous page's last row, so a deep page costs the same as the
+    first one when the sort column is indexed. NULLs sort first ascending and
+    last descending, as SQLite orders them.
+    """
+
+    def __init__(self, build, row_type, key, sort_columns, default_sort, descending=False):
+        self.build = build
+        self.row_type = row_type
+        self.key = key
+        self.sort_columns = sort_columns
+        self.default_sort = default_sort
+        self.descending = descending
+
+    def _after(self, column, cursor, descending):
+        value, key = cursor
+        if descending:
+            if value is None:
+                return and_(column.is_(None), self.key < key)
+            return or_(tuple_(column, self.key) < tuple_(value, key), column.is_(None))
+        if value is None:
+            return or_(and_(column.is_(None), self.key > key), column.isnot(None))
+        return tuple_(column, self.key) > tuple_(value, key)
+
+    def page(self, session, sort=None, descending=None, after=None, criteria=None, limit=PAGE_SIZE):
+        """Up to ``limit`` rows after the cursor ``after``; returns (rows, cursor of the last row)"""
+        column = self.sort_columns[sort or self.default_sort]
+        descending = self.descending if descending is None else descending
+        # The keyset order replaces any order of the built query (search ranking)
+        query = self.build(session, criteria).order_by(None).add_columns(column, self.key)
+        if after is not None:
+            query = query.filter(self._after(column, after, descending))
+        if descending:
+            query = query.order_by(column.desc(), self.key.desc())
+        else:
+            query = query.order_by(column.asc(), self.key.asc())
+        rows = query.limit(limit).all()
+        cursor = tuple(rows[-1][-2:]) if rows else after
+        return [self.row_type._make(row[:-2]) for row in rows], cursor
+
+
+def _inventory_query(session, search_term):
+    return apply_product_search(session, _product_query(session, InventoryRow), search_term)
+
+
+def _movement_query(session, movement_type):
+    query = session.query(
+        StockMovement.id, Product.name, StockMovement.movement_type, StockMovement.quantity,
+        StockMovement.reference_type, StockMovement.reference_id, StockMovement.notes,
+        StockMovement.created_at, StockMovement.created_by,
+    ).outerjoin(Product, StockMovement.product_id == Product.id)
+    if movement_type:
+        query = query.filter(StockMovement.movement_type == movement_type)
+    return query
+
+
+def _history_query(session, criteria):
+    return session.query(ProductHistory.id, ProductHistory.product_id, ProductHistory.name,
+                         ProductHistory.action, ProductHistory.created_at)
+
+
+# Criteria: the search term
+inventory_pages = PagedQuery(_inventory_query, InventoryRow, Product.id, {
+    'id': Product.id, 'name': Product.name, 'category': Category.name,
+    'supplier_name': Product.supplier_name, 'barcode': Product.barcode, 'unit': Product.unit,
+    'cost_price': Product.cost_price, 'selling_price': Product.selling_price,
+    'stock_quantity': Product.stock_quantity, 'min_stock_level': Product.min_stock_level,
+    'is_active': Product.is_active,
+}, 'name')
+
+# Criteria: the movement type
+movement_pages = PagedQuery(_movement_query, MovementRow, StockMovement.id, {
+    'id': StockMovement.id, 'product_name': Product.name, 'movement_type': StockMovement.movement_type,
+    'quantity': StockMovement.quantity, 'created_at': StockMovement.created_at,
+    'created_by': StockMovement.created_by,
+}, 'created_at', descending=True)
+
+history_pages = PagedQuery(_history_query, HistoryRow, ProductHistory.id, {
+    'id': ProductHistory.id, 'product_id': ProductHistory.product_id, 'name': ProductHistory.name,
+    'action': ProductHistory.action, 'created_at': ProductHistory.created_at,
+}, 'created_at', descending=True)
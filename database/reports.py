@@ -0,0 +1,111 @@
+# database/reports.py
+"""Report queries that can reach into the yearly archive files.
+
+Archive files (see database/archive.py) are attached to the session's
+connection only when the requested range overlaps an archived year, and
+detached again afterwards, so reports on recent dates only touch the main
+database.
+"""
+import os
+from contextlib import contextmanager
+
+from sqlalchemy import DateTime, Float, Integer, String, bindparam, text
+
+from .archive import archived_years
+from .rollups import summarize_by_payment_method
+
+# SQLite refuses more attached databases than this by default
+MAX_ATTACHED_ARCHIVES = 10
+
+_SALES_SELECT = (
+    "SELECT s.id, s.created_at, s.sale_number, c.name AS customer_name, "
+    "(SELECT COUNT(*) FROM {schema}.sale_items si WHERE si.sale_id = s.id) AS item_count, "
+    "s.subtotal, s.tax_amount, s.total_amount, s.payment_method "
+    "FROM {schema}.sales s LEFT JOIN main.customers c ON c.id = s.customer_id "
+    "WHERE s.created_at >= :from_dt AND s.created_at <= :to_dt{after}"
+)
+
+# Keyset for the next page: sales older than the last one returned
+_AFTER = " AND (s.created_at, s.id) < (:after_created_at, :after_id)"
+
+_TOTALS_SELECT = (
+    "SELECT COALESCE(s.payment_method, 'cash') AS payment_method, "
+    "(SELECT COUNT(*) FROM {schema}.sale_items si WHERE si.sale_id = s.id) AS line_count, "
+    "s.subtotal, COALESCE(s.tax_amount, 0) AS tax_amount, s.total_amount "
+    "FROM {schema}.sales s "
+    "WHERE s.created_at >= :from_dt AND s.created_at <= :to_dt"
+)
+
+
+@contextmanager
+def attached_archives(session, from_day, to_day):
+    """Attach the archives overlapping from_day..to_day; yields their schema names"""
+    archives = archived_years(session, from_day, to_day)
+    if len(archives) > MAX_ATTACHED_ARCHIVES:
+        raise ValueError(f"The range covers {len(archives)} archived years; "
+                         f"at most {MAX_ATTACHED_ARCHIVES} can be read at once")
+    # Reads do not open an SQLite transaction, so ATTACH is allowed here
+    connection = session.connection()
+    schemas = []
+    try:
+        for year, path in archives.items():
+            if not os.path.exists(path):
+                # ATTACH would create an empty file in its place
+                print(f"⚠️  Sales archive for {year} is missing: {path}")
+                continue
+            schema = f"archive_{year}"
+            connection.exec_driver_sql(f"ATTACH DATABASE ? AS {schema}", (path,))
+            schemas.append(schema)
+        yield schemas
+    finally:
+        # Pooled connections must go back without the archives attached
+        for schema in schemas:
+            connection.exec_driver_sql(f"DETACH DATABASE {schema}")
+
+
+def _union(template, schemas, **fields):
+    return " UNION ALL ".join(template.format(schema=schema, **fields) for schema in ["main"] + schemas)
+
+
+def sales_in_range(session, from_dt, to_dt, limit=None, after=None):
+    """Sales between two datetimes, newest first, from the main database and any archive.
+
+    With ``limit`` only that many sales are returned, and the item counts are
+    only computed for them. ``after`` is the (created_at, id) of the last sale
+    of the previous page; each page starts from there in the index rather
+    than skipping the pages before it.
+    """
+    with attached_archives(session, from_dt.date(), to_dt.date()) as schemas:
+        sql = _union(_SALES_SELECT, schemas, after=_AFTER if after else "") + " ORDER BY 2 DESC, 1 DESC"
+        params = {"from_dt": from_dt, "to_dt": to_dt}
+        binds = [bindparam("from_dt", type_=DateTime), bindparam("to_dt", type_=DateTime)]
+        if after:
+            params.update(after_created_at=after[0], after_id=after[1])
+            binds.append(bindparam("after_created_at", type_=DateTime))
+        if limit:
+            sql += " LIMIT :limit"
+            params["limit"] = limit
+        statement = text(sql).bindparams(*binds).columns(
+            id=Integer, created_at=DateTime, sale_number=String, customer_name=String, item_count=Integer,
+            subtotal=Float, tax_amount=Float, total_amount=Float, payment_method=String,
+        )
+        return session.execute(statement, params).all()
+
+
+def sales_totals_in_range(session, from_dt, to_dt):
+    """Totals of the sales between two datetimes, in the shape of rollups.sales_summary().
+
+    One grouped query over the main database and any archive, for ranges
+    that do not cover whole days (the daily rollups do those).
+    """
+    with attached_archives(session, from_dt.date(), to_dt.date()) as schemas:
+        sql = (
+            "SELECT payment_method, COUNT(*), SUM(line_count), SUM(subtotal), SUM(tax_amount), "
+            f"SUM(total_amount) FROM ({_union(_TOTALS_SELECT, schemas)}) GROUP BY payment_method"
+        )
+        statement = text(sql).bindparams(
+            bindparam("from_dt", type_=DateTime),
+            bindparam("to_dt", type_=DateTime),
+        )
+        rows = session.execute(statement, {"from_dt": from_dt, "to_dt": to_dt}).all()
+    return summarize_by_payment_method(rows)
@@ -0,0 +1,219 @@
+# database/rollups.py
+"""Daily sales rollups.
+
+Each sale adds itself to per-day totals keyed by payment method, product,
+category and cashier, inside the sale's own transaction. Period reports then
+sum one row per day instead of loading every sale. rebuild_rollups()
+recomputes everything from the raw sales, e.g. after restoring a backup or
+editing sales by hand.
+"""
+from sqlalchemy import func, text
+from sqlalchemy.dialects.sqlite import insert
+
+from .models import (CashierSalesDaily, Category, CategorySalesDaily, Product,
+                     ProductSalesDaily, SalesArchive, SalesDaily)
+
+ROLLUP_TABLES = ["sales_daily", "product_sales_daily", "category_sales_daily", "cashier_sales_daily"]
+
+# Plain SQL so the same statements serve the migration (raw sqlite3
+# connection) and rebuild_rollups() (SQLAlchemy session). {keep_rollups}
+# and {keep_sales} exclude archived years, whose sales are no longer here
+_REBUILD_TEMPLATES = [f"DELETE FROM {table}{{keep_rollups}}" for table in ROLLUP_TABLES] + [
+    "INSERT INTO sales_daily (day, payment_method, sale_count, line_count, quantity, "
+    "subtotal, tax_amount, total_amount) "
+    "SELECT date(s.created_at), COALESCE(s.payment_method, 'cash'), COUNT(*), "
+    "COALESCE(SUM(li.line_count), 0), COALESCE(SUM(li.quantity), 0), "
+    "SUM(s.subtotal), SUM(COALESCE(s.tax_amount, 0)), SUM(s.total_amount) "
+    "FROM sales s LEFT JOIN ("
+    "SELECT sale_id, COUNT(*) AS line_count, SUM(quantity) AS quantity FROM sale_items GROUP BY sale_id"
+    ") li ON li.sale_id = s.id{keep_sales} "
+    "GROUP BY 1, 2",
+    "INSERT INTO product_sales_daily (day, product_id, line_count, quantity, revenue, "
+    "unit_price_sum, last_sold_at) "
+    "SELECT date(s.created_at), si.product_id, COUNT(*), SUM(si.quantity), SUM(si.total_price), "
+    "SUM(si.unit_price), MAX(s.created_at) "
+    "FROM sale_items si JOIN sales s ON s.id = si.sale_id{keep_sales} "
+    "GROUP BY 1, 2",
+    # Uses the current category of each product; live updates use the
+    # category at the time of sale
+    "INSERT INTO category_sales_daily (day, category_id, line_count, quantity, revenue) "
+    "SELECT date(s.created_at), COALESCE(p.category_id, 0), COUNT(*), SUM(si.quantity), SUM(si.total_price) "
+    "FROM sale_items si JOIN sales s ON s.id = si.sale_id "
+    "LEFT JOIN products p ON p.id = si.product_id{keep_sales} "
+    "GROUP BY 1, 2",
+    "INSERT INTO cashier_sales_daily (day, user_id, sale_count, total_amount) "
+    "SELECT date(s.created_at), COALESCE(s.user_id, 0), COUNT(*), SUM(s.total_amount) "
+    "FROM sales s{keep_sales} GROUP BY 1, 2",
+]
+
+
+def rebuild_statements(archived_years=()):
+    """The rebuild SQL, leaving the rollups of archived years untouched"""
+    keep_rollups = keep_sales = ""
+    if archived_years:
+        years = ", ".join(f"'{int(year):04d}'" for year in archived_years)
+        keep_rollups = f" WHERE strftime('%Y', day) NOT IN ({years})"
+        keep_sales = f" WHERE strftime('%Y', s.created_at) NOT IN ({years})"
+    return [template.format(keep_rollups=keep_rollups, keep_sales=keep_sales) for template in _REBUILD_TEMPLATES]
+
+
+REBUILD_STATEMENTS = rebuild_statements()
+
+
+def _upsert(session, model, key_columns, rows, overrides=None):
+    """INSERT rows, adding their values onto existing rows with the same key"""
+    if not rows:
+        return
+    table = model.__table__
+    stmt = insert(table)
+    set_ = {
+        name: table.c[name] + getattr(stmt.excluded, name)
+        for name in rows[0] if name not in key_columns
+    }
+    set_.update(overrides(table, stmt.excluded) if overrides else {})
+    session.execute(stmt.on_conflict_do_update(index_elements=key_columns, set_=set_), rows)
+
+
+def record_sale_rollups(session, sale, lines, categories):
+    """Add one sale to the daily rollups.
+
+    ``lines`` are dicts with product_id, quantity, unit_price and total_price;
+    ``categories`` maps product_id to category_id.
+    """
+    day = sale.created_at.date()
+
+    _upsert(session, SalesDaily, ["day", "payment_method"], [{
+        'day': day,
+        'payment_method': sale.payment_method or "cash",
+        'sale_count': 1,
+        'line_count': len(lines),
+        'quantity': sum(line['quantity'] for line in lines),
+        'subtotal': sale.subtotal,
+        'tax_amount': sale.tax_amount or 0.0,
+        'total_amount': sale.total_amount,
+    }])
+    _upsert(session, CashierSalesDaily, ["day", "user_id"], [{
+        'day': day,
+        'user_id': sale.user_id or 0,
+        'sale_count': 1,
+        'total_amount': sale.total_amount,
+    }])
+
+    products = {}
+    by_category = {}
+    for line in lines:
+        row = products.setdefault(line['product_id'], {
+            'day': day, 'product_id': line['product_id'], 'line_count': 0,
+            'quantity': 0.0, 'revenue': 0.0, 'unit_price_sum': 0.0, 'last_sold_at': sale.created_at,
+        })
+        row['line_count'] += 1
+        row['quantity'] += line['quantity']
+        row['revenue'] += line['total_price']
+        row['unit_price_sum'] += line['unit_price']
+
+        category_id = categories.get(line['product_id']) or 0
+        row = by_category.setdefault(category_id, {
+            'day': day, 'category_id': category_id, 'line_count': 0, 'quantity': 0.0, 'revenue': 0.0,
+        })
+        row['line_count'] += 1
+        row['quantity'] += line['quantity']
+        row['revenue'] += line['total_price']
+
+    _upsert(session, ProductSalesDaily, ["day", "product_id"], list(products.values()),
+            overrides=lambda table, excluded: {
+                'last_sold_at': func.max(func.coalesce(table.c.last_sold_at, excluded.last_sold_at),
+                                         excluded.last_sold_at),
+            })
+    _upsert(session, CategorySalesDaily, ["day", "category_id"], list(by_category.values()))
+
+
+def rebuild_rollups(session):
+    """Recompute the rollup tables from the sales, in the caller's transaction.
+
+    Years moved to archive files (see database/archive.py) keep their rollups.
+    """
+    archived_years = [year for year, in session.query(SalesArchive.year)]
+    for statement in rebuild_statements(archived_years):
+        session.execute(text(statement))
+    return session.query(func.count(func.distinct(SalesDaily.day))).scalar() or 0
+
+
+def rebuild_rollups_step(connection):
+    """Migration step filling the rollups of an existing database"""
+    for statement in REBUILD_STATEMENTS:
+        connection.execute(statement)
+
+
+def sales_summary(session, from_day, to_day):
+    """Totals for the days from_day..to_day inclusive, with a per payment method split"""
+    rows = session.query(
+        SalesDaily.payment_method,
+        func.sum(SalesDaily.sale_count),
+        func.sum(SalesDaily.line_count),
+        func.sum(SalesDaily.subtotal),
+        func.sum(SalesDaily.tax_amount),
+        func.sum(SalesDaily.total_amount),
+    ).filter(
+        SalesDaily.day >= from_day,
+        SalesDaily.day <= to_day,
+    ).group_by(SalesDaily.payment_method).all()
+    return summarize_by_payment_method(rows)
+
+
+def summarize_by_payment_method(rows):
+    """Add up (method, sale_count, line_count, subtotal, tax_amount, total_amount) rows"""
+    summary = {'sale_count': 0, 'line_count': 0, 'subtotal': 0.0, 'tax_amount': 0.0,
+               'total_amount': 0.0, 'by_payment_method': {}}
+    for method, sale_count, line_count, subtotal, tax_amount, total_amount in rows:
+        summary['sale_count'] += sale_count or 0
+        summary['line_count'] += line_count or 0
+        summary['subtotal'] += subtotal or 0.0
+        summary['tax_amount'] += tax_amount or 0.0
+        summary['total_amount'] += total_amount or 0.0
+        summary['by_payment_method'][method] = total_amount or 0.0
+    return summary
+
+
+PRODUCT_SORT_KEYS = {
+    "Quantity Sold": "total_quantity",
+    "Revenue": "total_revenue",
+    "Times Sold": "times_sold",
+    "Profit": "total_revenue",
+}
+
+
+def product_performance(session, from_day, to_day, sort_by="Revenue", limit=None):
+    """Per product totals for the days from_day..to_day inclusive"""
+    total_quantity = func.sum(ProductSalesDaily.quantity).label('total_quantity')
+    times_sold = func.sum(ProductSalesDaily.line_count).label('times_sold')
+    total_revenue = func.sum(ProductSalesDaily.revenue).label('total_revenue')
+    columns = {'total_quantity': total_quantity, 'times_sold': times_sold, 'total_revenue': total_revenue}
+
+    query = session.query(
+        Product.id,
+        Product.name,
+        Category.name.label('category_name'),
+        total_quantity,
+        times_sold,
+        total_revenue,
+        (func.sum(ProductSalesDaily.unit_price_sum) / func.sum(ProductSalesDaily.line_count)).label('avg_price'),
+        func.max(ProductSalesDaily.last_sold_at).label('last_sold'),
+    ).select_from(ProductSalesDaily)\
+        .join(Product, ProductSalesDaily.product_id == Product.id)\
+        .outerjoin(Category, Product.category_id == Category.id)\
+        .filter(
+            ProductSalesDaily.day >= from_day,
+            ProductSalesDaily.day <= to_day,
+        ).group_by(Product.id, Product.name, Category.name)\
+        .order_by(columns[PRODUCT_SORT_KEYS.get(sort_by, "total_revenue")].desc())
+
+    if limit:
+        query = query.limit(limit)
+    return query.all()
+
+
+if __name__ == "__main__":
+    # python -m database.rollups
+    from .database import db_manager
+
+    print(f"✅ Rebuilt sales rollups for {db_manager.rebuild_rollups()} day(s)")
@@ -0,0 +1,228 @@
+# database/sales.py
+"""Recording a sale in a single transaction, independent of the GUI"""
+from datetime import datetime
+from types import SimpleNamespace
+
+from sqlalchemy import func
+from sqlalchemy.exc import IntegrityError, OperationalError
+
+from .database import allocate_sale_number, db_manager
+from .models import Customer, Product, Sale, SaleItem, StockMovement, User
+from .rollups import record_sale_rollups
+from .stock import decrement_stock, decrement_stock_clamped
+
+
+def _merge_cart(cart_items):
+    """Collapse cart lines into {product_id: quantity}, keeping the line order"""
+    quantities = {}
+    for item in cart_items:
+        product_id = int(item['product_id'])
+        quantities[product_id] = quantities.get(product_id, 0) + float(item['quantity'])
+    return quantities
+
+
+def resolve_user(session, username):
+    """The local user row for a username sent by another till, if there is one"""
+    if not username:
+        return None
+    user = session.query(User).filter(User.username == username).first()
+    return user or SimpleNamespace(id=None, username=username)
+
+
+def find_sale(session, idempotency_key):
+    return session.query(Sale).filter(Sale.idempotency_key == idempotency_key).first()
+
+
+def sale_summary(sale):
+    """The fields a till needs back after a sale is recorded"""
+    return {
+        'id': sale.id,
+        'sale_number': sale.sale_number,
+        'customer_id': sale.customer_id,
+        'subtotal': sale.subtotal,
+        'tax_amount': sale.tax_amount,
+        'total_amount': sale.total_amount,
+        'change_amount': sale.change_amount,
+        'idempotency_key': sale.idempotency_key,
+    }
+
+
+def record_sale(session, cart_items, payment_method="cash", amount_paid=0.0, tax_rate=0.0,
+                customer_id=None, customer_name=None, user=None, idempotency_key=None,
+                created_at=None, allow_shortfall=False):
+    """Add a sale, its items and stock movements to the session without committing.
+
+    ``cart_items`` are dicts with ``product_id``, ``quantity`` and ``price``
+    (``total`` is optional). The statement count does not depend on the number
+    of lines: one query loads the products, the items and movements are bulk
+    inserted and stock is decremented by a single conditional UPDATE.
+
+    Journalled sales pass the till's ``idempotency_key`` and ``created_at``
+    and ``allow_shortfall=True``: the goods have already left the shop, so
+    stock stops at zero and any shortfall is written to the sale notes.
+    """
+    if not cart_items:
+        raise ValueError("Cannot record an empty sale")
+
+    created_at = created_at or datetime.now()
+    # Take the sequence first so the transaction holds the write lock before
+    # it reads anything
+    sale_number = allocate_sale_number(session, created_at)
+
+    quantities = _merge_cart(cart_items)
+    categories = {
+        row.id: row.category_id
+        for row in session.query(Product.id, Product.category_id).filter(Product.id.in_(list(quantities)))
+    }
+    missing = set(quantities) - set(categories)
+    if missing:
+        raise ValueError(f"Unknown product id(s): {', '.join(str(i) for i in sorted(missing))}")
+
+    if customer_id is None:
+        if not customer_name:
+            next_num = session.query(func.count(Customer.id)).scalar() + 1
+            customer_name = f"Customer {next_num}"
+        customer = Customer(name=customer_name)
+        session.add(customer)
+        session.flush()
+        customer_id = customer.id
+
+    subtotal = sum(item.get('total', item['quantity'] * item['price']) for item in cart_items)
+    tax_amount = subtotal * (tax_rate / 100)
+    total_amount = subtotal + tax_amount
+    created_by = user.username if user else "System"
+
+    sale = Sale(
+        sale_number=sale_number,
+        customer_id=customer_id,
+        created_at=created_at,
+        subtotal=subtotal,
+        tax_amount=tax_amount,
+        total_amount=total_amount,
+        payment_method=payment_method,
+        payment_status="paid",
+        amount_paid=amount_paid,
+        change_amount=max(0, amount_paid - total_amount),
+        user_id=user.id if user else None,
+        idempotency_key=idempotency_key,
+    )
+    session.add(sale)
+    session.flush()  # Get sale ID
+
+    lines = [
+        {
+            'sale_id': sale.id,
+            'product_id': int(item['product_id']),
+            'quantity': item['quantity'],
+            'unit_price': item['price'],
+            'total_price': item.get('total', item['quantity'] * item['price']),
+        }
+        for item in cart_items
+    ]
+    session.bulk_insert_mappings(SaleItem, lines)
+    session.bulk_insert_mappings(StockMovement, [
+        {
+            'product_id': product_id,
+            'movement_type': "out",
+            'quantity': quantity,
+            'reference_type': "sale",
+            'reference_id': sale.id,
+            'notes': f"Sale #{sale_number}",
+            'created_by': created_by,
+            'created_at': sale.created_at,
+        }
+        for product_id, quantity in quantities.items()
+    ])
+
+    if allow_shortfall:
+        shortages = decrement_stock_clamped(session, quantities)
+        if shortages:
+            sale.notes = "Stock shortfall when recorded: " + ", ".join(
+                f"{name} {requested - max(available or 0, 0):g} short"
+                for _, name, requested, available in shortages
+            )
+    else:
+        # Fails with InsufficientStockError if another till sold the stock first
+        decrement_stock(session, quantities)
+    record_sale_rollups(session, sale, lines, categories)
+    return sale
+
+
+def record_sale_once(session, cart_items, idempotency_key=None, **kwargs):
+    """record_sale(), or the sale already stored under idempotency_key.
+
+    Meant for transactions that already hold the write lock (BEGIN IMMEDIATE),
+    where the lookup and the insert cannot race.
+    """
+    if idempotency_key:
+        existing = find_sale(session, idempotency_key)
+        if existing is not None:
+            return existing
+    return record_sale(session, cart_items, idempotency_key=idempotency_key, **kwargs)
+
+
+def commit_sale(cart_items, idempotency_key=None, **kwargs):
+    """Record a sale in its own session and commit it.
+
+    Takes the same arguments as record_sale() and returns a summary dict with
+    the sale id, number and totals. A sale already recorded under
+    ``idempotency_key`` is returned as is.
+    """
+    session = db_manager.get_session()
+    if session is None:
+        raise Exception("No database session")
+    try:
+        if idempotency_key:
+            existing = find_sale(session, idempotency_key)
+            if existing is not None:
+                return sale_summary(existing)
+            # End the read so the sale starts by taking the write lock
+            session.rollback()
+        sale = record_sale(session, cart_items, idempotency_key=idempotency_key, **kwargs)
+        session.commit()
+        return sale_summary(sale)
+    except IntegrityError:
+        session.rollback()
+        # Another replay of the same sale won the race
+        existing = find_sale(session, idempotency_key) if idempotency_key else None
+        if existing is None:
+            raise
+        return sale_summary(existing)
+    except Exception:
+        session.rollback()
+        raise
+    finally:
+        db_manager.close_session(session)
+
+
+def journal_sale_operation(entry):
+    """Writer operation recording one sale replayed from a till's journal"""
+    def operation(session):
+        sale = record_sale_once(
+            session,
+            entry['cart_items'],
+            idempotency_key=entry['key'],
+            created_at=datetime.fromisoformat(entry['created_at']),
+            allow_shortfall=True,
+            user=resolve_user(session, entry.get('username')),
+            **entry.get('options', {})
+        )
+        session.flush()
+        return sale_summary(sale)
+    return operation
+
+
+def journal_sale_results(entries, results):
+    """Per entry outcome of a replay, as sent back to the journal.
+
+    ``retry`` is set for errors that say nothing about the sale itself (a
+    locked or unreachable database), so the entry stays queued.
+    """
+    outcomes = []
+    for entry, (ok, value) in zip(entries, results):
+        if ok:
+            outcomes.append({'key': entry['key'], 'ok': True, 'sale': value})
+        else:
+            outcomes.append({'key': entry['key'], 'ok': False, 'error': str(value),
+                             'retry': isinstance(value, OperationalError)})
+    return outcomes
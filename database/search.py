@@ -0,0 +1,111 @@
+# database/search.py
+"""Full-text product search backed by an SQLite FTS5 index.
+
+``products_fts`` holds one row per product (rowid = product id) with the
+searchable text, including the category name. Triggers on products and
+categories keep it in sync, so every writer (ORM, bulk updates, imports) is
+covered. When the SQLite build has no FTS5 the index is not created and
+searches fall back to LIKE.
+"""
+import re
+
+from sqlalchemy import Float, Integer, text
+
+from .models import Product
+
+FTS_TABLE = "products_fts"
+
+# Column weights for bm25(): name and barcode matter most
+FTS_WEIGHTS = "10.0, 1.0, 8.0, 2.0, 3.0"
+
+_POPULATE = (
+    f"INSERT INTO {FTS_TABLE} (rowid, name, description, barcode, supplier_name, category_name) "
+    "SELECT p.id, p.name, COALESCE(p.description, ''), COALESCE(p.barcode, ''), "
+    "COALESCE(p.supplier_name, ''), COALESCE(c.name, '') "
+    "FROM products p LEFT JOIN categories c ON c.id = p.category_id"
+)
+
+_INSERT_NEW = (
+    f"INSERT INTO {FTS_TABLE} (rowid, name, description, barcode, supplier_name, category_name) "
+    "VALUES (NEW.id, NEW.name, COALESCE(NEW.description, ''), COALESCE(NEW.barcode, ''), "
+    "COALESCE(NEW.supplier_name, ''), "
+    "COALESCE((SELECT name FROM categories WHERE id = NEW.category_id), ''));"
+)
+
+FTS_SCHEMA = [
+    f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5("
+    "name, description, barcode, supplier_name, category_name, "
+    "tokenize = 'unicode61 remove_diacritics 2', prefix = '2 3')",
+    "CREATE TRIGGER IF NOT EXISTS products_fts_insert AFTER INSERT ON products BEGIN "
+    + _INSERT_NEW + " END",
+    # Only the indexed columns; stock and price updates do not touch the index
+    "CREATE TRIGGER IF NOT EXISTS products_fts_update "
+    "AFTER UPDATE OF name, description, barcode, supplier_name, category_id ON products BEGIN "
+    f"DELETE FROM {FTS_TABLE} WHERE rowid = OLD.id; " + _INSERT_NEW + " END",
+    "CREATE TRIGGER IF NOT EXISTS products_fts_delete AFTER DELETE ON products BEGIN "
+    f"DELETE FROM {FTS_TABLE} WHERE rowid = OLD.id; END",
+    "CREATE TRIGGER IF NOT EXISTS categories_fts_rename AFTER UPDATE OF name ON categories BEGIN "
+    f"UPDATE {FTS_TABLE} SET category_name = COALESCE(NEW.name, '') "
+    "WHERE rowid IN (SELECT id FROM products WHERE category_id = NEW.id); END",
+    "CREATE TRIGGER IF NOT EXISTS categories_fts_delete AFTER DELETE ON categories BEGIN "
+    f"UPDATE {FTS_TABLE} SET category_name = '' "
+    "WHERE rowid IN (SELECT id FROM products WHERE category_id = OLD.id); END",
+]
+
+_fts_available = None
+
+
+def create_search_index_step(connection):
+    """Migration step creating and filling the FTS index, if SQLite supports it"""
+    try:
+        connection.execute("CREATE VIRTUAL TABLE temp.fts5_probe USING fts5(x)")
+        connection.execute("DROP TABLE temp.fts5_probe")
+    except Exception as e:
+        print(f"⚠️  FTS5 not available, product search will use LIKE: {e}")
+        return
+    for statement in FTS_SCHEMA:
+        connection.execute(statement)
+    connection.execute(f"DELETE FROM {FTS_TABLE}")
+    connection.execute(_POPULATE)
+
+
+def fts_available(session):
+    """Whether the FTS index exists in this database (checked once)"""
+    global _fts_available
+    if _fts_available is None:
+        _fts_available = session.execute(
+            text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"),
+            {"name": FTS_TABLE},
+        ).first() is not None
+    return _fts_available
+
+
+def build_match_query(search_term):
+    """Turn user input into an FTS5 query: every word must match as a prefix"""
+    words = re.findall(r"\w+", search_term, re.UNICODE)
+    return " ".join(f'"{word}"*' for word in words)
+
+
+def apply_product_search(session, query, search_term):
+    """Filter a Product query by search_term, best matches first.
+
+    Returns the query unchanged for an empty search term. Callers limit the
+    result after adding their own filters; a limit inside the ranking would
+    drop matches that those filters keep. Without the FTS index, falls back
+    to a substring match on name and barcode.
+    """
+    search_term = (search_term or "").strip()
+    if not search_term:
+        return query
+
+    match = build_match_query(search_term)
+    if not match or not fts_available(session):
+        return query.filter(
+            Product.name.contains(search_term) |
+            Product.barcode.contains(search_term)
+        )
+
+    sql = (f"SELECT rowid AS product_id, bm25({FTS_TABLE}, {FTS_WEIGHTS}) AS rank "
+           f"FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH :match")
+    ranked = text(sql).bindparams(match=match).columns(product_id=Integer, rank=Float).subquery("product_search")
+    return query.join(ranked, ranked.c.product_id == Product.id).order_by(ranked.c.rank)
@@ -0,0 +1,132 @@
+# database/settings_registry.py
+"""In-memory registry of the settings table with write-through updates"""
+import threading
+
+from .models import Setting
+
+# Settings that are not plain strings. Values are stored as text in the
+# database and converted by SettingsRegistry.get_typed().
+SETTING_TYPES = {
+    "tax_rate": float,
+    "smtp_port": int,
+    "backup_interval_hours": float,
+}
+
+
+class SettingsRegistry:
+    """Loads the settings table once and serves reads from memory.
+
+    Writes go to the database first and then replace the cached entry, so
+    readers never see a value that was not committed. Listeners registered
+    with add_listener() are called with (key, value) after every change.
+    """
+
+    def __init__(self, session_factory):
+        self._session_factory = session_factory
+        self._values = None
+        self._stale = set()
+        self._listeners = []
+        self._lock = threading.RLock()
+
+    def load(self):
+        """(Re)load every setting from the database"""
+        session = self._session_factory()
+        if session is None:
+            return False
+        try:
+            rows = session.query(Setting.key, Setting.value).all()
+            with self._lock:
+                self._values = {key: value for key, value in rows}
+                self._stale.clear()
+            return True
+        except Exception as e:
+            print(f"⚠️  Error loading settings: {e}")
+            return False
+        finally:
+            session.close()
+
+    def _reload_key(self, key):
+        session = self._session_factory()
+        if session is None:
+            return
+        try:
+            row = session.query(Setting.value).filter(Setting.key == key).first()
+            with self._lock:
+                if row:
+                    self._values[key] = row[0]
+                else:
+                    self._values.pop(key, None)
+                self._stale.discard(key)
+        finally:
+            session.close()
+
+    def get(self, key, default=None):
+        """Return the cached value of a setting"""
+        with self._lock:
+            if self._values is None and not self.load():
+                return default
+            if key in self._stale:
+                self._reload_key(key)
+            return self._values.get(key, default)
+
+    def get_typed(self, key, default=None):
+        """Return a setting converted to its registered type"""
+        value = self.get(key)
+        if value is None:
+            return default
+        converter = SETTING_TYPES.get(key, str)
+        try:
+            return converter(value)
+        except (TypeError, ValueError):
+            print(f"⚠️  Invalid value for setting {key}: {value!r}")
+            return default
+
+    def set(self, key, value):
+        """Update an existing setting in the database and in the cache"""
+        session = self._session_factory()
+        if session is None:
+            return False
+        try:
+            setting = session.query(Setting).filter(Setting.key == key).first()
+            if not setting:
+                return False
+            setting.value = value
+            session.commit()
+        except Exception as e:
+            session.rollback()
+            print(f"⚠️  Error updating setting {key}: {e}")
+            return False
+        finally:
+            session.close()
+
+        with self._lock:
+            if self._values is not None:
+                self._values[key] = value
+                self._stale.discard(key)
+            listeners = list(self._listeners)
+        for listener in listeners:
+            try:
+                listener(key, value)
+            except Exception as e:
+                print(f"⚠️  Settings listener failed for {key}: {e}")
+        return True
+
+    def invalidate(self, key=None):
+        """Drop one cached entry, or the whole cache when key is None"""
+        with self._lock:
+            if key is None:
+                self._values = None
+                self._stale.clear()
+            elif self._values is not None:
+                self._stale.add(key)
+
+    def add_listener(self, callback):
+        """Call callback(key, value) whenever a setting changes"""
+        with self._lock:
+            self._listeners.append(callback)
+        return callback
+
+    def remove_listener(self, callback):
+        with self._lock:
+            if callback in self._listeners:
+                self._listeners.remove(callback)
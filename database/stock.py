@@ -0,0 +1,147 @@
+# database/stock.py
+"""Atomic stock updates shared by the POS and inventory screens.
+
+Stock is never read into Python, changed and written back. Every change is a
+single conditional UPDATE that also bumps ``Product.version``, so a sale on one
+till and an edit on another cannot silently overwrite each other.
+"""
+from sqlalchemy import case, func
+
+from .models import Product, StockMovement
+
+
+class InsufficientStockError(Exception):
+    """Raised when a decrement would take a product below zero"""
+
+    def __init__(self, shortages):
+        # shortages: list of (product_id, name, requested, available)
+        self.shortages = shortages
+        details = ", ".join(f"{name}: {available} available, {requested} requested"
+                            for _, name, requested, available in shortages)
+        super().__init__(f"Insufficient stock ({details})")
+
+
+class StockConflictError(Exception):
+    """Raised when a product changed since it was read"""
+
+    def __init__(self, product_id):
+        self.product_id = product_id
+        super().__init__(f"Product {product_id} was changed by another terminal")
+
+
+def _bump_version():
+    return Product.version + 1
+
+
+def decrement_stock(session, quantities):
+    """Take {product_id: quantity} out of stock, all or nothing.
+
+    The UPDATE only matches rows that still hold enough stock; when fewer rows
+    match than requested the shortfall is reported as InsufficientStockError
+    and the caller must roll back.
+    """
+    if not quantities:
+        return
+    ids = list(quantities)
+    wanted = case(quantities, value=Product.id, else_=0)
+    updated = session.query(Product).filter(
+        Product.id.in_(ids),
+        Product.stock_quantity >= wanted,
+    ).update(
+        {Product.stock_quantity: Product.stock_quantity - wanted, Product.version: _bump_version()},
+        synchronize_session=False,
+    )
+    if updated == len(ids):
+        return
+
+    rows = session.query(Product.id, Product.name, Product.stock_quantity).filter(Product.id.in_(ids)).all()
+    shortages = [(row.id, row.name, quantities[row.id], row.stock_quantity)
+                 for row in rows if (row.stock_quantity or 0) < quantities[row.id]]
+    if not shortages:
+        # Every row had enough stock when re-read, so another till changed
+        # them in between; report it the same way rather than half-apply
+        shortages = [(row.id, row.name, quantities[row.id], row.stock_quantity) for row in rows]
+    raise InsufficientStockError(shortages)
+
+
+def decrement_stock_clamped(session, quantities):
+    """Take {product_id: quantity} out of stock, stopping at zero.
+
+    For sales that already happened, e.g. replayed from an offline till, where
+    refusing them would only hide the goods that left the shop. Returns the
+    shortages in the same form as InsufficientStockError. Must run inside a
+    write transaction so the stock read matches what the UPDATE sees.
+    """
+    if not quantities:
+        return []
+    ids = list(quantities)
+    rows = session.query(Product.id, Product.name, Product.stock_quantity).filter(Product.id.in_(ids)).all()
+    shortages = [(row.id, row.name, quantities[row.id], row.stock_quantity)
+                 for row in rows if (row.stock_quantity or 0) < quantities[row.id]]
+    wanted = case(quantities, value=Product.id, else_=0)
+    session.query(Product).filter(Product.id.in_(ids)).update(
+        {Product.stock_quantity: func.max(Product.stock_quantity - wanted, 0), Product.version: _bump_version()},
+        synchronize_session=False,
+    )
+    return shortages
+
+
+def remove_stock(session, product_id, quantity, clamp=False):
+    """Take stock out of one product; with clamp=True stop at zero instead of failing"""
+    if not clamp:
+        decrement_stock(session, {product_id: quantity})
+        return
+    updated = session.query(Product).filter(Product.id == product_id).update(
+        {Product.stock_quantity: func.max(Product.stock_quantity - quantity, 0), Product.version: _bump_version()},
+        synchronize_session=False,
+    )
+    if not updated:
+        raise StockConflictError(product_id)
+
+
+def add_stock(session, product_id, quantity):
+    """Put stock back into one product"""
+    updated = session.query(Product).filter(Product.id == product_id).update(
+        {Product.stock_quantity: Product.stock_quantity + quantity, Product.version: _bump_version()},
+        synchronize_session=False,
+    )
+    if not updated:
+        raise StockConflictError(product_id)
+
+
+def set_stock(session, product_id, new_quantity, expected_version):
+    """Overwrite the stock of a product read at ``expected_version``.
+
+    Used for manual adjustments, where the new figure is only valid relative to
+    what the user saw. Raises StockConflictError if the product changed since.
+    """
+    updated = session.query(Product).filter(
+        Product.id == product_id,
+        Product.version == expected_version,
+    ).update(
+        {Product.stock_quantity: new_quantity, Product.version: _bump_version()},
+        synchronize_session=False,
+    )
+    if not updated:
+        raise StockConflictError(product_id)
+
+
+def record_stock_movement(session, product_id, movement_type, quantity, notes=None,
+                          created_by="System", clamp=False):
+    """Apply a manual stock in/out and log it, without committing.
+
+    A removal larger than the stock raises InsufficientStockError unless
+    clamp=True, in which case the stock stops at zero.
+    """
+    if movement_type == "in":
+        add_stock(session, product_id, quantity)
+    else:
+        remove_stock(session, product_id, quantity, clamp=clamp)
+    session.add(StockMovement(
+        product_id=product_id,
+        movement_type=movement_type,
+        quantity=quantity,
+        reference_type="manual",
+        notes=notes,
+        created_by=created_by,
+    ))
@@ -1,11 +1,25 @@
 # gui/__init__.py
-"""GUI package for Construction POS System"""
+"""GUI package for Construction POS System
+
+Windows are imported on first use, so ``import gui`` stays cheap at startup.
+"""
+import importlib
+
+_WINDOW_MODULES = {
+    'MainWindow': 'main_window',
+    'POSWindow': 'pos_window',
+    'InventoryWindow': 'inventory_window',
+    'ReportsWindow': 'reports_window',
+    'CustomersWindow': 'customers_window',
+}
+
+
+def __getattr__(name):
+    if name in _WINDOW_MODULES:
+        module = importlib.import_module(f".{_WINDOW_MODULES[name]}", __name__)
+        return getattr(module, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
-from .main_window import MainWindow
-from .pos_window import POSWindow
-from .inventory_window import InventoryWindow
-from .reports_window import ReportsWindow
-from .customers_window import CustomersWindow
 
 __all__ = [
     'MainWindow',
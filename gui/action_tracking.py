@@ -0,0 +1,30 @@
+# gui/action_tracking.py
+"""Treat each Tk callback (button, key binding, after() job) as one UI action.
+
+install_action_tracking() must run before the Tk root is created. It only
+imports the standard library, so it does not slow startup; until the database
+package is loaded no statement can run, and callbacks are called as is.
+"""
+import sys
+import tkinter
+
+
+def _action_name(func):
+    name = getattr(func, "__qualname__", None) or repr(func)
+    module = getattr(func, "__module__", None)
+    return f"{module}.{name}" if module else name
+
+
+class _ActionCallWrapper(tkinter.CallWrapper):
+    """CallWrapper that groups the statements of the callback for the query monitor"""
+
+    def __call__(self, *args):
+        instrumentation = sys.modules.get("database.instrumentation")
+        if instrumentation is None:
+            return super().__call__(*args)
+        with instrumentation.query_monitor.action(_action_name(self.func)):
+            return super().__call__(*args)
+
+
+def install_action_tracking():
+    tkinter.CallWrapper = _ActionCallWrapper
@@ -0,0 +1,88 @@
+# gui/diagnostics_window.py
+"""Diagnostics tab of the settings: statement timings and N+1 reports"""
+import tkinter as tk
+from tkinter import ttk
+
+from database.instrumentation import N_PLUS_ONE_THRESHOLD, query_monitor
+from utils.i18n import translate as _
+
+# Characters of SQL shown per row; the full text is in the slow-query log
+STATEMENT_WIDTH = 200
+
+
+def _one_line(statement):
+    statement = " ".join(statement.split())
+    return statement if len(statement) <= STATEMENT_WIDTH else statement[:STATEMENT_WIDTH] + "..."
+
+
+class DiagnosticsWindow:
+    """Slowest statements, recent statements and N+1 patterns from the query monitor"""
+
+    def __init__(self, parent):
+        self.parent = parent
+        self.setup_ui()
+        self.refresh()
+
+    def setup_ui(self):
+        header = ttk.Frame(self.parent)
+        header.pack(fill="x", pady=(0, 5))
+        ttk.Label(header, text=f"{_('slow_query_log')}: {query_monitor.log_path()} "
+                               f"(> {query_monitor.slow_threshold * 1000:.0f} ms)",
+                  wraplength=500).pack(side=tk.LEFT)
+        ttk.Button(header, text=_('clear'), command=self.clear).pack(side=tk.RIGHT, padx=2)
+        ttk.Button(header, text=_('refresh'), command=self.refresh).pack(side=tk.RIGHT, padx=2)
+
+        notebook = ttk.Notebook(self.parent)
+        notebook.pack(fill="both", expand=True)
+
+        self.stats_tree = self._create_tree(notebook, _('slow_statements'), (
+            ('count', 60, 'center'), ('total_ms', 80, 'e'), ('avg_ms', 80, 'e'), ('max_ms', 80, 'e'),
+            ('call_site', 220, 'w'), ('statement', 400, 'w')))
+        self.recent_tree = self._create_tree(notebook, _('recent_statements'), (
+            ('time', 90, 'center'), ('duration_ms', 80, 'e'), ('rows', 60, 'center'), ('action', 200, 'w'),
+            ('call_site', 220, 'w'), ('statement', 400, 'w')))
+        self.n_plus_one_tree = self._create_tree(notebook, _('n_plus_one').format(N_PLUS_ONE_THRESHOLD), (
+            ('time', 90, 'center'), ('action', 200, 'w'), ('count', 60, 'center'),
+            ('call_site', 220, 'w'), ('statement', 400, 'w')))
+
+    def _create_tree(self, notebook, title, columns):
+        frame = ttk.Frame(notebook, padding=5)
+        notebook.add(frame, text=title)
+        names = [name for name, _width, _anchor in columns]
+        tree = ttk.Treeview(frame, columns=names, show='headings', height=12)
+        for name, width, anchor in columns:
+            tree.heading(name, text=_(name))
+            tree.column(name, width=width, anchor=anchor, stretch=(name == 'statement'))
+        v_scroll = ttk.Scrollbar(frame, orient=tk.VERTICAL, command=tree.yview)
+        h_scroll = ttk.Scrollbar(frame, orient=tk.HORIZONTAL, command=tree.xview)
+        tree.configure(yscrollcommand=v_scroll.set, xscrollcommand=h_scroll.set)
+        tree.grid(row=0, column=0, sticky=(tk.W, tk.E, tk.N, tk.S))
+        v_scroll.grid(row=0, column=1, sticky=(tk.N, tk.S))
+        h_scroll.grid(row=1, column=0, sticky=(tk.W, tk.E))
+        frame.columnconfigure(0, weight=1)
+        frame.rowconfigure(0, weight=1)
+        return tree
+
+    def refresh(self):
+        for tree in (self.stats_tree, self.recent_tree, self.n_plus_one_tree):
+            tree.delete(*tree.get_children())
+
+        for row in query_monitor.statement_stats():
+            self.stats_tree.insert('', 'end', values=(
+                row['count'], f"{row['total'] * 1000:.1f}", f"{row['average'] * 1000:.1f}",
+                f"{row['max'] * 1000:.1f}", row['call_site'], _one_line(row['statement'])))
+
+        for record in query_monitor.recent():
+            self.recent_tree.insert('', 'end', values=(
+                record.started_at.strftime('%H:%M:%S'), f"{record.duration * 1000:.1f}",
+                '' if record.rows is None else record.rows, record.action or record.thread,
+                record.call_site, _one_line(record.statement)))
+
+        for report in query_monitor.n_plus_one_reports():
+            self.n_plus_one_tree.insert('', 'end', values=(
+                report.reported_at.strftime('%H:%M:%S'), report.action, report.count,
+                report.call_site, _one_line(report.statement)))
+
+    def clear(self):
+        query_monitor.clear()
+        self.refresh()
@@ -0,0 +1,38 @@
+# gui/inventory_events.py
+"""<<InventoryChanged>> with the ids of the products that changed.
+
+The ids travel in the event's data field ("" means everything changed), which
+tkinter does not pass to Python handlers, so listeners bind through
+bind_inventory_changed(). The product catalog is refreshed once, before the
+event is sent, so every listener reads the new state from memory.
+"""
+from database.catalog import product_catalog
+
+EVENT = '<<InventoryChanged>>'
+
+
+def notify_inventory_changed(widget, product_ids=None):
+    """Refresh the catalog and tell the other screens; None means every product"""
+    if product_ids is not None:
+        product_ids = list(product_ids)
+        if not product_ids:
+            return
+    product_catalog.refresh(product_ids)
+    data = "" if product_ids is None else " ".join(str(product_id) for product_id in product_ids)
+    try:
+        widget.event_generate(EVENT, when='tail', data=data)
+    except Exception:
+        pass
+
+
+def _product_ids(data):
+    if not data:
+        return None
+    return [int(product_id) for product_id in data.split()]
+
+
+def bind_inventory_changed(widget, callback):
+    """Call ``callback(product_ids)`` on <<InventoryChanged>>; returns the id for widget.unbind()"""
+    command = widget.register(lambda data: callback(_product_ids(data)))
+    widget.tk.call('bind', widget._w, EVENT, f'+{command} %d')
+    return command
@@ -5,6 +5,15 @@ import json
 import csv
 from database.database import db_manager
 from database.models import Product, Category, StockMovement, ProductHistory
+from database.read_models import (category_rows, history_pages, inventory_pages, movement_pages,
+                                  stock_alert_rows)
+from database.backend import get_backend
+from database.catalog import product_catalog
+from database.stock import InsufficientStockError, StockConflictError, set_stock
+from sqlalchemy.orm.exc import StaleDataError
+from gui.inventory_events import notify_inventory_changed
+from gui.tree_sync import sync_tree
+from gui.virtual_tree import VirtualTree
 from utils.i18n import translate as _
 
 class InventoryWindow:
@@ -73,7 +82,12 @@ class InventoryWindow:
         products_tree_frame.rowconfigure(0, weight=1)
         
         columns = ('ID', 'Name', 'Category', 'Supplier', 'Barcode', 'Unit', 'Cost', 'Price', 'Stock', 'Min Stock', 'Status')
-        self.products_tree = ttk.Treeview(products_tree_frame, columns=columns, show='headings', height=20)
+        self.products_tree = VirtualTree(products_tree_frame, inventory_pages, self.product_row_values, sortable={
+            'ID': 'id', 'Name': 'name', 'Category': 'category', 'Supplier': 'supplier_name', 'Barcode': 'barcode',
+            'Unit': 'unit', 'Cost': 'cost_price', 'Price': 'selling_price', 'Stock': 'stock_quantity',
+            'Min Stock': 'min_stock_level', 'Status': 'is_active',
+        }, columns=columns, show='headings', height=20)
+        self.products_tree.tag_configure('low_stock', background='#ffeeee', foreground='red')
 
         # Define headings and columns
         headings = {
@@ -97,7 +111,8 @@ class InventoryWindow:
         # Scrollbars
         products_v_scroll = ttk.Scrollbar(products_tree_frame, orient=tk.VERTICAL, command=self.products_tree.yview)
         products_h_scroll = ttk.Scrollbar(products_tree_frame, orient=tk.HORIZONTAL, command=self.products_tree.xview)
-        self.products_tree.configure(yscrollcommand=products_v_scroll.set, xscrollcommand=products_h_scroll.set)
+        self.products_tree.set_yscrollcommand(products_v_scroll.set)
+        self.products_tree.configure(xscrollcommand=products_h_scroll.set)
         
         self.products_tree.grid(row=0, column=0, sticky=(tk.W, tk.E, tk.N, tk.S))
         products_v_scroll.grid(row=0, column=1, sticky=(tk.N, tk.S))
@@ -176,7 +191,12 @@ class InventoryWindow:
         movements_tree_frame.rowconfigure(0, weight=1)
         
         mov_columns = ('ID', 'Product', 'Type', 'Quantity', 'Reference', 'Notes', 'Date', 'User')
-        self.movements_tree = ttk.Treeview(movements_tree_frame, columns=mov_columns, show='headings')
+        # Sortable by indexed columns only, so every page stays fast on large tables
+        self.movements_tree = VirtualTree(movements_tree_frame, movement_pages, self.movement_row_values, sortable={
+            'ID': 'id', 'Type': 'movement_type', 'Date': 'created_at',
+        }, columns=mov_columns, show='headings')
+        self.movements_tree.tag_configure('stock_in', background='#eeffee')
+        self.movements_tree.tag_configure('stock_out', background='#ffeeee')
 
         # Define movement headings
         mov_headings = {
@@ -197,7 +217,8 @@ class InventoryWindow:
         # Movement scrollbars
         mov_v_scroll = ttk.Scrollbar(movements_tree_frame, orient=tk.VERTICAL, command=self.movements_tree.yview)
         mov_h_scroll = ttk.Scrollbar(movements_tree_frame, orient=tk.HORIZONTAL, command=self.movements_tree.xview)
-        self.movements_tree.configure(yscrollcommand=mov_v_scroll.set, xscrollcommand=mov_h_scroll.set)
+        self.movements_tree.set_yscrollcommand(mov_v_scroll.set)
+        self.movements_tree.configure(xscrollcommand=mov_h_scroll.set)
         
         self.movements_tree.grid(row=0, column=0, sticky=(tk.W, tk.E, tk.N, tk.S))
         mov_v_scroll.grid(row=0, column=1, sticky=(tk.N, tk.S))
@@ -269,7 +290,9 @@ class InventoryWindow:
         history_tree_frame.rowconfigure(0, weight=1)
 
         columns = ('ID', 'Product ID', 'Name', 'Action', 'Date')
-        self.history_tree = ttk.Treeview(history_tree_frame, columns=columns, show='headings')
+        self.history_tree = VirtualTree(history_tree_frame, history_pages, self.history_row_values, sortable={
+            'ID': 'id', 'Product ID': 'product_id', 'Name': 'name', 'Action': 'action', 'Date': 'created_at',
+        }, columns=columns, show='headings')
 
         headings = {
             'ID': (_('id'), 50, 'center'),
@@ -284,7 +307,7 @@ class InventoryWindow:
             self.history_tree.column(col, width=width, anchor=anchor)
 
         hist_v_scroll = ttk.Scrollbar(history_tree_frame, orient=tk.VERTICAL, command=self.history_tree.yview)
-        self.history_tree.configure(yscrollcommand=hist_v_scroll.set)
+        self.history_tree.set_yscrollcommand(hist_v_scroll.set)
 
         self.history_tree.grid(row=0, column=0, sticky=(tk.W, tk.E, tk.N, tk.S))
         hist_v_scroll.grid(row=0, column=1, sticky=(tk.N, tk.S))
@@ -302,151 +325,103 @@ class InventoryWindow:
     
     def refresh_products(self, search_term=None):
         """Refresh products list"""
-        session = db_manager.get_session()
         try:
-            # Clear existing items
-            for item in self.products_tree.get_children():
-                self.products_tree.delete(item)
-
-            # Build query - show all products
-            query = session.query(Product)
-
             # Use provided search term or current search box value
             if search_term is None:
                 search_term = self.product_search_var.get().strip()
 
-            if search_term:
-                query = query.filter(
-                    Product.name.contains(search_term) |
-                    Product.barcode.contains(search_term)
-                )
-
-            products = query.order_by(Product.name).all()
-
-            # Populate treeview
-            for product in products:
-                category_name = product.category.name if product.category else "N/A"
-                status = "Active" if product.is_active else "Inactive"
-
-                values = (
-                    product.id,
-                    product.name,
-                    category_name,
-                    product.supplier_name or "",
-                    product.barcode or "",
-                    product.unit,
-                    f"{product.cost_price:,.0f}",
-                    f"{product.selling_price:,.0f}",
-                    product.stock_quantity,
-                    product.min_stock_level,
-                    status
-                )
-
-                item_id = self.products_tree.insert('', tk.END, values=values)
-
-                # Highlight low stock items
-                if product.stock_quantity <= product.min_stock_level:
-                    self.products_tree.item(item_id, tags=('low_stock',))
-
-            # Configure tags
-            self.products_tree.tag_configure('low_stock', background='#ffeeee', foreground='red')
+            # Show all products, a page at a time
+            self.products_tree.show(search_term.strip())
 
         except Exception as e:
             messagebox.showerror("Error", f"Failed to refresh products: {e}")
-        finally:
-            session.close()
+
+    def product_row_values(self, product):
+        """Products list columns and tags of an InventoryRow"""
+        category_name = product.category or "N/A"
+        status = "Active" if product.is_active else "Inactive"
+
+        values = (
+            product.id,
+            product.name,
+            category_name,
+            product.supplier_name or "",
+            product.barcode or "",
+            product.unit,
+            f"{product.cost_price:,.0f}",
+            f"{product.selling_price:,.0f}",
+            product.stock_quantity,
+            product.min_stock_level,
+            status
+        )
+
+        # Highlight low stock items
+        return values, ('low_stock',) if product.stock_quantity <= product.min_stock_level else ()
     
     def refresh_categories(self):
         """Refresh categories list"""
         session = db_manager.get_session()
         try:
-            # Clear existing items
-            for item in self.categories_tree.get_children():
-                self.categories_tree.delete(item)
-            
-            categories = session.query(Category).order_by(Category.name).all()
-            
-            for category in categories:
-                # Count products in category
-                product_count = len(category.products)
-                
+            rows = []
+            for category in category_rows(session):
                 values = (
                     category.id,
                     category.name,
                     category.description or "",
-                    product_count,
+                    category.product_count,
                     category.created_at.strftime("%Y-%m-%d") if category.created_at else ""
                 )
-                self.categories_tree.insert('', tk.END, values=values)
+                rows.append((category.id, values, ()))
+
+            # Only the changed rows are touched
+            sync_tree(self.categories_tree, rows)
                 
         except Exception as e:
             messagebox.showerror("Error", f"Failed to refresh categories: {e}")
         finally:
             session.close()
     
-    def refresh_movements(self, filter_type="All"):
+    def refresh_movements(self, filter_type=None):
         """Refresh stock movements list"""
-        session = db_manager.get_session()
         try:
-            # Clear existing items
-            for item in self.movements_tree.get_children():
-                self.movements_tree.delete(item)
-            
-            # Build query
-            query = session.query(StockMovement)
-            
-            if filter_type != "All":
-                query = query.filter(StockMovement.movement_type == filter_type)
-            
-            movements = query.order_by(StockMovement.created_at.desc()).limit(1000).all()
-            
-            for movement in movements:
-                product_name = movement.product.name if movement.product else "Unknown"
-                
-                values = (
-                    movement.id,
-                    product_name,
-                    movement.movement_type.title(),
-                    f"{movement.quantity:,.1f}",
-                    f"{movement.reference_type or ''} #{movement.reference_id or ''}",
-                    movement.notes or "",
-                    movement.created_at.strftime("%Y-%m-%d %H:%M") if movement.created_at else "",
-                    movement.created_by or ""
-                )
-                
-                item_id = self.movements_tree.insert('', tk.END, values=values)
-                
-                # Color code by movement type
-                if movement.movement_type == "in":
-                    self.movements_tree.item(item_id, tags=('stock_in',))
-                elif movement.movement_type == "out":
-                    self.movements_tree.item(item_id, tags=('stock_out',))
-            
-            # Configure tags
-            self.movements_tree.tag_configure('stock_in', background='#eeffee')
-            self.movements_tree.tag_configure('stock_out', background='#ffeeee')
-            
+            if filter_type is None:
+                filter_type = self.movement_filter_var.get()
+            self.movements_tree.show(filter_type if filter_type != "All" else None)
         except Exception as e:
             messagebox.showerror("Error", f"Failed to refresh movements: {e}")
-        finally:
-            session.close()
+
+    def movement_row_values(self, movement):
+        """Movements list columns and tags of a MovementRow"""
+        product_name = movement.product_name or "Unknown"
+        
+        values = (
+            movement.id,
+            product_name,
+            movement.movement_type.title(),
+            f"{movement.quantity:,.1f}",
+            f"{movement.reference_type or ''} #{movement.reference_id or ''}",
+            movement.notes or "",
+            movement.created_at.strftime("%Y-%m-%d %H:%M") if movement.created_at else "",
+            movement.created_by or ""
+        )
+        
+        # Color code by movement type
+        if movement.movement_type == "in":
+            return values, ('stock_in',)
+        elif movement.movement_type == "out":
+            return values, ('stock_out',)
+        return values, ()
     
     def refresh_alerts(self):
         """Refresh low stock alerts"""
         session = db_manager.get_session()
         try:
-            # Clear existing items
-            for item in self.alerts_tree.get_children():
-                self.alerts_tree.delete(item)
-            
             # Find products below minimum stock
-            products = session.query(Product).filter(
-                Product.is_active == True,
-                Product.stock_quantity <= Product.min_stock_level
-            ).order_by(Product.stock_quantity).all()
+            products = stock_alert_rows(session)
             
+            rows = []
             for product in products:
-                category_name = product.category.name if product.category else "N/A"
+                category_name = product.category or "N/A"
                 shortage = product.min_stock_level - product.stock_quantity
                 
                 if product.stock_quantity <= 0:
@@ -466,15 +441,17 @@ class InventoryWindow:
                     status
                 )
                 
-                item_id = self.alerts_tree.insert('', tk.END, values=values)
-                
                 # Color code by severity
                 if status == "Out of Stock":
-                    self.alerts_tree.item(item_id, tags=('out_of_stock',))
+                    tags = ('out_of_stock',)
                 elif status == "Critical":
-                    self.alerts_tree.item(item_id, tags=('critical',))
+                    tags = ('critical',)
                 else:
-                    self.alerts_tree.item(item_id, tags=('low_stock',))
+                    tags = ('low_stock',)
+                rows.append((product.id, values, tags))
+            
+            # Only the changed rows are touched
+            sync_tree(self.alerts_tree, rows)
             
             # Configure tags
             self.alerts_tree.tag_configure('out_of_stock', background='#ff6666', foreground='white')
@@ -488,25 +465,20 @@ class InventoryWindow:
 
     def refresh_history(self):
         """Refresh product history list"""
-        session = db_manager.get_session()
         try:
-            for item in self.history_tree.get_children():
-                self.history_tree.delete(item)
-
-            records = session.query(ProductHistory).order_by(ProductHistory.created_at.desc()).all()
-            for record in records:
-                values = (
-                    record.id,
-                    record.product_id,
-                    record.name,
-                    record.action.capitalize(),
-                    record.created_at.strftime('%Y-%m-%d %H:%M')
-                )
-                self.history_tree.insert('', tk.END, values=values)
+            self.history_tree.show()
         except Exception as e:
             messagebox.showerror("Error", f"Failed to refresh history: {e}")
-        finally:
-            session.close()
+
+    def history_row_values(self, record):
+        values = (
+            record.id,
+            record.product_id,
+            record.name,
+            (record.action or "").capitalize(),
+            record.created_at.strftime('%Y-%m-%d %H:%M') if record.created_at else ""
+        )
+        return values, ()
 
     def delete_history_entry(self):
         """Delete selected history record"""
@@ -560,12 +532,9 @@ class InventoryWindow:
         finally:
             session.close()
 
-    def notify_change(self):
-        """Notify other windows that inventory data has changed"""
-        try:
-            self.parent.event_generate('<<InventoryChanged>>', when='tail')
-        except Exception:
-            pass
+    def notify_change(self, product_ids=None):
+        """Notify other windows that inventory data has changed; None means every product"""
+        notify_inventory_changed(self.parent, product_ids)
 
     def focus_product(self, product_id):
         """Select and scroll to a product in the treeview"""
@@ -610,7 +579,7 @@ class InventoryWindow:
                 self.product_search_var.set('')
                 self.load_data()
                 self.focus_product(product_id)
-                self.notify_change()
+                self.notify_change([product_id])
             except Exception as e:
                 session.rollback()
                 messagebox.showerror("Error", f"Failed to add product: {e}")
@@ -645,8 +614,13 @@ class InventoryWindow:
                 self.product_search_var.set('')
                 self.load_data()
                 self.focus_product(product_id)
-                self.notify_change()
+                self.notify_change([product_id])
                 
+        except StaleDataError:
+            session.rollback()
+            messagebox.showwarning(_("stock_conflict_title"), _("stock_conflict"))
+            self.load_data()
+            self.focus_product(product_id)
         except Exception as e:
             session.rollback()
             messagebox.showerror("Error", f"Failed to edit product: {e}")
@@ -713,13 +687,13 @@ class InventoryWindow:
                     imported += 1
 
             session.commit()
-            messagebox.showinfo("Success", _("imported_products").format(count=imported))
+            messagebox.showinfo("Success", _("imported_products", count=imported))
             self.product_search_var.set('')
             self.load_data()
             self.notify_change()
         except Exception as e:
             session.rollback()
-            messagebox.showerror("Error", _("failed_import").format(error=e))
+            messagebox.showerror("Error", _("failed_import", error=e))
         finally:
             session.close()
     
@@ -762,7 +736,7 @@ class InventoryWindow:
                 # Clear search to refresh view
                 self.product_search_var.set('')
                 self.load_data()
-                self.notify_change()
+                self.notify_change([product_id])
         except Exception as e:
             session.rollback()
             messagebox.showerror("Error", f"Failed to delete product: {e}")
@@ -778,39 +752,53 @@ class InventoryWindow:
         
         product_id = self.products_tree.item(selection[0])['values'][0]
         product_name = self.products_tree.item(selection[0])['values'][1]
-        current_stock = int(self.products_tree.item(selection[0])['values'][8])
+
+        # Read the stock from the database rather than the list, which may be
+        # stale; the adjustment only applies if nothing changed in between
+        session = db_manager.get_session()
+        try:
+            row = session.query(Product.stock_quantity, Product.version).filter(Product.id == product_id).first()
+        finally:
+            session.close()
+        if not row:
+            messagebox.showerror("Error", "Product not found.")
+            return
+        current_stock, version = row
 
         dialog = StockAdjustmentDialog(self.parent, product_name, current_stock)
         self.parent.wait_window(dialog.dialog)
         if dialog.result:
             session = db_manager.get_session()
             try:
-                product = session.query(Product).get(product_id)
-                if product:
-                    old_stock = product.stock_quantity
-                    new_stock = dialog.result['new_quantity']
-                    adjustment = new_stock - old_stock
-                    
-                    # Update product stock
-                    product.stock_quantity = new_stock
-                    
-                    # Record stock movement
-                    movement = StockMovement(
-                        product_id=product_id,
-                        movement_type="adjustment",
-                        quantity=abs(adjustment),
-                        reference_type="adjustment",
-                        notes=f"Stock adjustment: {old_stock} → {new_stock}. Reason: {dialog.result['reason']}",
-                        created_by="System"
-                    )
-                    session.add(movement)
-                    
-                    session.commit()
-                    messagebox.showinfo("Success", "Stock adjusted successfully!")
-                    self.load_data()
-                    self.focus_product(product_id)
-                    self.notify_change()
-                    
+                old_stock = current_stock
+                new_stock = dialog.result['new_quantity']
+                adjustment = new_stock - old_stock
+                
+                # Update product stock
+                set_stock(session, product_id, new_stock, version)
+                
+                # Record stock movement
+                movement = StockMovement(
+                    product_id=product_id,
+                    movement_type="adjustment",
+                    quantity=abs(adjustment),
+                    reference_type="adjustment",
+                    notes=f"Stock adjustment: {old_stock} → {new_stock}. Reason: {dialog.result['reason']}",
+                    created_by="System"
+                )
+                session.add(movement)
+                
+                session.commit()
+                messagebox.showinfo("Success", "Stock adjusted successfully!")
+                self.load_data()
+                self.focus_product(product_id)
+                self.notify_change([product_id])
+                
+            except StockConflictError:
+                session.rollback()
+                messagebox.showwarning(_("stock_conflict_title"), _("stock_conflict"))
+                self.load_data()
+                self.focus_product(product_id)
             except Exception as e:
                 session.rollback()
                 messagebox.showerror("Error", f"Failed to adjust stock: {e}")
@@ -830,6 +818,7 @@ class InventoryWindow:
                 session.commit()
                 messagebox.showinfo("Success", "Category added successfully!")
                 self.load_data()
+                self.notify_change()
             except Exception as e:
                 session.rollback()
                 messagebox.showerror("Error", f"Failed to add category: {e}")
@@ -861,6 +850,7 @@ class InventoryWindow:
                 session.commit()
                 messagebox.showinfo("Success", "Category updated successfully!")
                 self.load_data()
+                self.notify_change()
                 
         except Exception as e:
             session.rollback()
@@ -897,6 +887,7 @@ class InventoryWindow:
                 session.commit()
                 messagebox.showinfo("Success", "Category deleted successfully!")
                 self.load_data()
+                self.notify_change()
                 
         except Exception as e:
             session.rollback()
@@ -921,48 +912,30 @@ class InventoryWindow:
     
     def process_stock_movement(self, movement_data):
         """Process stock movement"""
-        session = db_manager.get_session()
+        backend = get_backend()
+        product_id = movement_data['product_id']
         try:
-            product = session.query(Product).get(movement_data['product_id'])
-            if not product:
-                messagebox.showerror("Error", "Product not found.")
-                return
-            
-            # Update product stock
-            if movement_data['movement_type'] == "in":
-                product.stock_quantity += movement_data['quantity']
-            else:
-                if product.stock_quantity < movement_data['quantity']:
-                    if not messagebox.askyesno("Insufficient Stock", 
-                                             f"Only {product.stock_quantity} units available. Continue anyway?"):
-                        return
-                product.stock_quantity -= movement_data['quantity']
-                product.stock_quantity = max(0, product.stock_quantity)  # Prevent negative stock
-            
-            # Record stock movement
-            movement = StockMovement(
-                product_id=movement_data['product_id'],
-                movement_type=movement_data['movement_type'],
-                quantity=movement_data['quantity'],
-                reference_type="manual",
-                notes=movement_data['notes'],
-                created_by="System"
-            )
-            session.add(movement)
+            try:
+                backend.record_stock_movement(product_id, movement_data['movement_type'],
+                                              movement_data['quantity'], movement_data['notes'])
+            except InsufficientStockError as e:
+                available = e.shortages[0][3]
+                if not messagebox.askyesno("Insufficient Stock", 
+                                         f"Only {available} units available. Continue anyway?"):
+                    return
+                # Prevent negative stock
+                backend.record_stock_movement(product_id, movement_data['movement_type'],
+                                              movement_data['quantity'], movement_data['notes'], clamp=True)
 
-            session.commit()
             messagebox.showinfo("Success", "Stock movement processed successfully!")
             # Clear search so stock updates are always visible
             self.product_search_var.set('')
             self.load_data()
-            self.focus_product(product.id)
-            self.notify_change()
+            self.focus_product(product_id)
+            self.notify_change([product_id])
             
         except Exception as e:
-            session.rollback()
             messagebox.showerror("Error", f"Failed to process stock movement: {e}")
-        finally:
-            session.close()
 
 
 # Dialog classes for product and category management
@@ -1067,17 +1040,13 @@ class ProductDialog:
     
     def load_categories(self):
         """Load categories for dropdown"""
-        session = db_manager.get_session()
         try:
-            categories = session.query(Category).order_by(Category.name).all()
-            category_names = [cat.name for cat in categories]
+            category_names = product_catalog.category_names()
             self.category_combo['values'] = category_names
             if category_names:
                 self.category_combo.set(category_names[0])
         except Exception as e:
             messagebox.showerror("Error", f"Failed to load categories: {e}")
-        finally:
-            session.close()
     
     def load_product_data(self):
         """Load existing product data"""
@@ -1108,16 +1077,10 @@ class ProductDialog:
                 return
             
             # Get category ID
-            session = db_manager.get_session()
-            try:
-                category = session.query(Category).filter(Category.name == self.category_var.get()).first()
-                if not category:
-                    messagebox.showerror("Error", "Selected category not found.")
-                    return
-                
-                category_id = category.id
-            finally:
-                session.close()
+            category_id = product_catalog.category_id(self.category_var.get())
+            if category_id is None:
+                messagebox.showerror("Error", "Selected category not found.")
+                return
             
             # Prepare data
             self.result = {
@@ -1354,16 +1317,13 @@ class StockMovementDialog:
     
     def load_products(self):
         """Load products for dropdown"""
-        session = db_manager.get_session()
         try:
-            products = session.query(Product).filter(Product.is_active == True).order_by(Product.name).all()
+            products = product_catalog.active_products()
             self.products = products  # Store for later reference
             product_names = [f"{p.id} - {p.name}" for p in products]
             self.product_combo['values'] = product_names
         except Exception as e:
             messagebox.showerror("Error", f"Failed to load products: {e}")
-        finally:
-            session.close()
     
     def save_movement(self):
         """Save stock movement"""
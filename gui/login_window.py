@@ -3,16 +3,16 @@
 import tkinter as tk
 from tkinter import ttk, messagebox
 
-from database.database import db_manager
-from database.models import User
 from utils.auth import verify_password, set_current_user
 
 
 class LoginWindow:
     """Simple modal login window."""
 
-    def __init__(self, root: tk.Toplevel):
+    def __init__(self, root: tk.Toplevel, ready=None):
         self.root = root
+        # Set once the database is initialized; until then login waits
+        self.ready = ready
         self.root.title("User Login")
         self.root.geometry("300x160")
         self.user = None
@@ -28,12 +28,26 @@ class LoginWindow:
         self.password_var = tk.StringVar()
         ttk.Entry(frame, textvariable=self.password_var, show="*").grid(row=1, column=1, pady=5)
 
-        login_btn = ttk.Button(frame, text="Login", command=self.login)
-        login_btn.grid(row=2, column=0, columnspan=2, pady=10, sticky=(tk.W, tk.E))
+        self.login_btn = ttk.Button(frame, text="Login", command=self.login)
+        self.login_btn.grid(row=2, column=0, columnspan=2, pady=10, sticky=(tk.W, tk.E))
 
         self.root.bind("<Return>", lambda _e: self.login())
+        self.wait_until_ready()
+
+    def wait_until_ready(self):
+        """Keep the button disabled while the database is still starting"""
+        if self.ready is None or self.ready.is_set():
+            self.login_btn.config(text="Login", state=tk.NORMAL)
+            return
+        self.login_btn.config(text="Starting...", state=tk.DISABLED)
+        self.root.after(100, self.wait_until_ready)
 
     def login(self):
+        if self.ready is not None and not self.ready.is_set():
+            return
+        from database.database import db_manager
+        from database.models import User
+
         username = self.username_var.get().strip()
         password = self.password_var.get()
 
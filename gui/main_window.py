@@ -3,11 +3,8 @@ from tkinter import ttk
 from datetime import datetime
 from database.database import DatabaseUtils
 from utils.i18n import translate as _
-from .pos_window import POSWindow
-from .inventory_window import InventoryWindow
-from .reports_window import ReportsWindow
-from .customers_window import CustomersWindow
-from .settings_window import SettingsWindow
+
+# The screens are imported when first shown, not at startup
 
 class MainWindow:
     """Main application window with navigation."""
@@ -79,26 +76,31 @@ class MainWindow:
         self.status_label.config(text=message)
 
     def show_pos(self):
+        from .pos_window import POSWindow
         self.clear_content()
         self.current_window = POSWindow(self.content_frame)
         self.update_status(_("pos_ready"))
 
     def show_inventory(self):
+        from .inventory_window import InventoryWindow
         self.clear_content()
         self.current_window = InventoryWindow(self.content_frame)
         self.update_status(_("inventory_management"))
 
     def show_reports(self):
+        from .reports_window import ReportsWindow
         self.clear_content()
         self.current_window = ReportsWindow(self.content_frame)
         self.update_status(_("reports_analytics"))
 
     def show_customers(self):
+        from .customers_window import CustomersWindow
         self.clear_content()
         self.current_window = CustomersWindow(self.content_frame)
         self.update_status(_("customers"))
 
     def show_settings(self):
+        from .settings_window import SettingsWindow
         self.clear_content()
         self.current_window = SettingsWindow(self.content_frame, self.root)
         self.update_status(_("settings"))
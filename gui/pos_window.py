@@ -2,25 +2,59 @@
 import tkinter as tk
 from tkinter import ttk, messagebox, TclError
 from datetime import datetime
-from database.database import db_manager, DatabaseUtils
-from database.models import Product, Sale, SaleItem, Customer, StockMovement
+import re
+from database.database import DatabaseUtils
+from database.backend import get_backend
+from database.journal import sale_journal
+from database.stock import InsufficientStockError
+from gui.inventory_events import EVENT as INVENTORY_CHANGED, bind_inventory_changed
+from gui.product_search import ProductSearch
+from gui.tree_sync import sync_tree
 from utils.auth import get_current_user
 from utils.i18n import translate as _
-from sqlalchemy import func
+
+# Most relevant matches shown for a search in the product list
+SEARCH_RESULT_LIMIT = 200
+
+# Dashboard rows: period of backend.dashboard() and its label
+DASHBOARD_PERIODS = (('today', 'today'), ('week', 'this_week'), ('month', 'this_month'))
+
+# Keyboard-wedge scanners send keys a few ms apart; people type far slower
+SCAN_KEY_INTERVAL_MS = 40
+SCAN_MIN_LENGTH = 4
+
+# "3*6001234567890" scans three units
+SCAN_MULTIPLIER = re.compile(r"^(\d+(?:[.,]\d+)?)\s*\*\s*(\S+)$")
+
+
+def parse_scan(text):
+    """Split scanner input into (quantity, code)"""
+    text = text.strip()
+    match = SCAN_MULTIPLIER.match(text)
+    if match:
+        return float(match.group(1).replace(',', '.')), match.group(2)
+    return 1.0, text
+
 
 class POSWindow:
     def __init__(self, parent):
         self.parent = parent
         self.cart_items = []
         self.selected_customer = None
+        self.product_search = ProductSearch(parent, self.show_products, self.on_search_error,
+                                            SEARCH_RESULT_LIMIT)
+        self.last_key_time = 0
+        self.scan_burst = 0
 
         # Create main POS interface
         self.setup_ui()
         self.load_products()
         self.load_customers()
-        self.inventory_binding = self.parent.bind('<<InventoryChanged>>', self.on_inventory_changed)
+        self.inventory_binding = bind_inventory_changed(self.parent, self.on_inventory_changed)
         self.dashboard_job = None
         self.update_dashboard()
+        # Replay sales journalled while the primary was unavailable
+        sale_journal.start()
         
     def setup_ui(self):
         """Setup POS user interface"""
@@ -53,6 +87,8 @@ class POSWindow:
         search_entry = ttk.Entry(search_frame, textvariable=self.search_var, font=('Arial', 12))
         search_entry.grid(row=0, column=1, sticky=(tk.W, tk.E), padx=(5, 0))
         search_entry.focus()
+        search_entry.bind('<KeyPress>', self.on_search_key)
+        search_entry.bind('<Return>', self.on_search_return)
         
         # Category filter
         ttk.Label(search_frame, text=f"{_('category')}:").grid(row=1, column=0, sticky=tk.W, pady=(5, 0))
@@ -60,6 +96,11 @@ class POSWindow:
         self.category_combo = ttk.Combobox(search_frame, textvariable=self.category_var, state="readonly")
         self.category_combo.grid(row=1, column=1, sticky=(tk.W, tk.E), padx=(5, 0), pady=(5, 0))
         self.category_combo.bind('<<ComboboxSelected>>', self.on_category_change)
+
+        # Feedback for scanned items, without a blocking dialog
+        self.scan_status_var = tk.StringVar()
+        ttk.Label(search_frame, textvariable=self.scan_status_var, foreground='gray').grid(
+            row=2, column=0, columnspan=2, sticky=tk.W, pady=(5, 0))
         
         # Products grid
         products_frame = ttk.LabelFrame(self.left_panel, text=_('products'), padding="5")
@@ -112,17 +153,28 @@ class POSWindow:
         dashboard_frame = ttk.LabelFrame(self.left_panel, text=_('dashboard'), padding="5")
         dashboard_frame.grid(row=2, column=0, sticky=(tk.W, tk.E), padx=5, pady=5)
 
-        ttk.Label(dashboard_frame, text=_("total_sales")).grid(row=0, column=0, sticky=tk.W)
-        self.total_sales_var = tk.StringVar(value="0")
-        ttk.Label(dashboard_frame, textvariable=self.total_sales_var).grid(row=0, column=1, sticky=tk.W)
+        ttk.Label(dashboard_frame, text=_("total_sales")).grid(row=0, column=1, sticky=tk.W, padx=(10, 0))
+        ttk.Label(dashboard_frame, text=_("revenue")).grid(row=0, column=2, sticky=tk.W, padx=(10, 0))
 
-        ttk.Label(dashboard_frame, text=_("revenue")).grid(row=1, column=0, sticky=tk.W)
-        self.revenue_var = tk.StringVar(value="0")
-        ttk.Label(dashboard_frame, textvariable=self.revenue_var).grid(row=1, column=1, sticky=tk.W)
+        # Sales count and revenue per period
+        self.period_vars = {}
+        for row, (period, title) in enumerate(DASHBOARD_PERIODS, start=1):
+            sales_var, revenue_var = tk.StringVar(value="0"), tk.StringVar(value="0")
+            self.period_vars[period] = (sales_var, revenue_var)
+            ttk.Label(dashboard_frame, text=_(title)).grid(row=row, column=0, sticky=tk.W)
+            ttk.Label(dashboard_frame, textvariable=sales_var).grid(row=row, column=1, sticky=tk.W, padx=(10, 0))
+            ttk.Label(dashboard_frame, textvariable=revenue_var).grid(row=row, column=2, sticky=tk.W, padx=(10, 0))
 
-        ttk.Label(dashboard_frame, text=_("low_stock")).grid(row=2, column=0, sticky=tk.W)
+        low_stock_row = len(DASHBOARD_PERIODS) + 1
+        ttk.Label(dashboard_frame, text=_("low_stock")).grid(row=low_stock_row, column=0, sticky=tk.W)
         self.low_stock_var = tk.StringVar(value="0")
-        ttk.Label(dashboard_frame, textvariable=self.low_stock_var).grid(row=2, column=1, sticky=tk.W)
+        ttk.Label(dashboard_frame, textvariable=self.low_stock_var).grid(
+            row=low_stock_row, column=1, sticky=tk.W, padx=(10, 0))
+
+        # Sales kept in the offline journal until the primary takes them
+        self.sync_status_var = tk.StringVar()
+        ttk.Label(dashboard_frame, textvariable=self.sync_status_var, foreground='orange').grid(
+            row=low_stock_row + 1, column=0, columnspan=3, sticky=tk.W)
     
     def setup_right_panel(self):
         """Setup right panel with cart and checkout"""
@@ -236,13 +288,9 @@ class POSWindow:
     
     def load_products(self):
         """Load products from database"""
-        session = db_manager.get_session()
         try:
-            from database.models import Category
-
             # Load categories for filter
-            categories = session.query(Category).all()
-            category_names = ["All Categories"] + [cat.name for cat in categories]
+            category_names = ["All Categories"] + get_backend().categories()
             try:
                 self.category_combo['values'] = category_names
                 self.category_combo.set("All Categories")
@@ -254,60 +302,46 @@ class POSWindow:
 
         except Exception as e:
             messagebox.showerror(_("error"), f"{_('failed_load_products')}: {e}")
-        finally:
-            session.close()
     
     def refresh_products(self, search_term="", category_filter="All Categories"):
-        """Refresh products list based on search and filter"""
-        session = db_manager.get_session()
+        """Refresh products list based on search and filter, reading stock again"""
+        self.product_search.invalidate()
+        self.product_search.search(search_term, self.category_filter(category_filter))
+
+    def category_filter(self, category_filter=None):
+        """The category to search in, None for all"""
+        if category_filter is None:
+            category_filter = self.category_var.get()
+        return category_filter if category_filter != "All Categories" else None
+
+    def show_products(self, products, complete=True):
+        """Show search results, best matches first; the first page comes before the rest"""
+        # Update the treeview in place: after a sale only the stock changes
+        rows = []
+        for product in products:
+            values = (
+                product['id'],
+                product['name'],
+                product['category'] or "N/A",
+                f"{product['price']:,.0f}",
+                product['stock'],
+                product['unit']
+            )
+            rows.append((product['id'], values, ()))
         try:
-            # Clear existing items
-            for item in self.products_tree.get_children():
-                self.products_tree.delete(item)
-            
-            # Build query
-            query = session.query(Product).filter(Product.is_active == True)
-            
-            # Apply search filter
-            if search_term:
-                query = query.filter(
-                    Product.name.contains(search_term) | 
-                    Product.barcode.contains(search_term)
-                )
-            
-            # Apply category filter
-            if category_filter != "All Categories":
-                from database.models import Category
-                category = session.query(Category).filter(Category.name == category_filter).first()
-                if category:
-                    query = query.filter(Product.category_id == category.id)
-            
-            products = query.all()
-            
-            # Populate treeview
-            for product in products:
-                category_name = product.category.name if product.category else "N/A"
-                values = (
-                    product.id,
-                    product.name,
-                    category_name,
-                    f"{product.selling_price:,.0f}",
-                    product.stock_quantity,
-                    product.unit
-                )
-                self.products_tree.insert('', tk.END, values=values)
-                
-        except Exception as e:
-            messagebox.showerror(_("error"), f"{_('failed_refresh_products')}: {e}")
-        finally:
-            session.close()
+            sync_tree(self.products_tree, rows)
+        except TclError:
+            # The screen was closed while the search ran
+            self.product_search.shutdown()
+
+    def on_search_error(self, error):
+        messagebox.showerror(_("error"), f"{_('failed_refresh_products')}: {error}")
     
     def load_customers(self):
         """Load customers for selection"""
-        session = db_manager.get_session()
         try:
-            customers = session.query(Customer).filter(Customer.is_active == True).all()
-            customer_names = [f"{c.id} - {c.name}" for c in customers]
+            customers = get_backend().customers()
+            customer_names = [f"{c['id']} - {c['name']}" for c in customers]
             self.customer_combo['values'] = customer_names
             
             # Select default customer (Walk-in)
@@ -316,26 +350,28 @@ class POSWindow:
                 
         except Exception as e:
             messagebox.showerror(_("error"), f"{_('failed_load_customers')}: {e}")
-        finally:
-            session.close()
+
+    def update_sync_status(self):
+        """Show how many sales are waiting in the offline journal"""
+        pending = sale_journal.pending_count()
+        failed = sale_journal.failed_count()
+        status = _("sync_pending", pending) if pending else ""
+        if failed:
+            status = f"{status} {_('sync_failed', failed)}".strip()
+        self.sync_status_var.set(status)
 
     def update_dashboard(self):
         """Update dashboard statistics"""
-        session = db_manager.get_session()
+        self.update_sync_status()
         try:
-            total_sales = session.query(func.count(Sale.id)).scalar() or 0
-            revenue = session.query(func.sum(Sale.total_amount)).scalar() or 0
-            low_stock = session.query(func.count(Product.id)).filter(
-                Product.is_active == True,
-                Product.stock_quantity <= Product.min_stock_level
-            ).scalar() or 0
-
+            stats = get_backend().dashboard()
             currency = DatabaseUtils.get_setting_value('currency', 'FCFA')
-            self.total_sales_var.set(str(total_sales))
-            self.revenue_var.set(f"{revenue:,.0f} {currency}")
-            self.low_stock_var.set(str(low_stock))
-        finally:
-            session.close()
+            for period, (sales_var, revenue_var) in self.period_vars.items():
+                sales_var.set(str(stats[f'{period}_sales']))
+                revenue_var.set(f"{stats[f'{period}_revenue']:,.0f} {currency}")
+            self.low_stock_var.set(str(stats['low_stock']))
+        except Exception as e:
+            print(f"⚠️  Could not update dashboard: {e}")
 
         # Schedule periodic refresh
         try:
@@ -343,22 +379,86 @@ class POSWindow:
         except Exception:
             self.dashboard_job = None
 
-    def on_inventory_changed(self, event=None):
-        """Handle inventory updates from other windows"""
-        self.load_products()
+    def on_inventory_changed(self, product_ids=None):
+        """Handle inventory updates from other windows; the catalog is already refreshed"""
+        if product_ids is None:
+            self.load_products()
+        else:
+            # Only products changed: keep the categories and the current search
+            self.refresh_products(self.search_var.get(), self.category_var.get())
         self.update_dashboard()
     
     def on_search_change(self, *args):
-        """Handle search text change"""
-        search_term = self.search_var.get()
-        category = self.category_var.get()
-        self.refresh_products(search_term, category)
+        """Handle search text change; the search runs in the background once typing pauses"""
+        self.product_search.request(self.search_var.get(), self.category_filter())
+
+    def on_search_key(self, event):
+        """Track key timing to tell scanner bursts from typing"""
+        if len(event.char) != 1 or not event.char.isprintable():
+            return
+        interval = event.time - self.last_key_time
+        self.last_key_time = event.time
+        self.scan_burst = self.scan_burst + 1 if 0 <= interval <= SCAN_KEY_INTERVAL_MS else 1
+
+    def on_search_return(self, event=None):
+        """Add a scanned or typed barcode straight to the cart"""
+        scanned = self.scan_burst >= SCAN_MIN_LENGTH
+        self.scan_burst = 0
+        quantity, code = parse_scan(self.search_var.get())
+        try:
+            entry = get_backend().lookup_barcode(code) if code else None
+        except Exception as e:
+            messagebox.showerror(_("error"), f"{_('failed_refresh_products')}: {e}")
+            return "break"
+        if entry is None:
+            if scanned:
+                self.parent.bell()
+                self.scan_status_var.set(_("scan_unknown", code))
+                self.clear_search()
+            return "break"
+
+        self.add_scanned_item(entry, quantity)
+        self.clear_search()
+        return "break"
+
+    def clear_search(self):
+        """Empty the search box, refreshing the list only if it was filtered"""
+        self.search_var.set("")
+        self.product_search.cancel()
+        if self.product_search.search_term:
+            self.product_search.search("", self.category_filter())
+
+    def add_scanned_item(self, entry, quantity):
+        """Add a product from the barcode index to the cart without asking for a quantity"""
+        in_cart = sum(item['quantity'] for item in self.cart_items if item['product_id'] == entry['product_id'])
+        if in_cart + quantity > entry['stock']:
+            self.parent.bell()
+            messagebox.showwarning(_("insufficient_stock_title"),
+                                 _("insufficient_stock", entry['stock'], entry['unit'], entry['name']))
+            return
+
+        for cart_item in self.cart_items:
+            if cart_item['product_id'] == entry['product_id']:
+                cart_item['quantity'] += quantity
+                cart_item['total'] = cart_item['quantity'] * cart_item['price']
+                break
+        else:
+            self.cart_items.append({
+                'product_id': entry['product_id'],
+                'name': entry['name'],
+                'quantity': quantity,
+                'price': entry['price'],
+                'total': quantity * entry['price'],
+                'unit': entry['unit']
+            })
+
+        self.refresh_cart()
+        self.calculate_totals()
+        self.scan_status_var.set(_("scan_added", f"{quantity:g}", entry['name']))
     
     def on_category_change(self, event):
         """Handle category filter change"""
-        search_term = self.search_var.get()
-        category = self.category_var.get()
-        self.refresh_products(search_term, category)
+        self.product_search.search(self.search_var.get(), self.category_filter())
     
     def add_to_cart(self, event=None):
         """Add selected product to cart"""
@@ -375,7 +475,7 @@ class POSWindow:
         unit = item['values'][5]
         
         if stock <= 0:
-            messagebox.showwarning(_("out_of_stock"), _("out_of_stock_msg").format(product_name))
+            messagebox.showwarning(_("out_of_stock"), _("out_of_stock_msg", product_name))
             return
         
         # Ask for quantity and allow price adjustment
@@ -387,7 +487,7 @@ class POSWindow:
 
         if quantity > stock:
             messagebox.showwarning(_("insufficient_stock_title"),
-                                 _("insufficient_stock").format(stock, unit, product_name))
+                                 _("insufficient_stock", stock, unit, product_name))
             return
 
         # Check if product already in cart
@@ -561,15 +661,14 @@ class POSWindow:
         cart_item = self.cart_items[item_index]
         
         # Get available stock
-        session = db_manager.get_session()
         try:
-            product = session.query(Product).get(cart_item['product_id'])
+            product = get_backend().product(cart_item['product_id'])
             if not product:
                 messagebox.showerror(_("error"), _("failed_refresh_products"))
                 return
             
             # Available stock includes current cart quantity
-            available_stock = product.stock_quantity + cart_item['quantity']
+            available_stock = product['stock'] + cart_item['quantity']
             
             new_qty = self.ask_quantity(cart_item['name'], available_stock, cart_item['unit'])
             if new_qty is None or new_qty <= 0:
@@ -577,7 +676,7 @@ class POSWindow:
             
             if new_qty > available_stock:
                 messagebox.showwarning(_("insufficient_stock_title"),
-                                     _("insufficient_stock").format(available_stock, cart_item['unit'], cart_item['name']))
+                                     _("insufficient_stock", available_stock, cart_item['unit'], cart_item['name']))
                 return
             
             # Update cart item
@@ -589,8 +688,6 @@ class POSWindow:
             
         except Exception as e:
             messagebox.showerror(_("error"), f"Failed to edit quantity: {e}")
-        finally:
-            session.close()
     
     def remove_from_cart(self):
         """Remove selected item from cart"""
@@ -637,98 +734,66 @@ class POSWindow:
 
         # Determine customer (existing or new)
         customer_text = self.customer_var.get().strip()
-        session = db_manager.get_session()
-        try:
-            if customer_text and ' - ' in customer_text and customer_text.split(' - ')[0].isdigit():
-                customer_id = int(customer_text.split(' - ')[0])
-            else:
-                if not customer_text:
-                    next_num = session.query(func.count(Customer.id)).scalar() + 1
-                    customer_text = f"Customer {next_num}"
-                customer = Customer(name=customer_text)
-                session.add(customer)
-                session.commit()
-                customer_id = customer.id
-        except Exception as e:
-            session.rollback()
-            messagebox.showerror("Customer Error", f"Failed to save customer: {e}")
-            return
-        finally:
-            session.close()
+        customer_id = None
+        if customer_text and ' - ' in customer_text and customer_text.split(' - ')[0].isdigit():
+            customer_id = int(customer_text.split(' - ')[0])
 
-        # Process sale in database
-        session = db_manager.get_session()
+        # Record customer, sale, items and stock in one transaction
         try:
-            # Create sale record
-            current_user = get_current_user()
-            sale = Sale(
-                sale_number=DatabaseUtils.generate_sale_number(),
-                customer_id=customer_id,
-                subtotal=total,
-                tax_amount=tax_amount,
-                total_amount=total_with_tax,
+            result = sale_journal.submit(
+                self.cart_items,
                 payment_method=self.payment_var.get(),
-                payment_status="paid",
                 amount_paid=paid,
-                change_amount=max(0, paid - total_with_tax),
-                user_id=current_user.id if current_user else None,
+                tax_rate=tax_rate,
+                customer_id=customer_id,
+                customer_name=customer_text or None,
+                user=get_current_user(),
             )
-            session.add(sale)
-            session.flush()  # Get sale ID
-            
-            # Add sale items and update stock
-            for item in self.cart_items:
-                # Create sale item
-                sale_item = SaleItem(
-                    sale_id=sale.id,
-                    product_id=item['product_id'],
-                    quantity=item['quantity'],
-                    unit_price=item['price'],
-                    total_price=item['total']
-                )
-                session.add(sale_item)
-                
-                # Update product stock
-                product = session.query(Product).get(item['product_id'])
-                product.stock_quantity -= item['quantity']
-                
-                # Record stock movement
-                stock_movement = StockMovement(
-                    product_id=item['product_id'],
-                    movement_type="out",
-                    quantity=item['quantity'],
-                    reference_type="sale",
-                    reference_id=sale.id,
-                    notes=f"Sale #{sale.sale_number}",
-                    created_by=current_user.username if current_user else "System"
-                )
-                session.add(stock_movement)
-            
-            session.commit()
-            
-            messagebox.showinfo("Sale Complete", 
-                              f"Sale #{sale.sale_number} processed successfully!\n"
-                              f"Total: {total_with_tax:,.0f} {DatabaseUtils.get_setting_value('currency', 'FCFA')}")
-            
-            # Print receipt (optional)
-            if messagebox.askyesno("Print Receipt", "Would you like to print a receipt?"):
-                self.print_receipt(sale)
-            
-            # Clear cart for new sale
-            self.new_sale()
+        except InsufficientStockError as e:
+            # Another till sold the stock since the product list was loaded
+            lines = [_("insufficient_stock", available, self.get_cart_unit(product_id), name)
+                     for product_id, name, _requested, available in e.shortages]
+            messagebox.showwarning(_("insufficient_stock_title"), "\n".join(lines))
             self.refresh_products()
-            self.update_dashboard()
-            
+            return
         except Exception as e:
-            session.rollback()
             messagebox.showerror("Sale Error", f"Failed to process sale: {e}")
-        finally:
-            session.close()
-    
-    def print_receipt(self, sale):
+            return
+
+        if result.get('offline'):
+            # Kept in the journal; the receipt and stock figures follow after the sync
+            messagebox.showwarning("Sale Complete",
+                                 _("sale_saved_offline", result['sale_number'], f"{result['total_amount']:,.0f}",
+                                   DatabaseUtils.get_setting_value('currency', 'FCFA')))
+            self.new_sale()
+            self.update_sync_status()
+            return
+
+        messagebox.showinfo("Sale Complete",
+                          f"Sale #{result['sale_number']} processed successfully!\n"
+                          f"Total: {result['total_amount']:,.0f} {DatabaseUtils.get_setting_value('currency', 'FCFA')}")
+
+        # Print receipt (optional)
+        if messagebox.askyesno("Print Receipt", "Would you like to print a receipt?"):
+            self.print_receipt(result['id'])
+
+        # Clear cart for new sale
+        self.new_sale()
+        self.refresh_products()
+        self.update_dashboard()
+
+    def get_cart_unit(self, product_id):
+        """Return the unit of a product in the cart"""
+        for cart_item in self.cart_items:
+            if cart_item['product_id'] == product_id:
+                return cart_item['unit']
+        return ""
+
+    def print_receipt(self, sale_id):
         """Print receipt for the sale"""
         try:
             from utils.receipt_printer import ReceiptPrinter
+            sale = get_backend().get_sale(sale_id)
             printer = ReceiptPrinter()
             receipt_path = printer.generate_receipt(sale)
             messagebox.showinfo("Receipt", f"Receipt saved to:\n{receipt_path}")
@@ -762,6 +827,7 @@ class POSWindow:
 
 
     def destroy(self):
+        self.product_search.shutdown()
         if self.dashboard_job:
             try:
                 self.parent.after_cancel(self.dashboard_job)
@@ -770,7 +836,7 @@ class POSWindow:
             self.dashboard_job = None
         if self.inventory_binding:
             try:
-                self.parent.unbind('<<InventoryChanged>>', self.inventory_binding)
+                self.parent.unbind(INVENTORY_CHANGED, self.inventory_binding)
             except Exception:
                 pass
 
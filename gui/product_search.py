@@ -0,0 +1,187 @@
+# gui/product_search.py
+"""Search-as-you-type for the POS product list.
+
+Typing only restarts a timer; the search runs once typing pauses for
+SEARCH_DELAY_MS. Queries run on a worker thread through the backend, so a
+slow disk or a slow sale server never stalls the entry. The worker always
+takes the newest request and skips the ones typed over while it was busy.
+Each request gets a generation number and results of an older generation are
+dropped, so the list never jumps back to an outdated search.
+
+The first FIRST_PAGE_SIZE matches are shown as soon as they are read; the
+rest up to the result limit follow. Complete results are kept in a small LRU
+cache, so going back to a recent search (e.g. deleting a typed letter) shows
+it at once; invalidate() empties it when stock or products change.
+"""
+import queue
+import threading
+import time
+from collections import OrderedDict
+
+from database.backend import get_backend
+
+# Search runs once typing pauses for this long, so scanner bursts never
+# trigger a product list refresh
+SEARCH_DELAY_MS = 120
+POLL_MS = 30
+FIRST_PAGE_SIZE = 30
+CACHE_SIZE = 32
+# Cached stock figures older than this are read again; other tills sell too
+CACHE_MAX_AGE = 30.0
+
+
+class ProductSearch:
+    """Runs product searches in the background and hands results to the Tk thread.
+
+    ``on_results(products, complete)`` gets the product dicts of the backend,
+    first the first page with complete=False unless it already holds every
+    match, then all of them. ``on_error(exception)`` gets failures of the
+    latest search only. Both are called on the Tk thread.
+    """
+
+    def __init__(self, widget, on_results, on_error, limit):
+        self.widget = widget
+        self.on_results = on_results
+        self.on_error = on_error
+        self.limit = limit
+        self.generation = 0
+        # Search term of the latest search started
+        self.search_term = ""
+        # Generation of the last search that has ended, and of the last invalidate()
+        self.finished = 0
+        self.cache_generation = 0
+        self.cache = OrderedDict()
+        self.messages = queue.Queue()
+        self._wakeup = threading.Condition()
+        self._pending = None
+        self._closed = False
+        self._worker = None
+        self._timer = None
+        self._poll_job = None
+
+    def request(self, search_term, category=None):
+        """Search once typing pauses"""
+        self.cancel()
+        try:
+            self._timer = self.widget.after(SEARCH_DELAY_MS, self.search, search_term, category)
+        except Exception:
+            self.search(search_term, category)
+
+    def search(self, search_term, category=None):
+        """Search now; a cached result is shown straight away"""
+        self.cancel()
+        self.generation += 1
+        key = ((search_term or "").strip(), category)
+        self.search_term = key[0]
+        cached = self.cache.get(key)
+        if cached is not None and time.monotonic() - cached[0] < CACHE_MAX_AGE:
+            self.cache.move_to_end(key)
+            self.finished = self.generation
+            self.on_results(cached[1], True)
+            return
+        with self._wakeup:
+            self._pending = (self.generation, key)
+            if self._worker is None:
+                self._worker = threading.Thread(target=self._work, name="product-search", daemon=True)
+                self._worker.start()
+            self._wakeup.notify()
+        self._schedule_poll()
+
+    def cancel(self):
+        """Forget a search that has not started yet"""
+        if self._timer is not None:
+            try:
+                self.widget.after_cancel(self._timer)
+            except Exception:
+                pass
+            self._timer = None
+
+    def invalidate(self):
+        """Forget cached results, including those of searches still running"""
+        self.cache.clear()
+        self.cache_generation = self.generation
+
+    def shutdown(self):
+        """Stop the worker and drop results still on their way, e.g. when the screen goes away"""
+        self.cancel()
+        self.generation += 1
+        if self._poll_job is not None:
+            try:
+                self.widget.after_cancel(self._poll_job)
+            except Exception:
+                pass
+            self._poll_job = None
+        with self._wakeup:
+            self._closed = True
+            self._pending = None
+            self._wakeup.notify()
+
+    def _work(self):
+        while True:
+            with self._wakeup:
+                while self._pending is None and not self._closed:
+                    self._wakeup.wait()
+                if self._closed:
+                    return
+                generation, key = self._pending
+                self._pending = None
+            try:
+                self._run(get_backend(), generation, key)
+            except Exception as e:
+                self.messages.put(("error", generation, key, e))
+
+    def _stale(self, generation):
+        with self._wakeup:
+            return self._closed or self._pending is not None or generation != self.generation
+
+    def _run(self, backend, generation, key):
+        search_term, category = key
+        if self.limit is None or self.limit > FIRST_PAGE_SIZE:
+            products = backend.search_products(search_term, category, limit=FIRST_PAGE_SIZE)
+            # Fewer rows are every match; an empty search lists all products whatever the limit
+            if len(products) != FIRST_PAGE_SIZE:
+                self.messages.put(("done", generation, key, products))
+                return
+            self.messages.put(("page", generation, key, products))
+            if self._stale(generation):
+                # Typed over while the first page was read
+                self.messages.put(("done", generation, key, None))
+                return
+        products = backend.search_products(search_term, category, limit=self.limit)
+        self.messages.put(("done", generation, key, products))
+
+    def _schedule_poll(self):
+        if self._poll_job is None:
+            try:
+                self._poll_job = self.widget.after(POLL_MS, self._poll)
+            except Exception:
+                # The screen was closed
+                self.shutdown()
+
+    def _poll(self):
+        self._poll_job = None
+        while True:
+            try:
+                kind, generation, key, value = self.messages.get_nowait()
+            except queue.Empty:
+                break
+            if kind != "page":
+                self.finished = max(self.finished, generation)
+            if kind == "done" and value is not None and generation > self.cache_generation:
+                self._remember(key, value)
+            if generation != self.generation:
+                continue
+            if kind == "error":
+                self.on_error(value)
+            elif value is not None:
+                self.on_results(value, kind == "done")
+        with self._wakeup:
+            busy = self._pending is not None
+        if busy or self.finished < self.generation:
+            self._schedule_poll()
+
+    def _remember(self, key, products):
+        self.cache[key] = (time.monotonic(), products)
+        self.cache.move_to_end(key)
+        while len(self.cache) > CACHE_SIZE:
+            self.cache.popitem(last=False)
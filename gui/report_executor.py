@@ -0,0 +1,151 @@
+# gui/report_executor.py
+"""Runs report queries on a worker thread so the application stays responsive.
+
+A report is a function ``run(job)`` called on the worker with its own session
+(``job.session``). It streams rows to the screen with job.emit() and may call
+job.progress(); whatever it returns is handed to ``on_done``. Messages go
+through a queue that the Tk thread drains every POLL_MS with after(), so
+widgets are only ever touched on the main thread.
+
+cancel() sets a flag that an SQLite progress handler checks every
+PROGRESS_OPCODES virtual machine instructions, which interrupts the running
+statement; job.emit() and job.check() stop the report between statements.
+"""
+import queue
+import threading
+import tkinter as tk
+
+from database.database import db_manager
+
+POLL_MS = 50
+PROGRESS_OPCODES = 10000
+BATCH_SIZE = 250
+# Batches handed to the screen per poll, so a flood of rows cannot freeze it
+MAX_BATCHES_PER_POLL = 4
+
+
+class ReportCancelled(Exception):
+    """The report was cancelled before it finished"""
+
+
+class ReportJob:
+    """What a report function sees of its run"""
+
+    def __init__(self, session):
+        self.session = session
+        self.cancelled = threading.Event()
+        self.messages = queue.Queue()
+
+    def check(self):
+        if self.cancelled.is_set():
+            raise ReportCancelled()
+
+    def emit(self, rows):
+        """Hand a batch of rows to the screen"""
+        self.check()
+        if rows:
+            self.messages.put(("rows", rows))
+
+    def emit_batches(self, rows, size=BATCH_SIZE):
+        for start in range(0, len(rows), size):
+            self.emit(rows[start:start + size])
+
+    def progress(self, done, total=None):
+        self.messages.put(("progress", (done, total)))
+
+    def _progress_handler(self):
+        # A non-zero return makes SQLite abort the statement
+        return 1 if self.cancelled.is_set() else 0
+
+
+class ReportExecutor:
+    """Runs one report at a time; submitting a new one cancels the running one"""
+
+    def __init__(self, widget):
+        self.widget = widget
+        self.job = None
+        self._callbacks = {}
+
+    @property
+    def running(self):
+        return self.job is not None
+
+    def submit(self, run, on_rows=None, on_progress=None, on_done=None, on_error=None):
+        """Start ``run(job)`` in the background.
+
+        on_error gets the exception, or ReportCancelled when the report was
+        cancelled. All callbacks are called on the Tk thread.
+        """
+        # The replaced report ends silently
+        self.shutdown()
+        session = db_manager.get_session()
+        if session is None:
+            raise Exception("No database session")
+        job = ReportJob(session)
+        self.job = job
+        self._callbacks[job] = (on_rows, on_progress, on_done, on_error)
+        threading.Thread(target=self._work, args=(job, run), name="report", daemon=True).start()
+        self.widget.after(POLL_MS, self._poll, job)
+        return job
+
+    def cancel(self):
+        if self.job is not None:
+            self.job.cancelled.set()
+            self.job = None
+
+    def shutdown(self):
+        """Cancel without calling back, e.g. when the screen goes away"""
+        if self.job is not None:
+            self._callbacks[self.job] = (None, None, None, None)
+        self.cancel()
+
+    def _work(self, job, run):
+        connection = None
+        try:
+            connection = job.session.connection().connection.dbapi_connection
+            connection.set_progress_handler(job._progress_handler, PROGRESS_OPCODES)
+            result = run(job)
+            job.check()
+            job.messages.put(("done", result))
+        except Exception as e:
+            # An interrupted statement surfaces as an OperationalError
+            job.messages.put(("error", ReportCancelled() if job.cancelled.is_set() else e))
+        finally:
+            try:
+                if connection is not None:
+                    connection.set_progress_handler(None, 0)
+                job.session.close()
+            except Exception as e:
+                print(f"⚠️  Error closing report session: {e}")
+
+    def _poll(self, job):
+        on_rows, on_progress, on_done, on_error = self._callbacks[job]
+        batches = 0
+        while batches < MAX_BATCHES_PER_POLL:
+            try:
+                kind, value = job.messages.get_nowait()
+            except queue.Empty:
+                break
+            # A cancelled job's rows are dropped; only its end is reported
+            if kind == "rows":
+                batches += 1
+                if on_rows and not job.cancelled.is_set():
+                    on_rows(value)
+            elif kind == "progress":
+                if on_progress and not job.cancelled.is_set():
+                    on_progress(*value)
+            else:
+                del self._callbacks[job]
+                if self.job is job:
+                    self.job = None
+                if kind == "done" and on_done:
+                    on_done(value)
+                elif kind == "error" and on_error:
+                    on_error(value)
+                return
+        try:
+            self.widget.after(POLL_MS, self._poll, job)
+        except tk.TclError:
+            # The screen was closed; let the worker stop at its next check
+            job.cancelled.set()
+            self._callbacks.pop(job, None)
@@ -1,16 +1,28 @@
 # gui/reports_window.py
 import tkinter as tk
 from tkinter import ttk, messagebox, filedialog
-from datetime import datetime, date, timedelta
-from database.database import db_manager, DatabaseUtils
-from database.models import Sale, Product, SaleItem, Category, StockMovement
+from datetime import datetime, date, time, timedelta
+from database.database import DatabaseUtils
+from database.catalog import product_catalog
+from database.read_models import stock_report_rows
+from database.reports import sales_in_range, sales_totals_in_range
+from database.rollups import product_performance, sales_summary
+from gui.report_executor import BATCH_SIZE, ReportCancelled, ReportExecutor
+from gui.tree_sync import TreeSync
 import csv
 import os
 from utils.i18n import translate as _
 
+# Sales shown in the sales report; exports read every sale in pages of this size
+SALES_REPORT_PAGE_SIZE = 1000
+SALES_CSV_HEADERS = ['Date', 'Receipt #', 'Customer', 'Items', 'Subtotal', 'Tax', 'Total', 'Payment']
+
 class ReportsWindow:
     def __init__(self, parent):
         self.parent = parent
+        self.sales_report_range = None
+        self.report_sync = None
+        self.report_executor = ReportExecutor(parent)
         self.setup_ui()
         
     def setup_ui(self):
@@ -38,6 +50,17 @@ class ReportsWindow:
         self.financial_frame = ttk.Frame(self.notebook)
         self.notebook.add(self.financial_frame, text=_('financial_summary'))
         self.setup_financial_reports()
+
+        # Progress of the report running in the background
+        status_frame = ttk.Frame(self.parent)
+        status_frame.grid(row=1, column=0, sticky=(tk.W, tk.E), padx=5, pady=(0, 5))
+        self.report_status_var = tk.StringVar()
+        ttk.Label(status_frame, textvariable=self.report_status_var).pack(side=tk.LEFT)
+        self.cancel_report_button = ttk.Button(status_frame, text=_('cancel'), command=self.cancel_report,
+                                               state=tk.DISABLED)
+        self.cancel_report_button.pack(side=tk.RIGHT, padx=5)
+        self.report_progress = ttk.Progressbar(status_frame, length=200)
+        self.report_progress.pack(side=tk.RIGHT)
     
     def setup_sales_reports(self):
         """Setup sales reports tab"""
@@ -438,243 +461,276 @@ class ReportsWindow:
     
     def load_categories(self):
         """Load categories for inventory filter"""
-        session = db_manager.get_session()
         try:
-            categories = session.query(Category).order_by(Category.name).all()
-            category_names = [_('all_categories')] + [cat.name for cat in categories]
+            category_names = [_('all_categories')] + product_catalog.category_names()
             self.inv_category_combo['values'] = category_names
             self.inv_category_combo.set(_('all_categories'))
         except Exception as e:
             messagebox.showerror("Error", f"Failed to load categories: {e}")
-        finally:
-            session.close()
     
     # Report generation methods
+    def run_report(self, run, tree=None, on_done=None, error_message="Failed to generate report"):
+        """Run ``run(job)`` in the background, streaming its (key, values, tags) rows into tree.
+
+        Rows already shown under the same key are updated in place; rows the
+        report no longer returns are removed when it ends.
+        """
+        sync = TreeSync(tree) if tree is not None else None
+        self.report_sync = sync
+        self.report_status_var.set(_('report_running'))
+        self.report_progress.configure(mode='indeterminate')
+        self.report_progress.start(10)
+        self.cancel_report_button.configure(state=tk.NORMAL)
+
+        def finished(result):
+            if sync:
+                sync.finish()
+            self.report_finished("")
+            if on_done:
+                on_done(result)
+
+        def failed(error):
+            # Keep the rows that arrived
+            if sync:
+                sync.finish()
+            if isinstance(error, ReportCancelled):
+                self.report_finished(_('report_cancelled'))
+                return
+            self.report_finished("")
+            messagebox.showerror("Error", f"{error_message}: {error}")
+
+        try:
+            self.report_executor.submit(run, on_rows=sync.add if sync else None,
+                                        on_progress=self.show_report_progress, on_done=finished, on_error=failed)
+        except Exception as e:
+            failed(e)
+
+    def show_report_progress(self, done, total=None):
+        if total:
+            self.report_progress.stop()
+            self.report_progress.configure(mode='determinate', maximum=total, value=done)
+            self.report_status_var.set(f"{_('report_running')} {done:,}/{total:,}")
+        else:
+            self.report_status_var.set(f"{_('report_running')} {done:,}")
+
+    def report_finished(self, status):
+        self.report_progress.stop()
+        self.report_progress.configure(mode='determinate', value=0)
+        self.report_status_var.set(status)
+        self.cancel_report_button.configure(state=tk.DISABLED)
+
+    def cancel_report(self):
+        # The cancelled job calls nothing back: a report started before it
+        # stops must not have its rows removed by the old job's end
+        self.report_executor.shutdown()
+        if self.report_sync:
+            # Keep the rows that arrived
+            self.report_sync.finish()
+            self.report_sync = None
+        self.report_finished(_('report_cancelled'))
+
+    def destroy(self):
+        """Called by the main window before switching screens"""
+        self.report_executor.shutdown()
+
     def generate_sales_report(self):
         """Generate sales report"""
         try:
             from_dt = datetime.strptime(f"{self.from_date_var.get()} {self.from_time_var.get()}", "%Y-%m-%d %H:%M")
             to_dt = datetime.strptime(f"{self.to_date_var.get()} {self.to_time_var.get()}", "%Y-%m-%d %H:%M")
-
-            session = db_manager.get_session()
-            try:
-                # Query sales in datetime range
-                sales = session.query(Sale).filter(
-                    Sale.created_at >= from_dt,
-                    Sale.created_at <= to_dt,
-                ).order_by(Sale.created_at.desc()).all()
-                
-                # Clear existing data
-                for item in self.sales_tree.get_children():
-                    self.sales_tree.delete(item)
-                
-                # Clear summary
-                for widget in self.sales_summary_frame.winfo_children():
-                    widget.destroy()
-                
-                if not sales:
-                    ttk.Label(self.sales_summary_frame, text="No sales found for the selected date range.", 
-                             font=('Arial', 12)).pack()
-                    return
-                
-                # Calculate summary
-                total_sales = len(sales)
-                total_amount = sum(sale.total_amount for sale in sales)
-                total_tax = sum(sale.tax_amount for sale in sales)
-                total_items = sum(len(sale.sale_items) for sale in sales)
-                
-                currency = DatabaseUtils.get_setting_value('currency', 'FCFA')
-                
-                # Display summary
-                summary_text = f"Total Sales: {total_sales} | Total Amount: {total_amount:,.0f} {currency} | Total Tax: {total_tax:,.0f} {currency} | Items Sold: {total_items}"
-                ttk.Label(self.sales_summary_frame, text=summary_text, font=('Arial', 12, 'bold')).pack()
-                
-                # Populate treeview
-                for sale in sales:
-                    customer_name = sale.customer.name if sale.customer else "Walk-in"
-                    if len(customer_name) > 15:
-                        customer_name = customer_name[:12] + "..."
-                    
-                    values = (
-                        sale.created_at.strftime('%Y-%m-%d'),
-                        sale.sale_number,
-                        customer_name,
-                        len(sale.sale_items),
-                        f"{sale.subtotal:,.0f}",
-                        f"{sale.tax_amount:,.0f}",
-                        f"{sale.total_amount:,.0f}",
-                        sale.payment_method.title()
-                    )
-                    self.sales_tree.insert('', tk.END, values=values)
-                
-            finally:
-                session.close()
-                
         except ValueError:
             messagebox.showerror("Invalid Date", "Please enter valid dates in YYYY-MM-DD format.")
-        except Exception as e:
-            messagebox.showerror("Error", f"Failed to generate sales report: {e}")
-    
+            return
+
+        def run(job):
+            # Totals in SQL; whole days come straight from the rollups
+            if from_dt.time() == time(0, 0) and to_dt.time() == time(23, 59):
+                summary = sales_summary(job.session, from_dt.date(), to_dt.date())
+            else:
+                summary = sales_totals_in_range(job.session, from_dt, to_dt)
+
+            # Newest sales in datetime range, including archived years, a batch at a time
+            shown = min(summary['sale_count'], SALES_REPORT_PAGE_SIZE)
+            count = 0
+            after = None
+            while count < shown:
+                job.progress(count, shown)
+                sales = sales_in_range(job.session, from_dt, to_dt,
+                                       limit=min(BATCH_SIZE, shown - count), after=after)
+                if not sales:
+                    break
+                job.emit([(sale.id, self.sales_row_values(sale), ()) for sale in sales])
+                count += len(sales)
+                after = (sales[-1].created_at, sales[-1].id)
+            summary['shown'] = count
+            return summary
+
+        def show_summary(summary):
+            self.sales_report_range = (from_dt, to_dt)
+            if not summary['sale_count']:
+                ttk.Label(self.sales_summary_frame, text="No sales found for the selected date range.",
+                          font=('Arial', 12)).pack()
+                return
+
+            currency = DatabaseUtils.get_setting_value('currency', 'FCFA')
+
+            # Display summary
+            summary_text = f"Total Sales: {summary['sale_count']} | Total Amount: {summary['total_amount']:,.0f} {currency} | Total Tax: {summary['tax_amount']:,.0f} {currency} | Items Sold: {summary['line_count']}"
+            ttk.Label(self.sales_summary_frame, text=summary_text, font=('Arial', 12, 'bold')).pack()
+            if summary['sale_count'] > summary['shown']:
+                ttk.Label(self.sales_summary_frame,
+                          text=f"Showing the latest {summary['shown']} sales; export to CSV for all {summary['sale_count']}.").pack()
+
+        # Clear summary
+        for widget in self.sales_summary_frame.winfo_children():
+            widget.destroy()
+        self.sales_report_range = None
+        self.run_report(run, self.sales_tree, show_summary, "Failed to generate sales report")
+
+    @staticmethod
+    def sales_row_values(sale):
+        """Sales report columns of one sales_in_range() row"""
+        customer_name = sale.customer_name or "Walk-in"
+        if len(customer_name) > 15:
+            customer_name = customer_name[:12] + "..."
+        return (
+            sale.created_at.strftime('%Y-%m-%d'),
+            sale.sale_number,
+            customer_name,
+            sale.item_count,
+            f"{sale.subtotal:,.0f}",
+            f"{sale.tax_amount:,.0f}",
+            f"{sale.total_amount:,.0f}",
+            (sale.payment_method or "cash").title()
+        )
+
+    def write_sales_csv(self, job, filename, from_dt, to_dt):
+        """Write every sale in the range, a page at a time; returns the number written"""
+        written = 0
+        after = None
+        try:
+            with open(filename, 'w', newline='', encoding='utf-8') as csvfile:
+                writer = csv.writer(csvfile)
+                writer.writerow(SALES_CSV_HEADERS)
+                while True:
+                    job.check()
+                    sales = sales_in_range(job.session, from_dt, to_dt, limit=SALES_REPORT_PAGE_SIZE, after=after)
+                    for sale in sales:
+                        writer.writerow(self.sales_row_values(sale))
+                    written += len(sales)
+                    if sales:
+                        after = (sales[-1].created_at, sales[-1].id)
+                    job.progress(written)
+                    if len(sales) < SALES_REPORT_PAGE_SIZE:
+                        return written
+        except BaseException:
+            # No half-written export
+            if os.path.exists(filename):
+                os.remove(filename)
+            raise
+
     def generate_inventory_report(self):
         """Generate inventory report"""
-        try:
-            report_type = self.inv_report_type.get()
-            category_filter = self.inv_category_var.get()
-            
-            session = db_manager.get_session()
-            try:
-                # Build query
-                query = session.query(Product).filter(Product.is_active == True)
-                
-                if category_filter != _('all_categories'):
-                    category = session.query(Category).filter(Category.name == category_filter).first()
-                    if category:
-                        query = query.filter(Product.category_id == category.id)
-                
-                # Apply report type filter
-                if report_type == "Low Stock Items":
-                    query = query.filter(Product.stock_quantity <= Product.min_stock_level)
-                elif report_type == "Out of Stock":
-                    query = query.filter(Product.stock_quantity <= 0)
-                
-                products = query.order_by(Product.name).all()
-                
-                # Clear existing data
-                for item in self.inventory_tree.get_children():
-                    self.inventory_tree.delete(item)
-                
-                # Clear summary
-                for widget in self.inv_summary_frame.winfo_children():
-                    widget.destroy()
-                
-                if not products:
-                    ttk.Label(self.inv_summary_frame, text="No products found for the selected criteria.", 
-                             font=('Arial', 12)).pack()
-                    return
-                
-                # Calculate summary
-                total_products = len(products)
-                total_stock_value = sum(product.stock_quantity * product.cost_price for product in products)
-                total_retail_value = sum(product.stock_quantity * product.selling_price for product in products)
-                low_stock_count = sum(1 for product in products if product.stock_quantity <= product.min_stock_level)
-                
-                currency = DatabaseUtils.get_setting_value('currency', 'FCFA')
-                
-                # Display summary
-                summary_text = f"Products: {total_products} | Low Stock: {low_stock_count} | Stock Value (Cost): {total_stock_value:,.0f} {currency} | Stock Value (Retail): {total_retail_value:,.0f} {currency}"
-                ttk.Label(self.inv_summary_frame, text=summary_text, font=('Arial', 12, 'bold')).pack()
-                
-                # Populate treeview
-                for product in products:
-                    category_name = product.category.name if product.category else "N/A"
-                    stock_value = product.stock_quantity * product.selling_price
-                    
-                    values = (
-                        product.id,
-                        product.name,
-                        category_name,
-                        product.unit,
-                        product.stock_quantity,
-                        product.min_stock_level,
-                        f"{product.cost_price:,.0f}",
-                        f"{product.selling_price:,.0f}",
-                        f"{stock_value:,.0f}"
-                    )
-                    
-                    item_id = self.inventory_tree.insert('', tk.END, values=values)
-                    
-                    # Highlight low stock items
-                    if product.stock_quantity <= product.min_stock_level:
-                        self.inventory_tree.item(item_id, tags=('low_stock',))
-                
-                # Configure tags
-                self.inventory_tree.tag_configure('low_stock', background='#ffeeee', foreground='red')
-                
-            finally:
-                session.close()
-                
-        except Exception as e:
-            messagebox.showerror("Error", f"Failed to generate inventory report: {e}")
-    
+        report_type = self.inv_report_type.get()
+        category_filter = self.inv_category_var.get()
+        category = category_filter if category_filter != _('all_categories') else None
+
+        def run(job):
+            products = stock_report_rows(
+                job.session,
+                category=category,
+                low_stock=(report_type == "Low Stock Items"),
+                out_of_stock=(report_type == "Out of Stock"),
+            )
+
+            rows = []
+            for product in products:
+                category_name = product.category or "N/A"
+                stock_value = product.stock_quantity * product.selling_price
+
+                values = (
+                    product.id,
+                    product.name,
+                    category_name,
+                    product.unit,
+                    product.stock_quantity,
+                    product.min_stock_level,
+                    f"{product.cost_price:,.0f}",
+                    f"{product.selling_price:,.0f}",
+                    f"{stock_value:,.0f}"
+                )
+
+                # Highlight low stock items
+                rows.append((product.id, values,
+                             ('low_stock',) if product.stock_quantity <= product.min_stock_level else ()))
+            job.emit_batches(rows)
+
+            return {
+                'total_products': len(products),
+                'total_stock_value': sum(product.stock_quantity * product.cost_price for product in products),
+                'total_retail_value': sum(product.stock_quantity * product.selling_price for product in products),
+                'low_stock_count': sum(1 for _key, _values, tags in rows if tags),
+            }
+
+        def show_summary(summary):
+            if not summary['total_products']:
+                ttk.Label(self.inv_summary_frame, text="No products found for the selected criteria.",
+                          font=('Arial', 12)).pack()
+                return
+
+            currency = DatabaseUtils.get_setting_value('currency', 'FCFA')
+
+            # Display summary
+            summary_text = f"Products: {summary['total_products']} | Low Stock: {summary['low_stock_count']} | Stock Value (Cost): {summary['total_stock_value']:,.0f} {currency} | Stock Value (Retail): {summary['total_retail_value']:,.0f} {currency}"
+            ttk.Label(self.inv_summary_frame, text=summary_text, font=('Arial', 12, 'bold')).pack()
+
+        # Clear summary
+        for widget in self.inv_summary_frame.winfo_children():
+            widget.destroy()
+
+        # Configure tags
+        self.inventory_tree.tag_configure('low_stock', background='#ffeeee', foreground='red')
+        self.run_report(run, self.inventory_tree, show_summary, "Failed to generate inventory report")
+
     def generate_performance_report(self):
         """Generate product performance report"""
         try:
-            from_date = datetime.strptime(self.perf_from_date.get(), "%Y-%m-%d")
-            to_date = datetime.strptime(self.perf_to_date.get(), "%Y-%m-%d")
-
-            # Convert to full day range
-            start_dt = from_date.replace(hour=0, minute=0, second=0, microsecond=0)
-            end_dt = to_date.replace(hour=23, minute=59, second=59, microsecond=999999)
-
-            sort_by = self.perf_sort_var.get()
-
-            session = db_manager.get_session()
-            try:
-                # Query sale items in date range with product info
-                from sqlalchemy import func
-
-                query = session.query(
-                    Product.id,
-                    Product.name,
-                    Category.name.label('category_name'),
-                    func.sum(SaleItem.quantity).label('total_quantity'),
-                    func.count(SaleItem.id).label('times_sold'),
-                    func.sum(SaleItem.total_price).label('total_revenue'),
-                    func.avg(SaleItem.unit_price).label('avg_price'),
-                    func.max(Sale.created_at).label('last_sold')
-                ).select_from(SaleItem)\
-                .join(Product, SaleItem.product_id == Product.id)\
-                .join(Sale, SaleItem.sale_id == Sale.id)\
-                .outerjoin(Category, Product.category_id == Category.id)\
-                .filter(
-                    Sale.created_at >= start_dt,
-                    Sale.created_at <= end_dt
-                ).group_by(Product.id, Product.name, Category.name)
-
-                # Apply sorting
-                if sort_by == "Quantity Sold":
-                    query = query.order_by(func.sum(SaleItem.quantity).desc())
-                elif sort_by == "Revenue":
-                    query = query.order_by(func.sum(SaleItem.total_price).desc())
-                elif sort_by == "Times Sold":
-                    query = query.order_by(func.count(SaleItem.id).desc())
-                else:  # Profit
-                    query = query.order_by(func.sum(SaleItem.total_price).desc())
-
-                results = query.all()
-
-                # Clear existing data
-                for item in self.performance_tree.get_children():
-                    self.performance_tree.delete(item)
-
-                if not results:
-                    messagebox.showinfo("No Data", "No sales found for the selected date range.")
-                    return
-
-                # Populate treeview
-                for rank, result in enumerate(results, 1):
-                    last_sold = result.last_sold.strftime('%Y-%m-%d') if result.last_sold else "N/A"
-
-                    values = (
-                        rank,
-                        result.name,
-                        result.category_name or "N/A",
-                        f"{result.total_quantity:,.1f}",
-                        result.times_sold,
-                        f"{result.total_revenue:,.0f}",
-                        f"{result.avg_price:,.0f}",
-                        last_sold
-                    )
-                    self.performance_tree.insert('', tk.END, values=values)
-
-            finally:
-                session.close()
-
+            from_date = datetime.strptime(self.perf_from_date.get(), "%Y-%m-%d").date()
+            to_date = datetime.strptime(self.perf_to_date.get(), "%Y-%m-%d").date()
         except ValueError:
             messagebox.showerror("Invalid Date", "Please enter valid dates in YYYY-MM-DD format.")
-        except Exception as e:
-            messagebox.showerror("Error", f"Failed to generate performance report: {e}")
-    
+            return
+
+        sort_by = self.perf_sort_var.get()
+
+        def run(job):
+            # Per product totals from the daily rollups
+            results = product_performance(job.session, from_date, to_date, sort_by)
+
+            rows = []
+            for rank, result in enumerate(results, 1):
+                last_sold = result.last_sold.strftime('%Y-%m-%d') if result.last_sold else "N/A"
+
+                values = (
+                    rank,
+                    result.name,
+                    result.category_name or "N/A",
+                    f"{result.total_quantity:,.1f}",
+                    result.times_sold,
+                    f"{result.total_revenue:,.0f}",
+                    f"{result.avg_price:,.0f}",
+                    last_sold
+                )
+                rows.append((result.id, values, ()))
+            job.emit_batches(rows)
+            return len(rows)
+
+        def show_result(count):
+            if not count:
+                messagebox.showinfo("No Data", "No sales found for the selected date range.")
+
+        self.run_report(run, self.performance_tree, show_result, "Failed to generate performance report")
+
     def generate_financial_summary(self):
         """Generate financial summary"""
         try:
@@ -700,95 +756,61 @@ class ReportsWindow:
             else:  # Custom
                 from_date = datetime.strptime(self.fin_from_date.get(), "%Y-%m-%d").date()
                 to_date = datetime.strptime(self.fin_to_date.get(), "%Y-%m-%d").date()
-
-            # Convert to full day range
-            start_dt = datetime.combine(from_date, datetime.min.time())
-            end_dt = datetime.combine(to_date, datetime.max.time())
-
-            session = db_manager.get_session()
-            try:
-                # Query sales in date range
-                sales = session.query(Sale).filter(
-                    Sale.created_at >= start_dt,
-                    Sale.created_at <= end_dt
-                ).all()
-                
-                if not sales:
-                    # Clear all labels
-                    self.total_sales_label.config(text="Total Sales: 0")
-                    self.total_revenue_label.config(text="Total Revenue: 0")
-                    self.avg_sale_label.config(text="Average Sale: 0")
-                    self.total_tax_label.config(text="Total Tax: 0")
-                    self.cash_sales_label.config(text="Cash Sales: 0")
-                    self.card_sales_label.config(text="Card Sales: 0")
-                    self.credit_sales_label.config(text="Credit Sales: 0")
-                    
-                    # Clear top products
-                    for item in self.top_products_tree.get_children():
-                        self.top_products_tree.delete(item)
-                    
-                    messagebox.showinfo("No Data", "No sales found for the selected period.")
-                    return
-                
-                # Calculate metrics
-                total_sales = len(sales)
-                total_revenue = sum(sale.total_amount for sale in sales)
-                total_tax = sum(sale.tax_amount for sale in sales)
-                avg_sale = total_revenue / total_sales if total_sales > 0 else 0
-                
-                # Payment method breakdown
-                cash_sales = sum(sale.total_amount for sale in sales if sale.payment_method == 'cash')
-                card_sales = sum(sale.total_amount for sale in sales if sale.payment_method == 'card')
-                credit_sales = sum(sale.total_amount for sale in sales if sale.payment_method == 'credit')
-                
-                currency = DatabaseUtils.get_setting_value('currency', 'FCFA')
-                
-                # Update labels
-                self.total_sales_label.config(text=f"Total Sales: {total_sales}")
-                self.total_revenue_label.config(text=f"Total Revenue: {total_revenue:,.0f} {currency}")
-                self.avg_sale_label.config(text=f"Average Sale: {avg_sale:,.0f} {currency}")
-                self.total_tax_label.config(text=f"Total Tax: {total_tax:,.0f} {currency}")
-                self.cash_sales_label.config(text=f"Cash Sales: {cash_sales:,.0f} {currency}")
-                self.card_sales_label.config(text=f"Card Sales: {card_sales:,.0f} {currency}")
-                self.credit_sales_label.config(text=f"Credit Sales: {credit_sales:,.0f} {currency}")
-                
-                # Get top 5 products
-                from sqlalchemy import func
-                
-                top_products = session.query(
-                    Product.name,
-                    func.sum(SaleItem.quantity).label('total_quantity'),
-                    func.sum(SaleItem.total_price).label('total_revenue')
-                ).select_from(SaleItem)\
-                .join(Product, SaleItem.product_id == Product.id)\
-                .join(Sale, SaleItem.sale_id == Sale.id)\
-                .filter(
-                    Sale.created_at >= start_dt,
-                    Sale.created_at <= end_dt
-                ).group_by(Product.id, Product.name)\
-                .order_by(func.sum(SaleItem.total_price).desc())\
-                .limit(5).all()
-                
-                # Clear and populate top products
-                for item in self.top_products_tree.get_children():
-                    self.top_products_tree.delete(item)
-                
-                for rank, product in enumerate(top_products, 1):
-                    values = (
-                        rank,
-                        product.name,
-                        f"{product.total_quantity:,.1f}",
-                        f"{product.total_revenue:,.0f}"
-                    )
-                    self.top_products_tree.insert('', tk.END, values=values)
-                
-            finally:
-                session.close()
-                
         except ValueError:
             messagebox.showerror("Invalid Date", "Please enter valid dates in YYYY-MM-DD format.")
-        except Exception as e:
-            messagebox.showerror("Error", f"Failed to generate financial summary: {e}")
+            return
+
+        def run(job):
+            # Period totals from the daily rollups
+            summary = sales_summary(job.session, from_date, to_date)
+            if summary['sale_count']:
+                # Top 5 products
+                top_products = product_performance(job.session, from_date, to_date, "Revenue", limit=5)
+                job.emit([
+                    (product.id, (rank, product.name, f"{product.total_quantity:,.1f}",
+                                  f"{product.total_revenue:,.0f}"), ())
+                    for rank, product in enumerate(top_products, 1)
+                ])
+            return summary
+
+        def show_summary(summary):
+            if not summary['sale_count']:
+                # Clear all labels
+                self.total_sales_label.config(text="Total Sales: 0")
+                self.total_revenue_label.config(text="Total Revenue: 0")
+                self.avg_sale_label.config(text="Average Sale: 0")
+                self.total_tax_label.config(text="Total Tax: 0")
+                self.cash_sales_label.config(text="Cash Sales: 0")
+                self.card_sales_label.config(text="Card Sales: 0")
+                self.credit_sales_label.config(text="Credit Sales: 0")
+
+                messagebox.showinfo("No Data", "No sales found for the selected period.")
+                return
+
+            # Calculate metrics
+            total_sales = summary['sale_count']
+            total_revenue = summary['total_amount']
+            total_tax = summary['tax_amount']
+            avg_sale = total_revenue / total_sales if total_sales > 0 else 0
+
+            # Payment method breakdown
+            by_method = summary['by_payment_method']
+            cash_sales = by_method.get('cash', 0)
+            card_sales = by_method.get('card', 0)
+            credit_sales = by_method.get('credit', 0)
+
+            currency = DatabaseUtils.get_setting_value('currency', 'FCFA')
+
+            # Update labels
+            self.total_sales_label.config(text=f"Total Sales: {total_sales}")
+            self.total_revenue_label.config(text=f"Total Revenue: {total_revenue:,.0f} {currency}")
+            self.avg_sale_label.config(text=f"Average Sale: {avg_sale:,.0f} {currency}")
+            self.total_tax_label.config(text=f"Total Tax: {total_tax:,.0f} {currency}")
+            self.cash_sales_label.config(text=f"Cash Sales: {cash_sales:,.0f} {currency}")
+            self.card_sales_label.config(text=f"Card Sales: {card_sales:,.0f} {currency}")
+            self.credit_sales_label.config(text=f"Credit Sales: {credit_sales:,.0f} {currency}")
+
+        self.run_report(run, self.top_products_tree, show_summary, "Failed to generate financial summary")
     
     # Export methods
     def export_sales_csv(self):
@@ -803,13 +825,21 @@ class ReportsWindow:
             if not filename:
                 return
             
+            # The tree only holds the first page; read every sale in the background
+            if self.sales_report_range:
+                from_dt, to_dt = self.sales_report_range
+                self.run_report(lambda job: self.write_sales_csv(job, filename, from_dt, to_dt),
+                                on_done=lambda count: messagebox.showinfo(
+                                    "Export Complete", f"Sales report exported to {filename}"),
+                                error_message="Failed to export sales report")
+                return
+            
             # Get current tree data
             with open(filename, 'w', newline='', encoding='utf-8') as csvfile:
                 writer = csv.writer(csvfile)
                 
                 # Write header
-                headers = ['Date', 'Receipt #', 'Customer', 'Items', 'Subtotal', 'Tax', 'Total', 'Payment']
-                writer.writerow(headers)
+                writer.writerow(SALES_CSV_HEADERS)
                 
                 # Write data
                 for child in self.sales_tree.get_children():
@@ -1,9 +1,11 @@
+import os
 import tkinter as tk
 from tkinter import ttk, messagebox
-from database.database import db_manager, DatabaseUtils
+from database.database import db_manager, DatabaseUtils, ENGINE_PROFILES, ENGINE_PROFILE_ENV
 from database.models import User
 from utils.auth import hash_password, get_current_user, verify_password
 from utils.i18n import translate as _
+from gui.diagnostics_window import DiagnosticsWindow
 
 
 class SettingsWindow:
@@ -61,9 +63,35 @@ class SettingsWindow:
         theme_combo = ttk.Combobox(pref_frame, textvariable=self.theme_var, values=['light', 'dark'], state='readonly')
         theme_combo.grid(row=1, column=1, sticky=(tk.W, tk.E), pady=5)
 
-        ttk.Button(pref_frame, text=_('save_preferences'), command=self.save_preferences).grid(row=2, column=0, columnspan=2, pady=10, sticky=(tk.W, tk.E))
+        ttk.Label(pref_frame, text=_('db_profile')).grid(row=2, column=0, sticky=tk.W)
+        engine_info = db_manager.get_engine_info()
+        self.db_profile_var = tk.StringVar(value=DatabaseUtils.get_setting_value('db_profile', engine_info['profile']))
+        profile_combo = ttk.Combobox(pref_frame, textvariable=self.db_profile_var, values=list(ENGINE_PROFILES), state='readonly')
+        profile_combo.grid(row=2, column=1, sticky=(tk.W, tk.E), pady=5)
+        # The environment variable wins over the setting, so editing it would do nothing
+        self.db_profile_override = os.environ.get(ENGINE_PROFILE_ENV)
+        if self.db_profile_override:
+            profile_combo.configure(state='disabled')
+
+        pragmas = ", ".join(f"{name}={value}" for name, value in engine_info['pragmas'].items())
+        active_text = f"{_('db_profile_active')}: {engine_info['profile']} ({engine_info['pool']}) {pragmas}"
+        if self.db_profile_override:
+            active_text += "\n" + _('db_profile_env_override').format(ENGINE_PROFILE_ENV, self.db_profile_override)
+        ttk.Label(pref_frame, text=active_text,
+                  wraplength=400).grid(row=3, column=0, columnspan=2, sticky=tk.W, pady=(0, 5))
+
+        ttk.Label(pref_frame, text=_('server_url')).grid(row=4, column=0, sticky=tk.W)
+        self.server_url_var = tk.StringVar(value=DatabaseUtils.get_setting_value('server_url', ''))
+        ttk.Entry(pref_frame, textvariable=self.server_url_var).grid(row=4, column=1, sticky=(tk.W, tk.E), pady=5)
+
+        ttk.Button(pref_frame, text=_('save_preferences'), command=self.save_preferences).grid(row=5, column=0, columnspan=2, pady=10, sticky=(tk.W, tk.E))
         pref_frame.columnconfigure(1, weight=1)
 
+        # Diagnostics tab
+        diagnostics_frame = ttk.Frame(notebook, padding=10)
+        notebook.add(diagnostics_frame, text=_('diagnostics'))
+        DiagnosticsWindow(diagnostics_frame)
+
     def add_user(self):
         username = self.username_var.get().strip()
         password = self.password_var.get()
@@ -219,8 +247,19 @@ class SettingsWindow:
     def save_preferences(self):
         DatabaseUtils.update_setting('language', self.lang_var.get())
         DatabaseUtils.update_setting('theme', self.theme_var.get())
+        profile_changed = False
+        if not self.db_profile_override:
+            profile_changed = self.db_profile_var.get() != db_manager.get_engine_info()['profile']
+            DatabaseUtils.update_setting('db_profile', self.db_profile_var.get())
+        server_url = self.server_url_var.get().strip()
+        server_changed = server_url != DatabaseUtils.get_setting_value('server_url', '')
+        DatabaseUtils.update_setting('server_url', server_url)
 
         messagebox.showinfo(_('settings'), _('preferences_saved'))
+        if profile_changed:
+            messagebox.showinfo(_('settings'), _('db_profile_restart'))
+        if server_changed:
+            messagebox.showinfo(_('settings'), _('server_url_restart'))
         # Notify root to reapply theme and language if possible
 
         try:
@@ -0,0 +1,92 @@
+# gui/tree_sync.py
+"""Keyed Treeview updates instead of deleting and re-inserting every row.
+
+Rows are (key, values, tags); the key (usually the record id) becomes the
+item id. A sync inserts new keys, updates the rows whose values or tags
+changed, deletes the keys that are gone and puts the items in order with
+one set_children() call. A refresh after one sale therefore touches one
+row, and the items that stay keep their selection, focus and scroll
+position.
+"""
+import tkinter as tk
+import weakref
+
+# tree -> {item id: (values, tags)} as last written, to skip unchanged rows
+# without asking Tk
+_written = weakref.WeakKeyDictionary()
+
+
+def _cache(tree):
+    cache = _written.get(tree)
+    if cache is None:
+        cache = _written[tree] = {}
+    return cache
+
+
+class TreeSync:
+    """One pass over all of a tree's rows, in display order; rows may come in batches"""
+
+    def __init__(self, tree):
+        self.tree = tree
+        self.existing = tree.get_children()
+        self.written = _cache(tree)
+        # Forget items removed without going through this module
+        for iid in set(self.written).difference(self.existing):
+            del self.written[iid]
+        self.order = []
+        self.seen = set()
+        self.changed = 0
+
+    def add(self, rows):
+        for key, values, tags in rows:
+            iid = str(key)
+            if iid in self.seen:
+                continue
+            self.seen.add(iid)
+            self.order.append(iid)
+            row = (tuple(values), tuple(tags))
+            if iid not in self.written and not self.tree.exists(iid):
+                self.tree.insert('', tk.END, iid=iid, values=row[0], tags=row[1])
+            elif self.written.get(iid) != row:
+                self.tree.item(iid, values=row[0], tags=row[1])
+            else:
+                continue
+            self.written[iid] = row
+            self.changed += 1
+
+    def finish(self):
+        """Delete the rows not added in this pass and fix the order; returns the rows touched"""
+        gone = [iid for iid in self.existing if iid not in self.seen]
+        if gone:
+            self.tree.delete(*gone)
+            for iid in gone:
+                self.written.pop(iid, None)
+        if self.tree.get_children() != tuple(self.order):
+            self.tree.set_children('', *self.order)
+        return self.changed + len(gone)
+
+
+def sync_tree(tree, rows):
+    """Make the tree show exactly ``rows``, touching only what changed"""
+    sync = TreeSync(tree)
+    sync.add(rows)
+    return sync.finish()
+
+
+def append_rows(tree, rows):
+    """Add rows after the current ones, e.g. the next page of a list"""
+    written = _cache(tree)
+    for key, values, tags in rows:
+        iid = str(key)
+        row = (tuple(values), tuple(tags))
+        if tree.exists(iid):
+            tree.item(iid, values=row[0], tags=row[1])
+            tree.move(iid, '', tk.END)
+        else:
+            tree.insert('', tk.END, iid=iid, values=row[0], tags=row[1])
+        written[iid] = row
+
+
+def clear_tree(tree):
+    tree.delete(*tree.get_children())
+    _written.pop(tree, None)
@@ -0,0 +1,143 @@
+# gui/virtual_tree.py
+"""Treeview that loads its rows a page at a time as it is scrolled.
+
+Rows come from a database.read_models.PagedQuery. Only the first page is read
+when the list is (re)loaded; the next one is fetched when fewer than
+PREFETCH_ROWS loaded rows are left below the view, so a table of any size
+opens as fast as its first page. Sorting (clicking a sortable heading) and
+filtering run in SQL and start again from the first page; refresh() re-reads
+the rows loaded so far and updates only those that changed (gui/tree_sync.py).
+"""
+from tkinter import ttk
+
+from database.database import db_manager
+from database.read_models import PAGE_SIZE
+from gui.tree_sync import append_rows, clear_tree, sync_tree
+
+PREFETCH_ROWS = PAGE_SIZE // 2
+SORT_ARROWS = {False: " ▲", True: " ▼"}
+
+
+class VirtualTree(ttk.Treeview):
+    """A ttk.Treeview filled from a PagedQuery.
+
+    ``render(row)`` turns a row into (values, tags); rows are keyed by their
+    ``id``. ``sortable`` maps heading columns to sort names of the PagedQuery.
+    Use set_yscrollcommand() instead of configuring yscrollcommand, which the
+    tree needs for itself.
+    """
+
+    def __init__(self, parent, source, render, sortable=None, page_size=PAGE_SIZE, **kwargs):
+        super().__init__(parent, **kwargs)
+        self.source = source
+        self.render = render
+        self.sortable = sortable or {}
+        self.page_size = page_size
+        self.sort = source.default_sort
+        self.descending = source.descending
+        self.criteria = None
+        self.started = False
+        self.loaded = 0
+        self._cursor = None
+        self._exhausted = True
+        self._fetch_job = None
+        self._scroll_command = None
+        self._titles = {}
+        self.configure(yscrollcommand=self._on_yscroll)
+
+    def set_yscrollcommand(self, command):
+        self._scroll_command = command
+
+    def heading(self, column, option=None, **kw):
+        # Sortable headings sort in SQL when clicked
+        if column in self.sortable and 'text' in kw:
+            self._titles[column] = kw['text']
+            kw.setdefault('command', lambda: self.sort_by(self.sortable[column]))
+        return super().heading(column, option, **kw)
+
+    def show(self, criteria=None):
+        """Update in place if the criteria are unchanged, else start again from the first page"""
+        if self.started and criteria == self.criteria:
+            self.refresh()
+        else:
+            self.reload(criteria)
+
+    def reload(self, criteria=None):
+        """Show the first page for new filter criteria"""
+        self.started = True
+        self.criteria = criteria
+        self._cancel_fetch()
+        clear_tree(self)
+        self.loaded = 0
+        self._cursor = None
+        self._exhausted = False
+        self._show_sort()
+        self.load_more()
+
+    def refresh(self):
+        """Re-read as many rows as are loaded and update only the changed ones"""
+        self._cancel_fetch()
+        limit = max(self.loaded, self.page_size)
+        session = db_manager.get_session()
+        try:
+            rows, self._cursor = self.source.page(session, self.sort, self.descending, None,
+                                                  self.criteria, limit)
+        finally:
+            session.close()
+        sync_tree(self, self._keyed(rows))
+        self.loaded = len(rows)
+        self._exhausted = len(rows) < limit
+
+    def sort_by(self, sort):
+        """Sort by a sort name; the current one again flips the direction"""
+        if sort == self.sort:
+            self.descending = not self.descending
+        else:
+            self.sort = sort
+            self.descending = False
+        self.reload(self.criteria)
+
+    def _keyed(self, rows):
+        return [(row.id,) + tuple(self.render(row)) for row in rows]
+
+    def load_more(self):
+        """Append the next page; returns the number of rows added"""
+        self._fetch_job = None
+        if self._exhausted:
+            return 0
+        session = db_manager.get_session()
+        try:
+            rows, self._cursor = self.source.page(session, self.sort, self.descending, self._cursor,
+                                                  self.criteria, self.page_size)
+        finally:
+            session.close()
+        append_rows(self, self._keyed(rows))
+        self.loaded += len(rows)
+        self._exhausted = len(rows) < self.page_size
+        return len(rows)
+
+    def _on_yscroll(self, first, last):
+        if self._scroll_command:
+            self._scroll_command(first, last)
+        if self._exhausted or self._fetch_job is not None:
+            return
+        if (1.0 - float(last)) * self.loaded < PREFETCH_ROWS:
+            self._fetch_job = self.after_idle(self._fetch)
+
+    def _fetch(self):
+        try:
+            self.load_more()
+        except Exception as e:
+            # Stop paging rather than retrying on every scroll
+            self._exhausted = True
+            print(f"⚠️  Could not load more rows: {e}")
+
+    def _cancel_fetch(self):
+        if self._fetch_job is not None:
+            self.after_cancel(self._fetch_job)
+            self._fetch_job = None
+
+    def _show_sort(self):
+        for column, title in self._titles.items():
+            arrow = SORT_ARROWS[self.descending] if self.sortable[column] == self.sort else ""
+            super().heading(column, text=title + arrow)
@@ -271,6 +271,7 @@ import tkinter as tk
 from tkinter import ttk, messagebox
 import sys
 import os
+import threading
 from datetime import datetime
 
 # Add current directory to path for both development and compiled versions
@@ -281,46 +282,21 @@ else:
     current_dir = os.path.dirname(os.path.abspath(__file__))
     sys.path.insert(0, current_dir)
 
-# Try different import methods
-try:
-    from database.database import init_database, db_manager, DatabaseUtils
-    from database.models import *
-    from gui.main_window import MainWindow
-    from gui.login_window import LoginWindow
-    from utils.auth import get_current_user
-except ImportError:
-    try:
-        import database.database as db_module
-        from database.database import init_database, db_manager, DatabaseUtils
-        from database.models import *
-        import gui.main_window as main_window_module
-        from gui.main_window import MainWindow
-        from gui.login_window import LoginWindow
-        from utils.auth import get_current_user
-    except ImportError:
-        subdirs = ['database', 'gui', 'utils']
-        for subdir in subdirs:
-            subdir_path = os.path.join(current_dir, subdir)
-            if os.path.exists(subdir_path):
-                sys.path.insert(0, subdir_path)
-        
-        try:
-            from database import init_database, db_manager, DatabaseUtils
-            from models import *
-            from main_window import MainWindow
-            from login_window import LoginWindow
-            from auth import get_current_user
-        except ImportError as e:
-            messagebox.showerror("Import Error", 
-                               f"Failed to import required modules: {e}\n"
-                               f"Current directory: {current_dir}")
-            sys.exit(1)
+# Only light modules here; the database, SQLAlchemy and the screens are
+# imported in the background or on first use (see ConstructionPOSApp)
+from utils.startup import startup_trace
+from utils.auth import get_current_user
+from gui.action_tracking import install_action_tracking
+
+DEFAULT_APP_NAME = 'Quincaillerie Fexson'
 
 class ConstructionPOSApp:
     def __init__(self):
-        self.root = tk.Tk()
-        app_name = DatabaseUtils.get_setting_value('shop_name', 'Quincaillerie Fexson')
-        self.root.title(app_name)
+        # Before the root exists, so every callback is wrapped
+        install_action_tracking()
+        with startup_trace.phase("tk root"):
+            self.root = tk.Tk()
+        self.root.title(DEFAULT_APP_NAME)
         self.root.geometry("1200x800")
         
         # Try to maximize window
@@ -332,8 +308,10 @@ class ConstructionPOSApp:
             except:
                 pass  # Mac or other systems
         
-        # Initialize database
-        self.init_database()
+        # Initialize database in the background while the user logs in
+        self.database_ready = threading.Event()
+        self.database_error = None
+        self.start_database_init()
 
         # Show login window before proceeding
         if not self.show_login():
@@ -341,26 +319,44 @@ class ConstructionPOSApp:
             self.root = None
             return
 
+        from database.database import DatabaseUtils
+        self.root.title(DatabaseUtils.get_setting_value('shop_name', DEFAULT_APP_NAME))
+
         # Setup modern theme
-        self.setup_modern_theme()
+        with startup_trace.phase("theme"):
+            self.setup_modern_theme()
 
         # Create main window
-        self.main_window = MainWindow(self.root)
+        with startup_trace.phase("main window"):
+            from gui.main_window import MainWindow
+            self.main_window = MainWindow(self.root)
         
         # Setup menu
         self.setup_menu()
 
+        # Scheduled backups run in the background
+        self.start_backups()
+        self.root.after_idle(self.finish_startup)
+
+    def finish_startup(self):
+        startup_trace.mark("main window shown")
+        startup_trace.report()
+
     def show_login(self) -> bool:
         """Display login window and return True if a user logged in."""
+        from gui.login_window import LoginWindow
         self.root.withdraw()
         login_win = tk.Toplevel(self.root)
-        login_app = LoginWindow(login_win)
+        login_app = LoginWindow(login_win, ready=self.database_ready)
+        login_win.after_idle(lambda: startup_trace.mark("login window shown"))
+        self.check_database_ready()
         self.root.wait_window(login_win)
         self.root.deiconify()
         return get_current_user() is not None
         
     def setup_modern_theme(self):
         """Setup modern professional theme"""
+        from database.database import DatabaseUtils
         style = ttk.Style()
         theme_setting = DatabaseUtils.get_setting_value('theme', 'light')
         try:
@@ -565,18 +561,37 @@ class ConstructionPOSApp:
                        font=('Segoe UI', 12, 'bold'), 
                        foreground=colors['success'])
     
+    def start_database_init(self):
+        """Import and initialize the database on a worker thread"""
+        worker = threading.Thread(target=self.init_database, name="database-init", daemon=True)
+        worker.start()
+
     def init_database(self):
         """Initialize database and add sample data if needed"""
         try:
-            init_database()
-            self.add_sample_data()
+            with startup_trace.phase("import database"):
+                from database.database import init_database
+            with startup_trace.phase("initialize database"):
+                init_database()
+            with startup_trace.phase("sample data"):
+                self.add_sample_data()
             print("Database initialized successfully!")
         except Exception as e:
-            messagebox.showerror("Database Error", f"Failed to initialize database: {e}")
+            self.database_error = e
             print(f"Database error: {e}")
+        finally:
+            self.database_ready.set()
+
+    def check_database_ready(self):
+        """Report a failed initialization once the worker is done; Tk calls stay on this thread"""
+        if not self.database_ready.is_set():
+            self.root.after(100, self.check_database_ready)
+        elif self.database_error is not None:
+            messagebox.showerror("Database Error", f"Failed to initialize database: {self.database_error}")
     
     def add_sample_data(self):
         """Add enhanced sample data for testing"""
+        from database.database import db_manager
         session = db_manager.get_session()
         try:
             from database.models import Category, Product, Customer
@@ -720,6 +735,8 @@ class ConstructionPOSApp:
         menubar.add_cascade(label="File", menu=file_menu)
         file_menu.add_command(label="🔄 Backup Database", command=self.backup_database)
         file_menu.add_command(label="📊 Export Data", command=self.export_data)
+        file_menu.add_command(label="♻️ Rebuild Report Totals", command=self.rebuild_rollups)
+        file_menu.add_command(label="🗄️ Archive Old Sales", command=self.archive_sales)
         file_menu.add_separator()
         file_menu.add_command(label="🚪 Exit", command=self.root.quit)
         
@@ -738,15 +755,80 @@ class ConstructionPOSApp:
         help_menu.add_separator()
         help_menu.add_command(label="ℹ️ About", command=self.show_about)
         
+    def start_backups(self):
+        """Start the backup scheduler, unless a sale server owns the database.
+
+        Tills sharing the database file all start it; the one holding the
+        backup lease takes the backups and the others stand by.
+        """
+        try:
+            from database.backend import get_backend
+            from utils.backup import backup_scheduler
+            if not get_backend().remote:
+                backup_scheduler.start()
+        except Exception as e:
+            print(f"⚠️  Scheduled backups not started: {e}")
+
     def backup_database(self):
-        """Create database backup"""
+        """Create database backup in the background so the till stays usable"""
+        result = {}
+
+        def work():
+            from database.database import db_manager
+            try:
+                result['path'] = db_manager.backup_database()
+            except Exception as e:
+                result['error'] = e
+
+        worker = threading.Thread(target=work, name="manual-backup", daemon=True)
+        worker.start()
+
+        def wait_for_backup():
+            if worker.is_alive():
+                self.root.after(200, wait_for_backup)
+            elif 'error' in result:
+                messagebox.showerror("❌ Backup Error", f"Failed to backup database:\n{result['error']}")
+            else:
+                messagebox.showinfo("✅ Backup Complete", 
+                                  f"Database successfully backed up to:\n{result['path']}")
+
+        wait_for_backup()
+    
+    def rebuild_rollups(self):
+        """Recompute the daily sales totals used by reports"""
+        if not messagebox.askyesno("♻️ Rebuild Report Totals",
+                                   "Recompute report totals from all recorded sales?\n"
+                                   "This can take a while on large databases."):
+            return
+        from database.database import db_manager
         try:
-            backup_path = db_manager.backup_database()
-            messagebox.showinfo("✅ Backup Complete", 
-                              f"Database successfully backed up to:\n{backup_path}")
+            days = db_manager.rebuild_rollups()
+            messagebox.showinfo("✅ Rebuild Complete", f"Report totals rebuilt for {days} day(s).")
         except Exception as e:
-            messagebox.showerror("❌ Backup Error", f"Failed to backup database:\n{e}")
+            messagebox.showerror("❌ Rebuild Error", f"Failed to rebuild report totals:\n{e}")
     
+    def archive_sales(self):
+        """Move the sales of a closed year into its own archive file"""
+        from tkinter import simpledialog
+        from database.archive import archivable_years, archive_year
+        try:
+            years = archivable_years()
+            if not years:
+                messagebox.showinfo("🗄️ Archive Old Sales", "There are no sales from previous years to archive.")
+                return
+            year = simpledialog.askinteger(
+                "🗄️ Archive Old Sales",
+                f"Years that can be archived: {', '.join(str(y) for y in years)}\n\n"
+                "Archive which year?\n(Reports still include archived years.)",
+                initialvalue=years[0], parent=self.root)
+            if year is None:
+                return
+            result = archive_year(year, vacuum=True)
+            messagebox.showinfo("✅ Archive Complete",
+                              f"{result['sale_count']} sale(s) of {year} moved to:\n{result['file_name']}")
+        except Exception as e:
+            messagebox.showerror("❌ Archive Error", f"Failed to archive sales:\n{e}")
+
     def export_data(self):
         """Export data functionality"""
         messagebox.showinfo("📊 Export Data", 
@@ -900,6 +982,16 @@ for construction material shops and hardware stores.
             messagebox.showerror("Application Error", f"An error occurred: {e}")
 
 if __name__ == "__main__":
+    if "--startup-trace" in sys.argv:
+        sys.argv.remove("--startup-trace")
+        startup_trace.enabled = True
+    if "--server" in sys.argv:
+        # Serve other tills instead of opening the GUI (see server/app.py)
+        from server.__main__ import main as run_sale_server
+        sys.argv.remove("--server")
+        run_sale_server()
+        sys.exit(0)
+    startup_trace.mark("python imports")
     try:
         app = ConstructionPOSApp()
         app.run()
@@ -0,0 +1,2 @@
+# server/__init__.py
+"""Local sale server shared by several tills"""
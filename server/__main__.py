@@ -0,0 +1,17 @@
+# server/__main__.py
+"""python -m server [--host HOST] [--port PORT]"""
+import argparse
+
+from .app import DEFAULT_HOST, DEFAULT_PORT, run_server
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Construction POS sale server")
+    parser.add_argument("--host", default=DEFAULT_HOST, help=f"Address to listen on (default {DEFAULT_HOST})")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT, help=f"Port to listen on (default {DEFAULT_PORT})")
+    args = parser.parse_args()
+    run_server(args.host, args.port)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,398 @@
+# server/app.py
+"""Asyncio JSON server in front of the POS database.
+
+Several tills on the local network point at one server instead of opening the
+database file themselves. Reads (product lookups, pricing, reports) run in a
+small thread pool. Writes (sales, stock movements) are queued and applied by a
+single writer thread: whatever arrived within BATCH_WINDOW seconds is applied
+in one BEGIN IMMEDIATE transaction, each request in its own savepoint so one
+failed sale does not undo the others, and committed once. Only the standard
+library is used; the protocol is plain HTTP/1.1 with JSON bodies.
+
+Set POS_SERVER_TOKEN on the server and the tills to require a shared token.
+"""
+import asyncio
+import hmac
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime
+from urllib.parse import parse_qs, urlsplit
+
+from database.backend import LocalBackend, sale_to_dict
+from database.catalog import product_catalog
+from database.database import apply_batch, create_writer_session_factory, db_manager, db_path, init_database
+from database.models import Product
+from database.sales import (journal_sale_operation, journal_sale_results, record_sale_once, resolve_user,
+                            sale_summary)
+from database.stock import InsufficientStockError, StockConflictError, record_stock_movement
+from utils.backup import backup_scheduler
+
+DEFAULT_HOST = "0.0.0.0"
+DEFAULT_PORT = 8765
+
+# Writes arriving within BATCH_WINDOW seconds share one transaction
+BATCH_WINDOW = 0.005
+BATCH_SIZE = 50
+READ_WORKERS = 4
+MAX_BODY = 1024 * 1024
+
+TOKEN_HEADER = "x-pos-token"
+
+_REASONS = {200: "OK", 400: "Bad Request", 401: "Unauthorized", 404: "Not Found",
+            405: "Method Not Allowed", 409: "Conflict", 413: "Payload Too Large",
+            431: "Request Header Fields Too Large", 500: "Internal Server Error"}
+
+
+class HTTPError(Exception):
+    def __init__(self, status, message):
+        self.status = status
+        super().__init__(message)
+
+
+def _json_default(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+
+def _parse_day(value, name):
+    try:
+        return date.fromisoformat(value)
+    except (TypeError, ValueError):
+        raise HTTPError(400, f"'{name}' must be a date (YYYY-MM-DD)")
+
+
+def _int_param(params, name, default=None):
+    value = params.get(name)
+    if value in (None, ""):
+        if default is None:
+            raise HTTPError(400, f"Missing '{name}'")
+        return default
+    try:
+        return int(value)
+    except ValueError:
+        raise HTTPError(400, f"'{name}' must be an integer")
+
+
+class SaleWriter:
+    """Applies queued write operations in batches on one thread"""
+
+    def __init__(self, session_factory, batch_window=BATCH_WINDOW, batch_size=BATCH_SIZE):
+        self.session_factory = session_factory
+        self.batch_window = batch_window
+        self.batch_size = batch_size
+        self.queue = asyncio.Queue()
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="pos-writer")
+
+    async def submit(self, operation):
+        """Queue operation(session) and wait for its committed result"""
+        future = asyncio.get_running_loop().create_future()
+        await self.queue.put((operation, future))
+        return await future
+
+    async def run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self.queue.get()]
+            deadline = loop.time() + self.batch_window
+            while len(batch) < self.batch_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self.queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+
+            results = await loop.run_in_executor(self.executor, self.apply, [op for op, _ in batch])
+            for (_, future), (ok, value) in zip(batch, results):
+                if future.done():
+                    continue
+                if ok:
+                    future.set_result(value)
+                else:
+                    future.set_exception(value)
+
+    def apply(self, operations):
+        return apply_batch(self.session_factory, operations)
+
+    def shutdown(self):
+        self.executor.shutdown(wait=True)
+
+
+def _product_exists(session, product_id):
+    return session.query(Product.id).filter(Product.id == product_id).first() is not None
+
+
+class SaleServer:
+    """Routes HTTP requests to the local backend and the batched writer"""
+
+    def __init__(self, writer, token=None):
+        self.writer = writer
+        self.token = token
+        self.backend = LocalBackend()
+        self.readers = ThreadPoolExecutor(max_workers=READ_WORKERS, thread_name_prefix="pos-reader")
+        self.routes = {
+            ("GET", "/health"): self.health,
+            ("GET", "/categories"): self.categories,
+            ("GET", "/customers"): self.customers,
+            ("GET", "/products"): self.search_products,
+            ("GET", "/products/get"): self.product,
+            ("GET", "/products/barcode"): self.lookup_barcode,
+            ("POST", "/cart/price"): self.price_cart,
+            ("POST", "/sales"): self.commit_sale,
+            ("POST", "/sales/batch"): self.commit_sales,
+            ("GET", "/sales/get"): self.get_sale,
+            ("POST", "/stock/movements"): self.record_stock_movement,
+            ("GET", "/reports/dashboard"): self.dashboard,
+            ("GET", "/reports/summary"): self.sales_summary,
+            ("GET", "/reports/products"): self.product_performance,
+        }
+
+    async def read(self, function, *args):
+        return await asyncio.get_running_loop().run_in_executor(self.readers, function, *args)
+
+    # Endpoints
+
+    async def health(self, params, body):
+        return {'status': "ok", 'pending_writes': self.writer.queue.qsize()}
+
+    async def categories(self, params, body):
+        return await self.read(self.backend.categories)
+
+    async def customers(self, params, body):
+        return await self.read(self.backend.customers)
+
+    async def search_products(self, params, body):
+        limit = _int_param(params, 'limit', 0) or None
+        return await self.read(self.backend.search_products, params.get('search', ""),
+                               params.get('category') or None, limit)
+
+    async def product(self, params, body):
+        product = await self.read(self.backend.product, _int_param(params, 'id'))
+        if product is None:
+            raise HTTPError(404, "Product not found.")
+        return product
+
+    async def lookup_barcode(self, params, body):
+        return await self.read(self.backend.lookup_barcode, params.get('code', ""))
+
+    async def price_cart(self, params, body):
+        return await self.read(self.backend.price_cart, body.get('items') or [],
+                               float(body.get('tax_rate') or 0.0))
+
+    async def commit_sale(self, params, body):
+        cart_items = body.get('cart_items') or []
+        options = {
+            'payment_method': body.get('payment_method', "cash"),
+            'amount_paid': float(body.get('amount_paid') or 0.0),
+            'tax_rate': float(body.get('tax_rate') or 0.0),
+            'customer_id': body.get('customer_id'),
+            'customer_name': body.get('customer_name'),
+            'idempotency_key': body.get('idempotency_key'),
+        }
+        if body.get('created_at'):
+            options['created_at'] = datetime.fromisoformat(body['created_at'])
+
+        def operation(session):
+            sale = record_sale_once(session, cart_items, user=resolve_user(session, body.get('username')), **options)
+            session.flush()
+            return sale_summary(sale)
+
+        result = await self.writer.submit(operation)
+        await self.read(product_catalog.refresh, [int(item['product_id']) for item in cart_items])
+        return result
+
+    async def commit_sales(self, params, body):
+        """Replay a batch of journalled sales from a till"""
+        entries = body.get('sales') or []
+        results = await asyncio.gather(
+            *(self.writer.submit(journal_sale_operation(entry)) for entry in entries),
+            return_exceptions=True,
+        )
+        await self.read(product_catalog.refresh,
+                        [int(item['product_id']) for entry in entries for item in entry['cart_items']])
+        return journal_sale_results(entries, [
+            (False, result) if isinstance(result, Exception) else (True, result) for result in results
+        ])
+
+    async def get_sale(self, params, body):
+        sale = await self.read(self.backend.get_sale, _int_param(params, 'id'))
+        if sale is None:
+            raise HTTPError(404, "Sale not found.")
+        return sale_to_dict(sale)
+
+    async def record_stock_movement(self, params, body):
+        product_id = int(body['product_id'])
+        movement_type = body.get('movement_type')
+        if movement_type not in ("in", "out"):
+            raise HTTPError(400, "movement_type must be 'in' or 'out'")
+        quantity = float(body['quantity'])
+
+        def operation(session):
+            if not _product_exists(session, product_id):
+                raise ValueError("Product not found.")
+            user = resolve_user(session, body.get('username'))
+            record_stock_movement(session, product_id, movement_type, quantity, body.get('notes'),
+                                  created_by=user.username if user else "System",
+                                  clamp=bool(body.get('clamp')))
+            return {'product_id': product_id}
+
+        result = await self.writer.submit(operation)
+        await self.read(product_catalog.refresh, [product_id])
+        return result
+
+    async def dashboard(self, params, body):
+        return await self.read(self.backend.dashboard)
+
+    async def sales_summary(self, params, body):
+        return await self.read(self.backend.sales_summary, _parse_day(params.get('from'), 'from'),
+                               _parse_day(params.get('to'), 'to'))
+
+    async def product_performance(self, params, body):
+        limit = _int_param(params, 'limit', 0) or None
+        return await self.read(self.backend.product_performance, _parse_day(params.get('from'), 'from'),
+                               _parse_day(params.get('to'), 'to'), params.get('sort', "Revenue"), limit)
+
+    # HTTP plumbing
+
+    async def dispatch(self, method, target, headers, raw_body):
+        """Return (status, payload) for one request"""
+        url = urlsplit(target)
+        if self.token and not hmac.compare_digest(headers.get(TOKEN_HEADER, ""), self.token):
+            return 401, {'error': "unauthorized", 'message': "Missing or wrong server token"}
+        handler = self.routes.get((method, url.path))
+        if handler is None:
+            if any(path == url.path for _, path in self.routes):
+                return 405, {'error': "method_not_allowed", 'message': f"{method} not allowed on {url.path}"}
+            return 404, {'error': "not_found", 'message': f"No endpoint {url.path}"}
+
+        try:
+            params = {key: values[0] for key, values in parse_qs(url.query).items()}
+            body = json.loads(raw_body) if raw_body else {}
+            if not isinstance(body, dict):
+                raise HTTPError(400, "Request body must be a JSON object")
+            return 200, await handler(params, body)
+        except HTTPError as e:
+            return e.status, {'error': "bad_request" if e.status == 400 else "not_found", 'message': str(e)}
+        except InsufficientStockError as e:
+            return 409, {'error': "insufficient_stock", 'message': str(e),
+                         'shortages': [list(shortage) for shortage in e.shortages]}
+        except StockConflictError as e:
+            return 409, {'error': "stock_conflict", 'message': str(e), 'product_id': e.product_id}
+        except (ValueError, KeyError, TypeError) as e:
+            return 400, {'error': "bad_request", 'message': str(e)}
+        except Exception as e:
+            print(f"❌ Sale server error on {method} {url.path}: {e}")
+            return 500, {'error': "server_error", 'message': str(e)}
+
+    @staticmethod
+    async def read_head(reader):
+        """The method, target and headers of the next request, or None when the client is done.
+
+        Raises ValueError for a line longer than the stream's limit.
+        """
+        request_line = await reader.readline()
+        if not request_line.strip():
+            return None
+        try:
+            method, target, _ = request_line.decode("latin-1").split(" ", 2)
+        except ValueError:
+            return None
+
+        headers = {}
+        while True:
+            line = await reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+        return method, target, headers
+
+    async def handle_connection(self, reader, writer):
+        try:
+            while True:
+                try:
+                    head = await self.read_head(reader)
+                except ValueError:
+                    # readline() gives up on a line over the stream limit, and
+                    # the rest of it is still unread, so the connection ends here
+                    head = None
+                    await self.respond(writer, 431, {'error': "too_large",
+                                                     'message': "Request line or header too long"}, False)
+                if head is None:
+                    break
+                method, target, headers = head
+
+                try:
+                    length = int(headers.get("content-length") or 0)
+                except ValueError:
+                    length = -1
+                if length < 0:
+                    # The body cannot be told apart from the next request
+                    status, payload = 400, {'error': "bad_request", 'message': "Invalid Content-Length"}
+                    keep_alive = False
+                elif length > MAX_BODY:
+                    status, payload = 413, {'error': "too_large", 'message': "Request body too large"}
+                    keep_alive = False
+                else:
+                    raw_body = await reader.readexactly(length) if length else b""
+                    status, payload = await self.dispatch(method.upper(), target, headers, raw_body)
+                    keep_alive = headers.get("connection", "").lower() != "close"
+
+                await self.respond(writer, status, payload, keep_alive)
+                if not keep_alive:
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    @staticmethod
+    async def respond(writer, status, payload, keep_alive):
+        data = json.dumps(payload, default=_json_default).encode("utf-8")
+        writer.write(
+            f"HTTP/1.1 {status} {_REASONS.get(status, '')}\r\n"
+            "Content-Type: application/json; charset=utf-8\r\n"
+            f"Content-Length: {len(data)}\r\n"
+            f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n".encode("latin-1") + data
+        )
+        await writer.drain()
+
+    def shutdown(self):
+        self.readers.shutdown(wait=False)
+
+
+async def serve(host=DEFAULT_HOST, port=DEFAULT_PORT, token=None, ready=None):
+    """Run the server until cancelled; ``ready`` (a threading.Event) is set once listening"""
+    writer = SaleWriter(create_writer_session_factory(db_path, db_manager.engine_profile))
+    server = SaleServer(writer, token=token)
+    writer_task = asyncio.create_task(writer.run())
+    listener = await asyncio.start_server(server.handle_connection, host, port)
+    print(f"✅ Sale server listening on http://{host}:{port} (database: {db_path})")
+    if not token:
+        print("⚠️  No POS_SERVER_TOKEN set, any machine on the network can use the server")
+    if ready is not None:
+        ready.set()
+    try:
+        async with listener:
+            await listener.serve_forever()
+    finally:
+        writer_task.cancel()
+        writer.shutdown()
+        server.shutdown()
+
+
+def run_server(host=DEFAULT_HOST, port=DEFAULT_PORT):
+    """Migrate the database and serve until interrupted"""
+    if not init_database():
+        print("❌ Database could not be initialised, the sale server was not started")
+        return
+    product_catalog.load()
+    # The server owns the database, so it also takes the backups
+    backup_scheduler.start()
+    try:
+        asyncio.run(serve(host, port, token=os.environ.get("POS_SERVER_TOKEN") or None))
+    except KeyboardInterrupt:
+        print("👋 Sale server stopped")
@@ -0,0 +1,142 @@
+# server/client.py
+"""Till side of the sale server: the LocalBackend methods over HTTP"""
+import json
+import os
+from datetime import datetime
+from types import SimpleNamespace
+from urllib.error import HTTPError, URLError
+from urllib.parse import urlencode
+from urllib.request import Request, urlopen
+
+from database.backend import BackendUnavailableError
+from database.stock import InsufficientStockError, StockConflictError
+
+DEFAULT_TIMEOUT = 10
+
+
+class SaleServerError(Exception):
+    """Raised when the sale server rejects a request"""
+
+
+def _json_default(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+
+def _namespace(value):
+    """Turn decoded JSON into attribute access objects, as the receipt code expects"""
+    if isinstance(value, dict):
+        return SimpleNamespace(**{key: _namespace(item) for key, item in value.items()})
+    if isinstance(value, list):
+        return [_namespace(item) for item in value]
+    return value
+
+
+class SaleServerClient:
+    """Sends backend calls to a sale server"""
+
+    remote = True
+
+    def __init__(self, base_url, timeout=DEFAULT_TIMEOUT, token=None):
+        if "://" not in base_url:
+            base_url = f"http://{base_url}"
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+        self.token = token if token is not None else os.environ.get("POS_SERVER_TOKEN")
+
+    def _request(self, method, path, params=None, body=None):
+        url = self.base_url + path
+        if params:
+            url += "?" + urlencode({key: value for key, value in params.items() if value is not None})
+        data = json.dumps(body, default=_json_default).encode("utf-8") if body is not None else None
+        request = Request(url, data=data, method=method)
+        request.add_header("Accept", "application/json")
+        if data is not None:
+            request.add_header("Content-Type", "application/json")
+        if self.token:
+            request.add_header("X-POS-Token", self.token)
+
+        try:
+            with urlopen(request, timeout=self.timeout) as response:
+                return json.loads(response.read().decode("utf-8"))
+        except HTTPError as e:
+            try:
+                error = json.loads(e.read().decode("utf-8"))
+            except ValueError:
+                error = {'message': e.reason}
+            if error.get('error') == "insufficient_stock":
+                raise InsufficientStockError([tuple(shortage) for shortage in error['shortages']])
+            if error.get('error') == "stock_conflict":
+                raise StockConflictError(error.get('product_id'))
+            if e.code == 404 and method == "GET":
+                return None
+            if e.code >= 500:
+                raise BackendUnavailableError(error.get('message') or f"HTTP {e.code}")
+            raise SaleServerError(error.get('message') or f"HTTP {e.code}")
+        except URLError as e:
+            raise BackendUnavailableError(f"Sale server unreachable at {self.base_url}: {e.reason}")
+        except OSError as e:
+            # Timeouts and dropped connections while reading the response
+            raise BackendUnavailableError(f"Sale server unreachable at {self.base_url}: {e}")
+
+    def health(self):
+        return self._request("GET", "/health")
+
+    def categories(self):
+        return self._request("GET", "/categories")
+
+    def customers(self):
+        return self._request("GET", "/customers")
+
+    def search_products(self, search_term="", category=None, limit=None):
+        return self._request("GET", "/products", {'search': search_term, 'category': category, 'limit': limit})
+
+    def product(self, product_id):
+        return self._request("GET", "/products/get", {'id': product_id})
+
+    def lookup_barcode(self, code):
+        return self._request("GET", "/products/barcode", {'code': code})
+
+    def refresh_catalog(self, product_ids=None):
+        # The server keeps its own index up to date
+        pass
+
+    def price_cart(self, items, tax_rate=0.0):
+        return self._request("POST", "/cart/price", body={'items': items, 'tax_rate': tax_rate})
+
+    def commit_sale(self, cart_items, user=None, **kwargs):
+        body = dict(kwargs, cart_items=cart_items, username=user.username if user else None)
+        return self._request("POST", "/sales", body=body)
+
+    def commit_sales(self, entries):
+        return self._request("POST", "/sales/batch", body={'sales': entries})
+
+    def record_stock_movement(self, product_id, movement_type, quantity, notes=None, clamp=False,
+                              created_by="System"):
+        self._request("POST", "/stock/movements", body={
+            'product_id': product_id,
+            'movement_type': movement_type,
+            'quantity': quantity,
+            'notes': notes,
+            'clamp': clamp,
+            'username': created_by,
+        })
+
+    def get_sale(self, sale_id):
+        sale = self._request("GET", "/sales/get", {'id': sale_id})
+        if sale is None:
+            return None
+        sale['created_at'] = datetime.fromisoformat(sale['created_at'])
+        return _namespace(sale)
+
+    def dashboard(self):
+        return self._request("GET", "/reports/dashboard")
+
+    def sales_summary(self, from_day, to_day):
+        return self._request("GET", "/reports/summary", {'from': from_day.isoformat(), 'to': to_day.isoformat()})
+
+    def product_performance(self, from_day, to_day, sort_by="Revenue", limit=None):
+        return self._request("GET", "/reports/products", {
+            'from': from_day.isoformat(), 'to': to_day.isoformat(), 'sort': sort_by, 'limit': limit,
+        })
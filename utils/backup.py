@@ -1,14 +1,619 @@
 
+# utils/backup.py
+"""Online backups of the live database.
+
+Backups use SQLite's online backup API rather than copying the file, so a
+copy never holds half of a transaction. The pages are copied a few hundred at
+a time with a short pause in between, which keeps the tills selling while a
+large database is copied. Each copy must pass PRAGMA integrity_check before it
+is gzipped into the backup folder, and apply_retention() then thins out old
+backups. Yearly archive files (see database/archive.py) are copied only when
+they changed since their last backup.
+
+Between backups, every committed change is captured in the database's
+change log (see database/changelog.py) and shipped by ship_changes() to
+``changes/changes_<day>.jsonl`` in the backup folder. restore_to() replays
+that journal onto a backup up to a chosen time, so a restore loses minutes
+rather than the day since the last backup. Only the process holding the
+lease in ``backup_lease`` ships, so the journal has a single writer even
+when several tills share the database; those must also share the backup
+folder (the ``backup_dir`` setting).
+
+BackupScheduler ships changes every SHIP_INTERVAL and runs create_backup()
+every ``backup_interval_hours`` (0 turns backups off) in a background thread,
+in the lease holder only.
+
+    python -m utils.backup [--dir DIR]
+    python -m utils.backup --list
+    python -m utils.backup --verify FILE
+    python -m utils.backup --restore [--until "2024-05-02 14:30"] [--from FILE] [--output FILE]
+"""
+import gzip
+import json
 import os
-from datetime import datetime
+import re
+import shutil
+import socket
+import sqlite3
+import threading
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import create_engine
+
+from database.archive import get_archive_dir
+from database.changelog import (apply_change, captured_tables, delete_changes, install_change_capture, last_seq,
+                                read_changes, remove_change_capture, set_last_seq)
+from database.database import DatabaseUtils, db_manager, db_path, get_app_dir
+from database.migrations import run_migrations
+from database.models import Base
+from database.rollups import rebuild_statements
+
+BACKUP_DIR_NAME = "backups"
+BACKUP_FILE_PATTERN = "construction_pos_{timestamp}.db.gz"
+# Microseconds, so two backups in the same second (a manual one during a
+# scheduled one) do not overwrite each other
+TIMESTAMP_FORMAT = "%Y%m%d_%H%M%S_%f"
+# Backups named before microseconds were added
+_OLD_TIMESTAMP_FORMAT = "%Y%m%d_%H%M%S"
+_BACKUP_FILE_RE = re.compile(r"^construction_pos_(\d{8}_\d{6}(?:_\d{6})?)\.db(\.gz)?$")
+CHANGES_DIR_NAME = "changes"
+CHANGES_FILE_PATTERN = "changes_{day}.jsonl"
+_CHANGES_FILE_RE = re.compile(r"^changes_(\d{8})\.jsonl$")
+
+PAGES_PER_STEP = 256   # 1 MB per step with 4 KB pages
+STEP_PAUSE = 0.01      # seconds between steps, so the tills get the disk in between
+# Without WAL, a write from another connection restarts the copy; after this
+# many restarts the rest is copied in one step instead
+MAX_RESTARTS = 20
+CHUNK_SIZE = 1024 * 1024
+COMPRESS_LEVEL = 6
+
+# Retention: the newest KEEP_LAST backups, plus the newest backup of each of
+# the last KEEP_DAILY days, KEEP_WEEKLY weeks and KEEP_MONTHLY months
+KEEP_LAST = 3
+KEEP_DAILY = 7
+KEEP_WEEKLY = 4
+KEEP_MONTHLY = 12
+
+DEFAULT_INTERVAL_HOURS = 24
+STARTUP_DELAY = 60        # seconds before the scheduler's first check
+CHECK_INTERVAL = 15 * 60  # seconds between checks
+STALE_PARTIAL_AGE = 24 * 3600
+SHIP_INTERVAL = 30        # seconds between change journal shipments
+SHIP_BATCH_SIZE = 5000
+# The journal has one writer: the process holding the lease in the database.
+# Another till takes over once the holder has not renewed it for this long
+LEASE_SECONDS = 10 * 60
+# Held this long while a backup runs, as a large copy may outlast LEASE_SECONDS
+BACKUP_LEASE_SECONDS = 3 * 60 * 60
+LEASE_OWNER = f"{socket.gethostname()}:{os.getpid()}"
+
+_backup_lock = threading.Lock()
+
+
+class BackupError(Exception):
+    """Raised when a backup copy is not usable"""
+
+
+class _TooBusy(Exception):
+    pass
+
+
+def get_configured_backup_dir():
+    """The backup_dir setting, or '' when backups go next to the program"""
+    return (DatabaseUtils.get_setting_value('backup_dir', '') or "").strip()
+
+
+def get_backup_dir():
+    return get_configured_backup_dir() or os.path.join(get_app_dir(), BACKUP_DIR_NAME)
+
+
+def journal_location_problem():
+    """Why this process must not ship the change journal, or None.
+
+    Tills sharing a database file must share the backup folder too, or the
+    journal would be split between their local folders whenever the lease
+    changes hands, and a restore stops at the first missing change.
+    """
+    if db_manager.engine_profile == "network" and not get_configured_backup_dir():
+        return "the database is shared ('network' profile) but no shared backup folder (backup_dir) is set"
+    return None
+
+
+def hold_backup_lease(owner=LEASE_OWNER, duration=LEASE_SECONDS):
+    """Take or renew the database's backup lease. Returns True while this owner holds it."""
+    connection = sqlite3.connect(db_path, timeout=30, isolation_level=None)
+    try:
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            row = connection.execute("SELECT owner, expires_at FROM backup_lease WHERE id = 1").fetchone()
+            now = time.time()
+            held = row is None or row[0] == owner or row[1] < now
+            if held:
+                connection.execute("INSERT OR REPLACE INTO backup_lease (id, owner, expires_at) VALUES (1, ?, ?)",
+                                   (owner, now + duration))
+            connection.execute("COMMIT")
+        except Exception:
+            connection.execute("ROLLBACK")
+            raise
+        return held
+    finally:
+        connection.close()
+
+
+def copy_database(source_path, target_path, pages=PAGES_PER_STEP, pause=STEP_PAUSE):
+    """Copy a live database with the online backup API. Returns the page count."""
+    source = sqlite3.connect(source_path, timeout=30, isolation_level=None)
+    target = sqlite3.connect(target_path, isolation_level=None)
+    try:
+        wal = source.execute("PRAGMA journal_mode").fetchone()[0].lower() == "wal"
+        if wal:
+            # Pin one snapshot for the whole copy. WAL readers do not block
+            # writers, and a pinned snapshot never makes the copy restart.
+            source.execute("BEGIN")
+            source.execute("SELECT COUNT(*) FROM sqlite_master").fetchone()
+
+        state = {'remaining': None, 'restarts': 0}
+
+        def progress(status, remaining, total):
+            if state['remaining'] is not None and remaining >= state['remaining']:
+                state['restarts'] += 1
+                if state['restarts'] > MAX_RESTARTS:
+                    raise _TooBusy()
+            state['remaining'] = remaining
+            if remaining:
+                time.sleep(pause)
+
+        try:
+            source.backup(target, pages=pages, progress=progress, sleep=pause)
+        except _TooBusy:
+            print(f"⚠️  Database too busy to copy in steps, copying {os.path.basename(source_path)} in one go")
+            source.backup(target, pages=-1, sleep=pause)
+        if wal:
+            source.execute("COMMIT")
+        # A standalone file, not a WAL database that needs its -wal next to it
+        target.execute("PRAGMA journal_mode=DELETE")
+        return target.execute("PRAGMA page_count").fetchone()[0]
+    finally:
+        target.close()
+        source.close()
+
+
+def check_database(path, quick=False):
+    """Problems reported by PRAGMA integrity_check; an empty list means the file is sound"""
+    connection = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+    try:
+        pragma = "quick_check" if quick else "integrity_check"
+        rows = [row[0] for row in connection.execute(f"PRAGMA {pragma}")]
+    finally:
+        connection.close()
+    return [] if rows == ["ok"] else rows
+
+
+def compress_file(source_path, target_path):
+    """Gzip a file into target_path, which only appears once it is complete"""
+    partial = target_path + ".partial"
+    with open(source_path, "rb") as source, open(partial, "wb") as raw:
+        with gzip.GzipFile(filename=os.path.basename(source_path), mode="wb",
+                           compresslevel=COMPRESS_LEVEL, fileobj=raw) as target:
+            shutil.copyfileobj(source, target, CHUNK_SIZE)
+        raw.flush()
+        os.fsync(raw.fileno())
+    os.replace(partial, target_path)
+
+
+def write_backup(target_path, source_path=None):
+    """Copy, check and (for a .gz target) compress a database into target_path"""
+    source_path = source_path or db_path
+    copy_path = (target_path[:-len(".gz")] if target_path.endswith(".gz") else target_path) + ".partial"
+    try:
+        pages = copy_database(source_path, copy_path)
+        problems = check_database(copy_path)
+        if problems:
+            raise BackupError(f"Backup of {source_path} failed the integrity check: {problems[0]}")
+        if target_path.endswith(".gz"):
+            compress_file(copy_path, target_path)
+        else:
+            os.replace(copy_path, target_path)
+    finally:
+        if os.path.exists(copy_path):
+            os.remove(copy_path)
+    return pages
+
+
+def verify_backup(path):
+    """Decompress a backup next to itself and run integrity_check on it. Returns the problems."""
+    if not path.endswith(".gz"):
+        return check_database(path)
+    copy_path = path[:-len(".gz")] + ".verify"
+    try:
+        _extract_backup(path, copy_path)
+        return check_database(copy_path)
+    finally:
+        if os.path.exists(copy_path):
+            os.remove(copy_path)
+
+
+def list_backups(directory=None):
+    """[(taken_at, path)] of the database backups in directory, newest first"""
+    directory = directory or get_backup_dir()
+    if not os.path.isdir(directory):
+        return []
+    backups = []
+    for name in os.listdir(directory):
+        match = _BACKUP_FILE_RE.match(name)
+        if match:
+            timestamp = match.group(1)
+            taken_at = datetime.strptime(timestamp, TIMESTAMP_FORMAT if len(timestamp) > 15 else _OLD_TIMESTAMP_FORMAT)
+            backups.append((taken_at, os.path.join(directory, name)))
+    return sorted(backups, reverse=True)
+
+
+def apply_retention(directory=None, keep_last=KEEP_LAST, keep_daily=KEEP_DAILY,
+                    keep_weekly=KEEP_WEEKLY, keep_monthly=KEEP_MONTHLY):
+    """Delete the backups the retention policy no longer needs. Returns their paths."""
+    backups = list_backups(directory)
+    keep = {path for _, path in backups[:keep_last]}
+    periods = [
+        (keep_daily, lambda taken_at: taken_at.date()),
+        (keep_weekly, lambda taken_at: taken_at.isocalendar()[:2]),
+        (keep_monthly, lambda taken_at: (taken_at.year, taken_at.month)),
+    ]
+    for count, period in periods:
+        seen = set()
+        for taken_at, path in backups:
+            key = period(taken_at)
+            if key in seen:
+                continue
+            if len(seen) >= count:
+                break
+            seen.add(key)
+            keep.add(path)
 
-from database.database import db_manager
+    removed = [path for _, path in backups if path not in keep]
+    for path in removed:
+        try:
+            os.remove(path)
+        except OSError as e:
+            print(f"⚠️  Could not remove old backup {path}: {e}")
 
+    # Changes from before the oldest backup can no longer be replayed
+    kept = [taken_at for taken_at, path in backups if path in keep]
+    changes_dir = get_changes_dir(directory)
+    if kept and os.path.isdir(changes_dir):
+        oldest_day = min(kept).strftime("%Y%m%d")
+        for name in os.listdir(changes_dir):
+            match = _CHANGES_FILE_RE.match(name)
+            if match and match.group(1) < oldest_day:
+                os.remove(os.path.join(changes_dir, name))
+    return removed
 
-def create_backup(directory: str = "backups") -> str:
-    """Create a timestamped copy of the database file."""
+
+def _remove_stale_partials(directory):
+    """Clean up after a backup that was cut short"""
+    cutoff = time.time() - STALE_PARTIAL_AGE
+    for root, _, names in os.walk(directory):
+        for name in names:
+            path = os.path.join(root, name)
+            if name.endswith((".partial", ".verify")) and os.path.getmtime(path) < cutoff:
+                os.remove(path)
+
+
+def _backup_archives(directory):
+    """Back up the archive files that changed since their last backup. Returns how many."""
+    source_dir = get_archive_dir()
+    if not os.path.isdir(source_dir):
+        return 0
+    target_dir = os.path.join(directory, os.path.basename(source_dir))
+    copied = 0
+    for name in sorted(os.listdir(source_dir)):
+        if not name.endswith(".db"):
+            continue
+        source = os.path.join(source_dir, name)
+        target = os.path.join(target_dir, name + ".gz")
+        if os.path.exists(target) and os.path.getmtime(target) >= os.path.getmtime(source):
+            continue
+        os.makedirs(target_dir, exist_ok=True)
+        write_backup(target, source_path=source)
+        copied += 1
+    return copied
+
+
+def create_backup(directory=None, include_archives=True):
+    """Back up the database into a timestamped .db.gz file. Returns its path."""
+    if db_path == ":memory:":
+        raise ValueError("Cannot back up an in-memory database")
+    if not os.path.exists(db_path):
+        raise FileNotFoundError("Database file not found")
+    directory = directory or get_backup_dir()
     os.makedirs(directory, exist_ok=True)
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    backup_path = os.path.join(directory, f"construction_pos_{timestamp}.db")
-    db_manager.backup_database(backup_path)
+
+    with _backup_lock:
+        _remove_stale_partials(directory)
+        started = time.monotonic()
+        timestamp = datetime.now().strftime(TIMESTAMP_FORMAT)
+        backup_path = os.path.join(directory, BACKUP_FILE_PATTERN.format(timestamp=timestamp))
+        pages = write_backup(backup_path)
+        if include_archives:
+            archives = _backup_archives(directory)
+            if archives:
+                print(f"🗄️  Backed up {archives} changed archive file(s)")
+        apply_retention(directory)
+
+    print(f"✅ Database backed up to {backup_path} ({pages} pages in {time.monotonic() - started:.1f}s)")
     return backup_path
+
+
+def get_changes_dir(directory=None):
+    return os.path.join(directory or get_backup_dir(), CHANGES_DIR_NAME)
+
+
+def ship_changes(directory=None):
+    """Move logged changes from the database into the journal files. Returns how many."""
+    problem = None if directory else journal_location_problem()
+    if problem:
+        raise BackupError(f"Change journal not shipped: {problem}")
+    changes_dir = get_changes_dir(directory)
+    os.makedirs(changes_dir, exist_ok=True)
+    shipped = 0
+    connection = sqlite3.connect(db_path, timeout=30, isolation_level=None)
+    try:
+        while True:
+            changes = read_changes(connection, limit=SHIP_BATCH_SIZE)
+            if not changes:
+                break
+            by_day = {}
+            for change in changes:
+                by_day.setdefault(change['at'][:10].replace("-", ""), []).append(change)
+            for day, records in by_day.items():
+                with open(os.path.join(changes_dir, CHANGES_FILE_PATTERN.format(day=day)), "a",
+                          encoding="utf-8") as f:
+                    for record in records:
+                        f.write(json.dumps(record) + "\n")
+                    f.flush()
+                    os.fsync(f.fileno())
+            # A crash before this delete only ships the batch twice;
+            # restore_to() skips sequence numbers it has already seen
+            connection.execute("BEGIN IMMEDIATE")
+            try:
+                delete_changes(connection, changes[-1]['seq'])
+                connection.execute("COMMIT")
+            except Exception:
+                connection.execute("ROLLBACK")
+                raise
+            shipped += len(changes)
+    finally:
+        connection.close()
+    return shipped
+
+
+def read_journal(directory=None, after_seq=0):
+    """Shipped changes after a sequence number, by sequence, plus any the live database still holds"""
+    changes = {}
+    changes_dir = get_changes_dir(directory)
+    names = sorted(name for name in os.listdir(changes_dir) if _CHANGES_FILE_RE.match(name)) \
+        if os.path.isdir(changes_dir) else []
+    for name in names:
+        with open(os.path.join(changes_dir, name), encoding="utf-8") as f:
+            for line in f:
+                try:
+                    change = json.loads(line)
+                except ValueError:
+                    # A line cut short by a crash
+                    continue
+                if change['seq'] > after_seq:
+                    changes[change['seq']] = change
+    if os.path.exists(db_path):
+        try:
+            connection = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+            try:
+                for change in read_changes(connection, after_seq):
+                    changes.setdefault(change['seq'], change)
+            finally:
+                connection.close()
+        except sqlite3.Error as e:
+            print(f"⚠️  Could not read unshipped changes from {db_path}: {e}")
+    return [changes[seq] for seq in sorted(changes)]
+
+
+def _extract_backup(backup_path, target_path):
+    if backup_path.endswith(".gz"):
+        with gzip.open(backup_path, "rb") as source, open(target_path, "wb") as target:
+            shutil.copyfileobj(source, target, CHUNK_SIZE)
+    else:
+        shutil.copyfile(backup_path, target_path)
+
+
+def restore_to(until=None, output=None, backup_path=None, directory=None):
+    """Rebuild the database as it was at ``until`` from a backup and the change journal.
+
+    Picks the newest backup taken before ``until`` unless backup_path is
+    given, and replays the journal onto it up to ``until`` (or as far as it
+    goes). The result is written to ``output``, never over the live database.
+    Returns a summary dict.
+    """
+    directory = directory or get_backup_dir()
+    if backup_path is None:
+        candidates = [path for taken_at, path in list_backups(directory) if until is None or taken_at <= until]
+        if not candidates:
+            raise BackupError(f"No backup in {directory} was taken before {until or 'now'}")
+        backup_path = candidates[0]
+    if output is None:
+        output = os.path.join(os.path.dirname(os.path.abspath(db_path)),
+                              f"construction_pos_restored_{datetime.now().strftime(TIMESTAMP_FORMAT)}.db")
+    if os.path.abspath(output) == os.path.abspath(db_path):
+        raise ValueError("Restore into a new file; the live database is never overwritten")
+    until_text = until.strftime("%Y-%m-%d %H:%M:%S.%f")[:-3] if until else None
+
+    work_path = output + ".partial"
+    try:
+        _extract_backup(backup_path, work_path)
+        connection = sqlite3.connect(work_path, isolation_level=None)
+        try:
+            base_seq = last_seq(connection)
+        finally:
+            connection.close()
+
+        # Bring an older backup up to the current schema first
+        engine = create_engine(f"sqlite:///{work_path}")
+        try:
+            Base.metadata.create_all(bind=engine)
+            run_migrations(engine)
+        finally:
+            engine.dispose()
+
+        journal = read_journal(directory, base_seq)
+        connection = sqlite3.connect(work_path, isolation_level=None)
+        try:
+            remove_change_capture(connection)
+            tables = captured_tables(connection)
+            connection.execute("BEGIN")
+            applied, restored_to = 0, None
+            for change in journal:
+                if change['seq'] != base_seq + applied + 1:
+                    print(f"⚠️  The change journal has a gap after change {base_seq + applied}; "
+                          "restoring up to there")
+                    break
+                if until_text and change['at'] > until_text:
+                    break
+                apply_change(connection, change, tables)
+                applied += 1
+                restored_to = change['at']
+
+            # Derived tables are not in the journal; recompute them from the sales
+            archived = [year for year, in connection.execute("SELECT year FROM sales_archives")]
+            for statement in rebuild_statements(archived):
+                connection.execute(statement)
+            # The next sale of each day seeds its number from the restored sales
+            connection.execute("DELETE FROM sale_sequences")
+
+            # Changes of the restored database must not reuse the numbers of
+            # the ones left out, or a later restore would mix the two
+            restored_seq = base_seq + applied
+            newest_seq = journal[-1]['seq'] if journal else restored_seq
+            connection.execute("DELETE FROM change_log")
+            set_last_seq(connection, newest_seq + 1 if newest_seq > restored_seq else restored_seq)
+            connection.execute("COMMIT")
+            install_change_capture(connection)
+        finally:
+            connection.close()
+
+        problems = check_database(work_path)
+        if problems:
+            raise BackupError(f"Restored database failed the integrity check: {problems[0]}")
+        os.replace(work_path, output)
+    finally:
+        if os.path.exists(work_path):
+            os.remove(work_path)
+
+    print(f"✅ Restored {backup_path} plus {applied} change(s) into {output}")
+    return {'backup': backup_path, 'output': output, 'applied': applied,
+            'restored_to': restored_to or "the backup"}
+
+
+class BackupScheduler:
+    """Background thread that backs the database up every backup_interval_hours"""
+
+    def __init__(self, backup=create_backup):
+        self.backup = backup
+        self.last_backup = None
+        self.last_error = None
+        self._stop = threading.Event()
+        self._worker = None
+        self._lock = threading.Lock()
+        self._not_owner_reason = None
+
+    def interval(self):
+        """The backup interval, or None when scheduled backups are off"""
+        hours = DatabaseUtils.get_typed_setting('backup_interval_hours', DEFAULT_INTERVAL_HOURS)
+        return timedelta(hours=hours) if hours and hours > 0 else None
+
+    def is_due(self):
+        interval = self.interval()
+        if interval is None:
+            return False
+        backups = list_backups()
+        return not backups or datetime.now() - backups[0][0] >= interval
+
+    def start(self):
+        """Start the scheduler thread, if it is not running yet"""
+        if db_manager.is_fallback:
+            # Nothing worth keeping in a temporary database
+            return
+        with self._lock:
+            if self._worker is not None and self._worker.is_alive():
+                return
+            self._stop.clear()
+            self._worker = threading.Thread(target=self._run, name="database-backup", daemon=True)
+            self._worker.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def is_owner(self):
+        """Whether this process ships the change journal and takes the scheduled
+        backups; only one per database does, so retention runs in one place"""
+        problem = journal_location_problem()
+        if problem is None:
+            try:
+                problem = None if hold_backup_lease() else "another till holds the backup lease"
+            except Exception as e:
+                problem = f"the backup lease could not be taken: {e}"
+        if problem != self._not_owner_reason:
+            # Report changes of ownership, not every round
+            print(f"ℹ️  No scheduled backups from this process: {problem}" if problem
+                  else "✅ This process takes the scheduled backups and ships the change journal")
+            self._not_owner_reason = problem
+        return problem is None
+
+    def _run(self):
+        delay = STARTUP_DELAY
+        next_check = 0
+        while not self._stop.wait(delay):
+            delay = SHIP_INTERVAL
+            if not self.is_owner():
+                continue
+            try:
+                ship_changes()
+            except Exception as e:
+                print(f"⚠️  Shipping the change journal failed: {e}")
+            if time.monotonic() < next_check:
+                continue
+            next_check = time.monotonic() + CHECK_INTERVAL
+            try:
+                if self.is_due() and hold_backup_lease(duration=BACKUP_LEASE_SECONDS):
+                    self.last_backup = self.backup()
+                    self.last_error = None
+            except Exception as e:
+                self.last_error = str(e)
+                print(f"❌ Scheduled backup failed: {e}")
+
+
+backup_scheduler = BackupScheduler()
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Back up the database while it is in use")
+    parser.add_argument("--dir", help="Backup folder (default: the backup_dir setting or ./backups)")
+    parser.add_argument("--list", action="store_true", help="List the existing backups")
+    parser.add_argument("--verify", metavar="FILE", help="Check that a backup file can be restored")
+    parser.add_argument("--restore", action="store_true", help="Rebuild the database from a backup and the change journal")
+    parser.add_argument("--until", type=datetime.fromisoformat, help="Restore up to this time (default: as far as possible)")
+    parser.add_argument("--from", dest="backup", metavar="FILE", help="Backup to restore (default: the newest before --until)")
+    parser.add_argument("--output", metavar="FILE", help="Where to write the restored database")
+    args = parser.parse_args()
+
+    if args.restore:
+        result = restore_to(args.until, args.output, args.backup, args.dir)
+        print(f"Restored to {result['restored_to']}. Stop every till, then replace {db_path} with {result['output']}.")
+    elif args.verify:
+        problems = verify_backup(args.verify)
+        print("✅ Backup is sound" if not problems else "❌ " + "\n❌ ".join(problems))
+    elif args.list:
+        for taken_at, path in list_backups(args.dir):
+            print(f"{taken_at:%Y-%m-%d %H:%M:%S}  {os.path.getsize(path):>12,}  {path}")
+    else:
+        create_backup(args.dir)
@@ -1,4 +1,6 @@
-from database.database import DatabaseUtils
+import threading
+
+from database.database import DatabaseUtils, settings_registry
 
 TRANSLATIONS = {
     'en': {
@@ -205,6 +207,37 @@ TRANSLATIONS = {
         'custom': 'Custom',
         'from_label': 'From:',
         'to_label': 'To:',
+        'db_profile': 'Database Profile',
+        'db_profile_active': 'Active profile',
+        'db_profile_restart': 'Restart the application to apply the new database profile.',
+        'db_profile_env_override': 'Set by the {} environment variable ({}); unset it to choose here.',
+        'server_url': 'Sale Server URL',
+        'server_url_restart': 'Restart the application to connect to the new sale server.',
+        'sync_pending': '{} sale(s) waiting to sync',
+        'sync_failed': '{} sale(s) rejected on sync',
+        'sale_saved_offline': 'Sale {} saved offline.\nTotal: {} {}\n\nIt will be sent to the shared database when it is reachable again.',
+        'stock_conflict_title': 'Product Changed',
+        'stock_conflict': 'This product was changed on another terminal. The list has been reloaded, please try again.',
+        'scan_added': 'Added {0} × {1}',
+        'scan_unknown': 'Unknown barcode: {0}',
+        'diagnostics': 'Diagnostics',
+        'slow_query_log': 'Slow-query log',
+        'slow_statements': 'Slowest Statements',
+        'recent_statements': 'Recent Statements',
+        'n_plus_one': 'Repeated Statements (N+1, {0}+ per action)',
+        'clear': 'Clear',
+        'count': 'Count',
+        'total_ms': 'Total (ms)',
+        'avg_ms': 'Avg (ms)',
+        'max_ms': 'Max (ms)',
+        'duration_ms': 'Time (ms)',
+        'rows': 'Rows',
+        'call_site': 'Called From',
+        'statement': 'Statement',
+        'time': 'Time',
+        'cancel': 'Cancel',
+        'report_running': 'Running report...',
+        'report_cancelled': 'Report cancelled',
 
     },
     'fr': {
@@ -410,12 +443,113 @@ TRANSLATIONS = {
         'custom': 'Personnalisé',
         'from_label': 'De :',
         'to_label': 'À :',
+        'db_profile': 'Profil de base de données',
+        'db_profile_active': 'Profil actif',
+        'db_profile_restart': "Redémarrez l'application pour appliquer le nouveau profil de base de données.",
+        'db_profile_env_override': "Défini par la variable d'environnement {} ({}) ; supprimez-la pour choisir ici.",
+        'server_url': 'URL du serveur de ventes',
+        'server_url_restart': "Redémarrez l'application pour vous connecter au nouveau serveur de ventes.",
+        'sync_pending': '{} vente(s) en attente de synchronisation',
+        'sync_failed': '{} vente(s) refusée(s) à la synchronisation',
+        'sale_saved_offline': "Vente {} enregistrée hors ligne.\nTotal : {} {}\n\nElle sera envoyée à la base partagée dès qu'elle sera de nouveau accessible.",
+        'stock_conflict_title': 'Produit modifié',
+        'stock_conflict': 'Ce produit a été modifié sur un autre terminal. La liste a été rechargée, veuillez réessayer.',
+        'scan_added': 'Ajouté {0} × {1}',
+        'scan_unknown': 'Code-barres inconnu : {0}',
+        'diagnostics': 'Diagnostics',
+        'slow_query_log': 'Journal des requêtes lentes',
+        'slow_statements': 'Requêtes les plus lentes',
+        'recent_statements': 'Requêtes récentes',
+        'n_plus_one': 'Requêtes répétées (N+1, {0}+ par action)',
+        'clear': 'Effacer',
+        'count': 'Nombre',
+        'total_ms': 'Total (ms)',
+        'avg_ms': 'Moy. (ms)',
+        'max_ms': 'Max (ms)',
+        'duration_ms': 'Durée (ms)',
+        'rows': 'Lignes',
+        'call_site': 'Appelé depuis',
+        'statement': 'Requête',
+        'time': 'Heure',
+        'cancel': 'Annuler',
+        'report_running': 'Rapport en cours...',
+        'report_cancelled': 'Rapport annulé',
 
     },
 }
 
 
-def translate(key: str) -> str:
-    """Translate a key based on current language setting."""
-    lang = DatabaseUtils.get_setting_value('language', 'en')
-    return TRANSLATIONS.get(lang, TRANSLATIONS['en']).get(key, key)
+# Lookup table of the active language. It is bound once, on first use, and
+# rebound only when the language setting changes.
+_catalog = None
+_active_language = None
+_bind_lock = threading.Lock()
+
+
+def compile_catalog(lang: str) -> dict:
+    """Build the lookup table for a language, falling back to English per key."""
+    catalog = dict(TRANSLATIONS['en'])
+    if lang != 'en':
+        catalog.update(TRANSLATIONS.get(lang, {}))
+    return catalog
+
+
+def set_language(lang: str):
+    """Bind the lookup table used by translate()."""
+    global _catalog, _active_language
+    with _bind_lock:
+        _catalog = compile_catalog(lang)
+        _active_language = lang
+
+
+def get_language() -> str:
+    """Return the language translate() is currently bound to."""
+    if _catalog is None:
+        set_language(DatabaseUtils.get_setting_value('language', 'en'))
+    return _active_language
+
+
+def _on_setting_changed(key, value):
+    if key == 'language' and value != _active_language:
+        set_language(value)
+
+
+settings_registry.add_listener(_on_setting_changed)
+
+
+def translate(key: str, *args, **kwargs) -> str:
+    """Translate a key in the active language, formatting it with any arguments."""
+    catalog = _catalog
+    if catalog is None:
+        get_language()
+        catalog = _catalog
+    text = catalog.get(key, key)
+    if args or kwargs:
+        return text.format(*args, **kwargs)
+    return text
+
+
+class LazyMessage:
+    """A translatable message that is looked up and formatted when rendered.
+
+    Useful for text built before the language is known or kept across a
+    language switch, e.g. status messages stored on a window.
+    """
+
+    __slots__ = ('key', 'args', 'kwargs')
+
+    def __init__(self, key, *args, **kwargs):
+        self.key = key
+        self.args = args
+        self.kwargs = kwargs
+
+    def __str__(self):
+        return translate(self.key, *self.args, **self.kwargs)
+
+    def __repr__(self):
+        return f"LazyMessage({self.key!r})"
+
+
+def lazy(key: str, *args, **kwargs) -> LazyMessage:
+    """Return a message translated at render time instead of now."""
+    return LazyMessage(key, *args, **kwargs)
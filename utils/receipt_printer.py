@@ -12,6 +12,11 @@ from utils.i18n import translate as _
 from datetime import datetime
 import os
 
+# The daily report reads its sales list in pages of this size, and lists at
+# most DAILY_REPORT_MAX_SALES sales (the latest); the totals cover all of them
+DAILY_REPORT_PAGE_SIZE = 1000
+DAILY_REPORT_MAX_SALES = 5000
+
 class ReceiptPrinter:
     def __init__(self):
         self.styles = getSampleStyleSheet()
@@ -320,7 +325,7 @@ class ReceiptPrinter:
             
             # Email configuration (should be in settings)
             smtp_server = DatabaseUtils.get_setting_value('smtp_server', 'smtp.gmail.com')
-            smtp_port = int(DatabaseUtils.get_setting_value('smtp_port', '587'))
+            smtp_port = DatabaseUtils.get_typed_setting('smtp_port', 587)
             email_user = DatabaseUtils.get_setting_value('email_user', '')
             email_password = DatabaseUtils.get_setting_value('email_password', '')
             
@@ -377,8 +382,9 @@ class ReceiptPrinter:
     def generate_daily_sales_report(self, date):
         """Generate daily sales report"""
         try:
-            from database.models import Sale
             from database.database import db_manager
+            from database.reports import sales_in_range
+            from database.rollups import sales_summary
             
             # Create reports directory if it doesn't exist
             reports_dir = "reports"
@@ -389,15 +395,24 @@ class ReceiptPrinter:
             filename = f"daily_sales_report_{date.strftime('%Y%m%d')}.pdf"
             filepath = os.path.join(reports_dir, filename)
             
-            # Get sales data
+            # Get sales data: plain rows in keyset pages, newest first
+            day_start = date.replace(hour=0, minute=0, second=0, microsecond=0)
+            day_end = date.replace(hour=23, minute=59, second=59, microsecond=999999)
             session = db_manager.get_session()
             try:
-                sales = session.query(Sale).filter(
-                    Sale.created_at >= date,
-                    Sale.created_at < date.replace(hour=23, minute=59, second=59)
-                ).order_by(Sale.created_at).all()
+                summary = sales_summary(session, date.date(), date.date())
+                sales = []
+                after = None
+                while len(sales) < DAILY_REPORT_MAX_SALES:
+                    page = sales_in_range(session, day_start, day_end, after=after,
+                                          limit=min(DAILY_REPORT_PAGE_SIZE, DAILY_REPORT_MAX_SALES - len(sales)))
+                    sales.extend(page)
+                    if len(page) < DAILY_REPORT_PAGE_SIZE:
+                        break
+                    after = (page[-1].created_at, page[-1].id)
             finally:
                 session.close()
+            sales.reverse()
             
             # Create PDF document
             doc = SimpleDocTemplate(
@@ -421,9 +436,9 @@ class ReceiptPrinter:
                 story.append(Paragraph("No sales recorded for this date.", self.styles['Normal']))
             else:
                 # Sales summary
-                total_sales = len(sales)
-                total_amount = sum(sale.total_amount for sale in sales)
-                total_items = sum(len(sale.sale_items) for sale in sales)
+                total_sales = summary['sale_count']
+                total_amount = summary['total_amount']
+                total_items = summary['line_count']
                 
                 currency = DatabaseUtils.get_setting_value('currency', 'FCFA')
                 
@@ -450,7 +465,7 @@ class ReceiptPrinter:
                 sales_data = [['Receipt #', 'Time', 'Customer', 'Items', 'Total']]
                 
                 for sale in sales:
-                    customer_name = sale.customer.name if sale.customer else 'Walk-in'
+                    customer_name = sale.customer_name or 'Walk-in'
                     if len(customer_name) > 15:
                         customer_name = customer_name[:12] + "..."
                     
@@ -458,7 +473,7 @@ class ReceiptPrinter:
                         sale.sale_number,
                         sale.created_at.strftime('%H:%M'),
                         customer_name,
-                        str(len(sale.sale_items)),
+                        str(sale.item_count),
                         f"{sale.total_amount:,.0f}"
                     ])
                 
@@ -478,6 +493,11 @@ class ReceiptPrinter:
                 ]))
                 
                 story.append(sales_table)
+                
+                if total_sales > len(sales):
+                    story.append(Spacer(1, 6))
+                    story.append(Paragraph(f"Showing the last {len(sales):,} of {total_sales:,} sales.",
+                                           self.styles['Normal']))
             
             # Build PDF
             doc.build(story)
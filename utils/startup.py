@@ -0,0 +1,48 @@
+# utils/startup.py
+"""Startup phase timings, printed by ``python main.py --startup-trace``"""
+import threading
+import time
+from contextlib import contextmanager
+
+
+class StartupTrace:
+    """Records when each startup phase ran and how long it took"""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.enabled = False
+        self._phases = []  # (offset, duration, name, thread name)
+        self._lock = threading.Lock()
+
+    def record(self, name, start, end=None):
+        end = time.perf_counter() if end is None else end
+        with self._lock:
+            self._phases.append((start - self.started, end - start, name, threading.current_thread().name))
+
+    @contextmanager
+    def phase(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, start)
+
+    def mark(self, name):
+        """Record a point in time, e.g. a window becoming visible"""
+        now = time.perf_counter()
+        self.record(name, now, now)
+
+    def report(self):
+        """Print the phases in the order they started, if tracing is on"""
+        if not self.enabled:
+            return
+        with self._lock:
+            phases = sorted(self._phases)
+        print("⏱️  Startup trace (ms since start, duration, phase, thread)")
+        for offset, duration, name, thread in phases:
+            length = f"{duration * 1000:8.1f}" if duration else "       -"
+            print(f"   {offset * 1000:8.1f} {length}  {name:<28} {thread}")
+
+
+# Created when main.py is imported, so offsets count from program start
+startup_trace = StartupTrace()